@@ -14,6 +14,8 @@ import time
 import threading
 import ctypes
 
+from catalog import load_catalog
+
 # MQTT Configuration``
 BROKER_URL = "mqtts://mqtt.dhan.co"
 CONFIG_MQTT_CLIENT_ID = "mqtt-12x"
@@ -325,90 +327,8 @@ class IndicesContent(ContentWidget):
         # Keep track of the current view mode
         self.current_mode = "slide"
         
-        # NSE Indices data - 54 indices (9 screens × 6 cards)
-        self.indices_data = [
-            # Screen 1
-            [
-                {"title": "Nifty 50", "value": "₹ 22,419.95", "change": "0.79%"},
-                {"title": "Nifty Bank", "value": "₹ 47,580.30", "change": "0.82%"},
-                {"title": "Nifty IT", "value": "₹ 37,890.15", "change": "1.12%"},
-                {"title": "Nifty Auto", "value": "₹ 19,875.40", "change": "0.45%"},
-                {"title": "Nifty FMCG", "value": "₹ 52,640.75", "change": "0.28%"},
-                {"title": "Nifty Pharma", "value": "₹ 15,980.60", "change": "-0.32%"}
-            ],
-            # Screen 2
-            [
-                {"title": "Nifty Metal", "value": "₹ 7,890.25", "change": "1.45%"},
-                {"title": "Nifty Media", "value": "₹ 2,340.85", "change": "-0.78%"},
-                {"title": "Nifty Realty", "value": "₹ 890.45", "change": "0.92%"},
-                {"title": "Nifty PSU Bank", "value": "₹ 4,570.30", "change": "1.23%"},
-                {"title": "Nifty 50", "value": "₹ 23,780.55", "change": "0.67%"},
-                {"title": "Nifty IT", "value": "₹ 34,560.90", "change": "-0.45%"}
-            ],
-            # Screen 3
-            [
-                {"title": "Nifty Media", "value": "₹ 19,870.35", "change": "0.56%"},
-                {"title": "Nifty Pharma", "value": "₹ 31,240.80", "change": "-0.23%"},
-                {"title": "Nifty Oil & Gas", "value": "₹ 12,450.65", "change": "0.89%"},
-                {"title": "Nifty Healthcare", "value": "₹ 9,780.40", "change": "0.34%"},
-                {"title": "Nifty PSE", "value": "₹ 5,670.25", "change": "-0.67%"},
-                {"title": "Nifty Auto", "value": "₹ 6,890.15", "change": "0.78%"}
-            ],
-            # Screen 4
-            [
-                {"title": "Nifty MNC", "value": "₹ 21,340.75", "change": "0.45%"},
-                {"title": "Nifty Services Sector", "value": "₹ 27,890.60", "change": "-0.34%"},
-                {"title": "Nifty IT", "value": "₹ 8,970.30", "change": "1.56%"},
-                {"title": "Nifty Metal", "value": "₹ 11,230.85", "change": "0.23%"},
-                {"title": "Nifty CPSE", "value": "₹ 3,450.40", "change": "-0.89%"},
-                {"title": "Nifty Bank", "value": "₹ 4,560.95", "change": "0.67%"}
-            ],
-            # Screen 5
-            [
-                {"title": "Nifty Midcap 50", "value": "₹ 12,780.45", "change": "0.91%"},
-                {"title": "Nifty Midcap 100", "value": "₹ 15,670.30", "change": "-0.45%"},
-                {"title": "Nifty Smallcap 50", "value": "₹ 5,890.65", "change": "1.23%"},
-                {"title": "Nifty Smallcap 100", "value": "₹ 7,450.20", "change": "0.78%"},
-                {"title": "Nifty Midcap Liquid 15", "value": "₹ 9,230.75", "change": "-0.56%"},
-                {"title": "Nifty India Defence", "value": "₹ 6,780.90", "change": "1.12%"}
-            ],
-            # Screen 6
-            [
-                {"title": "Nifty Alpha 50", "value": "₹ 18,920.35", "change": "0.34%"},
-                {"title": "Nifty50 Value 20", "value": "₹ 13,450.80", "change": "-0.67%"},
-                {"title": "Nifty IT", "value": "₹ 16,780.65", "change": "0.89%"},
-                {"title": "Nifty Metal", "value": "₹ 14,560.40", "change": "0.45%"},
-                {"title": "Nifty100 Low Volatility 30", "value": "₹ 11,890.25", "change": "-0.23%"},
-                {"title": "Nifty Alpha Low-Volatility 30", "value": "₹ 8,670.60", "change": "1.34%"}
-            ],
-            # Screen 7
-            [
-                {"title": "Nifty 200 Quality 30", "value": "₹ 17,890.30", "change": "0.67%"},
-                {"title": "Nifty 100 Quality 30", "value": "₹ 15,450.85", "change": "-0.45%"},
-                {"title": "Nifty 50 Dividend Points", "value": "₹ 12,670.40", "change": "0.91%"},
-                {"title": "Nifty MNC", "value": "₹ 9,890.95", "change": "0.23%"},
-                {"title": "Nifty IT", "value": "₹ 7,450.20", "change": "-0.78%"},
-                {"title": "Nifty 100 ESG", "value": "₹ 5,670.75", "change": "1.12%"}
-            ],
-            # Screen 8
-            [
-                {"title": "Nifty 100 Enhanced ESG", "value": "₹ 14,560.30", "change": "0.45%"},
-                {"title": "Nifty 200 Momentum 30", "value": "₹ 11,890.85", "change": "-0.34%"},
-                {"title": "Nifty IT", "value": "₹ 8,970.40", "change": "1.23%"},
-                {"title": "Nifty Media", "value": "₹ 6,780.95", "change": "0.56%"},
-                {"title": "Nifty Microcap 250", "value": "₹ 4,560.20", "change": "-0.89%"},
-                {"title": "Nifty Total Market", "value": "₹ 3,450.75", "change": "0.67%"}
-            ],
-            # Screen 9
-            [
-                {"title": "Nifty 500 Value 50", "value": "₹ 13,670.30", "change": "0.91%"},
-                {"title": "Nifty Next 50", "value": "₹ 10,890.85", "change": "-0.45%"},
-                {"title": "Nifty 100 Liquid 15", "value": "₹ 8,450.40", "change": "1.23%"},
-                {"title": "Nifty Metal", "value": "₹ 6,780.95", "change": "0.34%"},
-                {"title": "Nifty 200 Alpha 30", "value": "₹ 4,560.20", "change": "-0.67%"},
-                {"title": "India VIX", "value": "₹ 786.0", "change": "-0.79%"}
-            ]
-        ]
+        # Titles, page layout and placeholders come from the shared catalog manifest
+        self.indices_data = load_catalog().screens()
         
         # Create stacked widget to hold both view modes
         self.view_stack = QStackedWidget()
@@ -430,11 +350,8 @@ class IndicesContent(ContentWidget):
         self.view_stack.addWidget(self.slide_view)
         self.view_stack.setCurrentWidget(self.slide_view)
         
-        # Create a mapping from index names to card positions
-        self.index_map = {}
-        for screen_idx, screen_data in enumerate(self.indices_data):
-            for card_idx, card_data in enumerate(screen_data):
-                self.index_map[card_data["title"]] = (screen_idx, card_idx)
+        # Feed key -> bound update_data of every card showing it, the scroll view adds its own
+        self.dispatch = load_catalog().bind(card for screen_cards in self.cards for card in screen_cards)
                 
         # Initialize scroll mode variables (to be used later)
         self.scroll_container = None
@@ -486,7 +403,7 @@ class IndicesContent(ContentWidget):
         
         # Create dots for each screen
         self.page_dots = []
-        for i in range(9):  # 9 screens
+        for i in range(len(self.indices_data)):  # One per screen
             dot = QLabel()
             dot.setFixedSize(12, 12)  # Size of each dot
             dot.setStyleSheet("""
@@ -670,6 +587,8 @@ class IndicesContent(ContentWidget):
             
             self.scroll_cards.append(screen_cards)
         
+        load_catalog().bind((card for screen_cards in self.scroll_cards for card in screen_cards), self.dispatch)
+        
         # Add scrolling animation properties
         self.scroll_animation = QPropertyAnimation(self.scroll_container, b"pos")
         self.scroll_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
@@ -760,22 +679,6 @@ class IndicesContent(ContentWidget):
         
         return is_within_bounds, min_x
     
-    def update_card_data(self, index_name, value, change):
-        """Update data for both slide and scroll views"""
-        if index_name in self.index_map:
-            screen_idx, card_idx = self.index_map[index_name]
-            
-            # Update in slide view
-            if 0 <= screen_idx < len(self.cards) and 0 <= card_idx < len(self.cards[screen_idx]):
-                self.cards[screen_idx][card_idx].update_data(value, change)
-            
-            # Update in scroll view if initialized
-            if self.scroll_view is not None and self.scroll_cards:
-                if 0 <= screen_idx < len(self.scroll_cards) and 0 <= card_idx < len(self.scroll_cards[screen_idx]):
-                    self.scroll_cards[screen_idx][card_idx].update_data(value, change)
-            
-                print(f"Updated {index_name} with value: {value}, change: {change}")
-    
     def eventFilter(self, obj, event):
         # Handle slide view events
         if obj == self.screens_stack and self.current_mode == "slide":
@@ -1203,64 +1106,6 @@ class GlassmorphicUI(QWidget):
         self.exit_sequence = "yogi"
         self.minimize_sequence = "min"
         
-        # Define mapping between index IDs and display names
-        self.index_id_to_name = {
-            "IDX-I-1": "Nifty 50",
-            "IDX-I-2": "Nifty Bank",
-            "IDX-I-3": "Nifty IT",
-            "IDX-I-4": "Nifty Auto",
-            "IDX-I-5": "Nifty FMCG",
-            "IDX-I-6": "Nifty Pharma",
-            "IDX-I-7": "Nifty Metal",
-            "IDX-I-8": "Nifty Media",
-            "IDX-I-9": "Nifty Realty",
-            "IDX-I-10": "Nifty PSU Bank",
-            "IDX-I-11": "Nifty Private Bank",
-            "IDX-I-12": "Nifty Energy",
-            "IDX-I-13": "Nifty Financial Services",
-            "IDX-I-14": "Nifty Consumer Durables",
-            "IDX-I-15": "Nifty Oil & Gas",
-            "IDX-I-16": "Nifty Healthcare",
-            "IDX-I-17": "Nifty PSE",
-            "IDX-I-18": "Nifty Infrastructure",
-            "IDX-I-19": "Nifty MNC",
-            "IDX-I-20": "Nifty Services Sector",
-            "IDX-I-21": "Nifty India Digital",
-            "IDX-I-22": "Nifty India Consumption",
-            "IDX-I-23": "Nifty CPSE",
-            "IDX-I-24": "Nifty India Manufacturing",
-            "IDX-I-25": "Nifty Midcap 50",
-            "IDX-I-26": "Nifty Midcap 100",
-            "IDX-I-27": "Nifty Smallcap 50",
-            "IDX-I-28": "Nifty Smallcap 100",
-            "IDX-I-29": "Nifty Midcap Liquid 15",
-            "IDX-I-30": "Nifty India Defence",
-            "IDX-I-31": "Nifty Alpha 50",
-            "IDX-I-32": "Nifty50 Value 20",
-            "IDX-I-33": "Nifty50 Equal Weight",
-            "IDX-I-34": "Nifty100 Equal Weight",
-            "IDX-I-35": "Nifty100 Low Volatility 30",
-            "IDX-I-36": "Nifty Alpha Low-Volatility 30",
-            "IDX-I-37": "Nifty200 Quality 30",
-            "IDX-I-38": "Nifty100 Quality 30",
-            "IDX-I-39": "Nifty50 Dividend Points",
-            "IDX-I-40": "Nifty Dividend Opportunities 50",
-            "IDX-I-41": "Nifty Growth Sectors 15",
-            "IDX-I-42": "Nifty100 ESG",
-            "IDX-I-43": "Nifty100 Enhanced ESG",
-            "IDX-I-44": "Nifty200 Momentum 30",
-            "IDX-I-45": "Nifty Commodities",
-            "IDX-I-46": "Nifty India Manufacturing",
-            "IDX-I-47": "Nifty Microcap 250",
-            "IDX-I-48": "Nifty Total Market",
-            "IDX-I-49": "Nifty500 Value 50",
-            "IDX-I-50": "Nifty Next 50",
-            "IDX-I-51": "Nifty100 Liquid 15",
-            "IDX-I-52": "Nifty MidSmallcap 400",
-            "IDX-I-53": "Nifty200 Alpha 30",
-            "IDX-I-54": "India VIX"
-        }
-        
         # Initialize MQTT client
         self.mqtt_client = MQTTClient(self)
         self.mqtt_client.data_received.connect(self.handle_mqtt_data)
@@ -1274,13 +1119,12 @@ class GlassmorphicUI(QWidget):
             if isinstance(data, list):
                 for item in data:
                     if 'key' in item and 'ltp' in item and 'p_ch' in item:
-                        index_id = item['key']
-                        if index_id in self.index_id_to_name:
-                            index_name = self.index_id_to_name[index_id]
+                        updates = self.indices_content.dispatch.get(item['key'])
+                        if updates:
                             value = f"₹ {item['ltp']:,.2f}"
                             change = f"{item['p_ch']:.2f}%"
-                            self.indices_content.update_card_data(index_name, value, change)
-                            print(f"Updated {index_name} with value: {value}, change: {change}")
+                            for update in updates:
+                                update(value, change)
         except Exception as e:
             print(f"Error handling MQTT data: {e}")
     
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from bisect import bisect_left, bisect_right
+from functools import partial
+from collections import deque, namedtuple
+
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QPainterPath
+from PyQt5.QtCore import Qt, QRectF, QTimer, pyqtSignal
+
+from dashlog import get_logger
+from catalog import BASE_DIR
+
+# Price-level and move rules, a missing file means no alerts
+ALERTS_PATH = os.environ.get("DHAN_ALERTS", os.path.join(BASE_DIR, "alerts.json"))
+# A rule that fired stays quiet this long, so a price hovering on a level does not flap
+ALERT_COOLDOWN = float(os.environ.get("DHAN_ALERT_COOLDOWN", "300"))
+# Fired alerts waiting for the UI; the oldest are dropped if it falls this far behind
+PENDING_LIMIT = 256
+# The UI picks fired alerts up at most this often
+DRAIN_INTERVAL = 250
+BANNER_SECONDS = 6
+BANNER_HEIGHT = 64
+
+log = get_logger("alerts")
+
+Alert = namedtuple("Alert", "ts slot text")
+
+
+class AlertError(ValueError):
+    pass
+
+
+class Rule:
+    __slots__ = ("slot", "text", "last_fired")
+
+    def __init__(self, slot, text):
+        self.slot = slot
+        self.text = text
+        self.last_fired = None
+
+
+class MoveWindow:
+    """ Rolling min and max of one slot's price over `seconds`
+
+    Monotonic deques give both in amortized O(1) per tick. Rules sharing
+    the window are kept sorted by threshold and fire when the move first
+    reaches them, so a tick only touches rules it newly crossed.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.lows = deque()
+        self.highs = deque()
+        self.thresholds = []
+        self.rules = []
+        # Rules whose threshold the current rise (fall) already reaches; they re-arm once it drops back
+        self.rise_reached = 0
+        self.fall_reached = 0
+
+    def add(self, threshold, rule):
+        i = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.rules.insert(i, rule)
+        if i < self.rise_reached:
+            self.rise_reached += 1
+        if i < self.fall_reached:
+            self.fall_reached += 1
+
+    def update(self, ts, ltp):
+        """ Percent rise from the window low and fall from the window high, both >= 0 """
+        while self.lows and self.lows[-1][1] >= ltp:
+            self.lows.pop()
+        self.lows.append((ts, ltp))
+        while self.highs and self.highs[-1][1] <= ltp:
+            self.highs.pop()
+        self.highs.append((ts, ltp))
+        start = ts - self.seconds
+        while self.lows[0][0] < start:
+            self.lows.popleft()
+        while self.highs[0][0] < start:
+            self.highs.popleft()
+        low, high = self.lows[0][1], self.highs[0][1]
+        return (ltp / low - 1) * 100 if low > 0 else 0.0, (1 - ltp / high) * 100 if high > 0 else 0.0
+
+
+class AlertEngine:
+    """ Price-level and move rules indexed per slot
+
+    Level rules sit in two sorted arrays per slot, one for upward and one
+    for downward crossings; a tick bisects the interval between the previous
+    and the new price, so only levels it actually crossed are visited. Move
+    rules share one MoveWindow per (slot, window length). Nothing here
+    touches the UI: fired alerts are queued in `pending` and drained by
+    whoever renders them.
+    """
+
+    def __init__(self, catalog, cooldown=ALERT_COOLDOWN):
+        self.catalog = catalog
+        self.cooldown = cooldown
+        count = len(catalog)
+        self.last = [None] * count
+        # Per slot: sorted levels and the rules in the same order, None until a rule is added
+        self.up = [None] * count
+        self.down = [None] * count
+        # Per slot: {seconds: MoveWindow}
+        self.moves = [None] * count
+        self.rule_count = 0
+        self.pending = deque(maxlen=PENDING_LIMIT)
+
+    def add_level(self, slot, level, above=True):
+        title = self.catalog.titles[slot]
+        rule = Rule(slot, f"{title} {'above' if above else 'below'} ₹ {level:,.2f}")
+        table = self.up if above else self.down
+        if table[slot] is None:
+            table[slot] = ([], [])
+        levels, rules = table[slot]
+        i = bisect_right(levels, level)
+        levels.insert(i, level)
+        rules.insert(i, rule)
+        self.rule_count += 1
+        return rule
+
+    def add_move(self, slot, percent, seconds):
+        if self.moves[slot] is None:
+            self.moves[slot] = {}
+        window = self.moves[slot].get(seconds)
+        if window is None:
+            window = self.moves[slot][seconds] = MoveWindow(seconds)
+        rule = Rule(slot, f"{self.catalog.titles[slot]} moved {percent:g}% in {seconds / 60:g} min")
+        window.add(percent, rule)
+        self.rule_count += 1
+        return rule
+
+    def bind(self, dispatch):
+        # Only instruments with rules cost anything per tick
+        for slot, key in enumerate(self.catalog.keys):
+            if self.up[slot] or self.down[slot] or self.moves[slot]:
+                dispatch.setdefault(key, []).append(partial(self.update_slot, slot))
+        return dispatch
+
+    def fire(self, rule, ts, detail=""):
+        if rule.last_fired is not None and ts - rule.last_fired < self.cooldown:
+            return
+        rule.last_fired = ts
+        self.pending.append(Alert(ts, rule.slot, rule.text + detail))
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # Snapshot values restored at startup only seed the previous price
+        previous = self.last[slot]
+        self.last[slot] = ltp
+        if stale:
+            return
+        ts = time.time()
+        if previous is not None and ltp != previous:
+            if ltp > previous and self.up[slot] is not None:
+                levels, rules = self.up[slot]
+                # Levels in (previous, ltp]
+                for i in range(bisect_right(levels, previous), bisect_right(levels, ltp)):
+                    self.fire(rules[i], ts)
+            elif ltp < previous and self.down[slot] is not None:
+                levels, rules = self.down[slot]
+                # Levels in [ltp, previous)
+                for i in range(bisect_left(levels, ltp), bisect_left(levels, previous)):
+                    self.fire(rules[i], ts)
+        if self.moves[slot] is not None:
+            for window in self.moves[slot].values():
+                rise, fall = window.update(ts, ltp)
+                # Each edge arms on its own, so a rise fading while a fall builds still fires
+                reached = bisect_right(window.thresholds, rise)
+                for i in range(window.rise_reached, reached):
+                    self.fire(window.rules[i], ts, f" (▲{rise:.2f}%)")
+                window.rise_reached = reached
+                reached = bisect_right(window.thresholds, fall)
+                for i in range(window.fall_reached, reached):
+                    self.fire(window.rules[i], ts, f" (▼{fall:.2f}%)")
+                window.fall_reached = reached
+
+    def drain(self, limit=None):
+        alerts = []
+        while self.pending and (limit is None or len(alerts) < limit):
+            alerts.append(self.pending.popleft())
+        return alerts
+
+    def load(self, rules, source="<rules>"):
+        """ Add rules from manifest entries; all problems are reported together """
+        errors = []
+        for n, entry in enumerate(rules):
+            slot = self.catalog.slot_by_key.get(entry.get("key")) if isinstance(entry, dict) else None
+            if slot is None:
+                errors.append(f"rule {n} needs the key of a catalog instrument")
+                continue
+            numbers = {name: entry[name] for name in ("above", "below", "move", "minutes") if name in entry}
+            if any(isinstance(v, bool) or not isinstance(v, (int, float)) or v <= 0 for v in numbers.values()):
+                errors.append(f"rule {n} ({entry['key']}): levels, move and minutes must be positive numbers")
+            elif "above" in numbers:
+                self.add_level(slot, float(numbers["above"]), above=True)
+            elif "below" in numbers:
+                self.add_level(slot, float(numbers["below"]), above=False)
+            elif "move" in numbers and "minutes" in numbers:
+                self.add_move(slot, float(numbers["move"]), numbers["minutes"] * 60)
+            else:
+                errors.append(f"rule {n} ({entry['key']}) needs \"above\", \"below\" or \"move\" with \"minutes\"")
+        if errors:
+            raise AlertError(f"{source}: " + "; ".join(errors))
+        return self
+
+
+def load_rules(catalog, path=ALERTS_PATH):
+    """ Engine with the rules in path, empty when the file does not exist """
+    engine = AlertEngine(catalog)
+    if not os.path.exists(path):
+        return engine
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise AlertError(f"cannot read alert rules {path}: {e}") from e
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("rules"), list):
+        raise AlertError(f"{path}: expected an object with a \"rules\" list")
+    engine.load(manifest["rules"], path)
+    log.info("Loaded %d alert rules from %s", engine.rule_count, path)
+    return engine
+
+
+class AlertBanner(QWidget):
+    """ Strip across the top of the window showing the latest fired alert
+
+    The engine only queues alerts; this widget drains the queue on its own
+    timer, so a burst of ticks never paints more than once per interval.
+    `fired` is emitted per drained alert for views that want to flash too.
+    """
+
+    fired = pyqtSignal(int)
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.text = ""
+        self.more = 0
+        self.banner_font = QFont("Segoe UI", 18, QFont.Weight.Bold)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.hide()
+
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setInterval(DRAIN_INTERVAL)
+        self.drain_timer.timeout.connect(self.drain)
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.setInterval(BANNER_SECONDS * 1000)
+        self.hide_timer.timeout.connect(self.hide)
+        if engine.rule_count:
+            self.drain_timer.start()
+
+    def drain(self):
+        alerts = self.engine.drain()
+        if not alerts:
+            return
+        for alert in alerts:
+            log.info("Alert: %s", alert.text)
+            self.fired.emit(alert.slot)
+        # Alerts still on screen count towards the "more" of the next burst
+        self.more = (self.more + 1 if self.isVisible() else 0) + len(alerts) - 1
+        self.text = alerts[-1].text
+        parent = self.parentWidget()
+        if parent is not None:
+            self.setGeometry(40, 20, parent.width() - 80, BANNER_HEIGHT)
+        self.show()
+        self.raise_()
+        self.update()
+        self.hide_timer.start()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(self.rect()), 15, 15)
+        painter.fillPath(path, QColor(200, 140, 20, 230))
+        painter.setFont(self.banner_font)
+        painter.setPen(QColor("white"))
+        text = self.text if not self.more else f"{self.text}   +{self.more} more"
+        rect = self.rect().adjusted(24, 0, -24, 0)
+        text = QFontMetrics(self.banner_font).elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
+        painter.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate alert rules, or time rule evaluation with --bench")
+    parser.add_argument("path", nargs="?", default=ALERTS_PATH)
+    parser.add_argument("--bench", action="store_true", help="time synthetic ticks against synthetic rules")
+    parser.add_argument("--instruments", type=int, default=54)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=200000)
+    args = parser.parse_args()
+
+    from catalog import Catalog, CatalogError, load_catalog
+    from dashlog import setup_logging
+    setup_logging()
+
+    if not args.bench:
+        try:
+            engine = load_rules(load_catalog(), args.path)
+        except (AlertError, CatalogError) as e:
+            print(e)
+            return 1
+        print(f"{engine.rule_count} rules in {args.path}")
+        return 0
+
+    rng = random.Random(42)
+    catalog = Catalog([{"key": f"IDX-I-{i}", "title": f"Index {i}"} for i in range(1, args.instruments + 1)])
+    engine = AlertEngine(catalog)
+    prices = [rng.uniform(1000, 50000) for _ in range(args.instruments)]
+    for _ in range(args.rules):
+        slot = rng.randrange(args.instruments)
+        kind = rng.randrange(3)
+        if kind == 2:
+            engine.add_move(slot, rng.choice((0.5, 1, 2)), rng.choice((60, 300, 900)))
+        else:
+            engine.add_level(slot, prices[slot] * rng.uniform(0.97, 1.03), above=kind == 0)
+    dispatch = engine.bind({})
+    updates = [dispatch.get(key, []) for key in catalog.keys]
+    fired = 0
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        slot = rng.randrange(args.instruments)
+        prices[slot] *= 1 + rng.gauss(0, 0.0005)
+        for update in updates[slot]:
+            update(prices[slot], 0.0)
+        fired += len(engine.drain())
+    elapsed = time.perf_counter() - start
+    print(f"{engine.rule_count} rules over {args.instruments} instruments: "
+          f"{elapsed / args.ticks * 1e6:.2f} us/tick, {fired} alerts fired")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
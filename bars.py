@@ -0,0 +1,231 @@
+import sys
+import json
+import time
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from dashlog import get_logger
+from history import TickHistory
+
+# Candle widths offered on the detail screen, in seconds
+INTERVALS = (60, 300, 900)
+
+log = get_logger("bars")
+
+Bars = namedtuple("Bars", "start open high low close ticks")
+
+
+def utc_offset(ts=None):
+    # Bars start on local clock boundaries (09:15, 09:20, ...), not UTC ones
+    return time.localtime(ts).tm_gmtoff
+
+
+def aggregate(slots, ts, ltp, interval, offset=0):
+    """ OHLC bars for a batch of ticks in one vectorized pass
+
+    Ticks may arrive in any order; they are grouped by slot and by the bar
+    their timestamp falls in. Returns (slot, Bars) arrays sorted by slot
+    and bar start.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    ts = np.asarray(ts, dtype=np.float64)
+    ltp = np.asarray(ltp, dtype=np.float64)
+    if not len(ts):
+        empty = np.zeros(0)
+        return slots[:0], Bars(empty, empty, empty, empty, empty, np.zeros(0, dtype=np.int64))
+    order = np.lexsort((ts, slots))
+    slots, ts, ltp = slots[order], ts[order], ltp[order]
+    start = ts - (ts + offset) % interval
+    boundary = np.flatnonzero((slots[1:] != slots[:-1]) | (start[1:] != start[:-1])) + 1
+    first = np.concatenate(([0], boundary))
+    last = np.concatenate((boundary - 1, [len(ts) - 1]))
+    return slots[first], Bars(start[first], ltp[first], np.maximum.reduceat(ltp, first),
+                              np.minimum.reduceat(ltp, first), ltp[last], last - first + 1)
+
+
+class BarSeries:
+    """ Bars of one interval for every slot, stored column-wise
+
+    Each column is a (slots x bars-per-day) array, so a whole session fits
+    without wrapping and bars() hands out plain slices: views, no copies.
+    A tick past local midnight starts a new session.
+    """
+
+    def __init__(self, count, interval):
+        self.count = count
+        self.interval = interval
+        self.capacity = 86400 // interval + 1
+        self.offset = utc_offset()
+        self.start = np.zeros((count, self.capacity))
+        self.open = np.zeros((count, self.capacity))
+        self.high = np.zeros((count, self.capacity))
+        self.low = np.zeros((count, self.capacity))
+        self.close = np.zeros((count, self.capacity))
+        self.ticks = np.zeros((count, self.capacity), dtype=np.int64)
+        self.size = np.zeros(count, dtype=np.int64)
+        self.session_end = TickHistory.next_session_end(time.time())
+
+    def columns(self):
+        return self.start, self.open, self.high, self.low, self.close, self.ticks
+
+    def roll_session(self, ts):
+        self.size[:] = 0
+        self.session_end = TickHistory.next_session_end(ts)
+        self.offset = utc_offset(ts)
+
+    def update(self, slot, ts, ltp):
+        """ Fold one tick into the current bar, or open the next one; O(1) """
+        if ts >= self.session_end:
+            self.roll_session(ts)
+        n = self.size[slot]
+        start = ts - (ts + self.offset) % self.interval
+        if n and start <= self.start[slot, n - 1]:
+            # Same bar; a late tick from an earlier bar is folded into the current one
+            i = n - 1
+            if ltp > self.high[slot, i]:
+                self.high[slot, i] = ltp
+            if ltp < self.low[slot, i]:
+                self.low[slot, i] = ltp
+            if start == self.start[slot, i]:
+                self.close[slot, i] = ltp
+            self.ticks[slot, i] += 1
+            return False
+        if n == self.capacity:
+            # Only reachable if the clock jumps within a session; drop the oldest bar
+            for column in self.columns():
+                column[slot, :-1] = column[slot, 1:]
+            n -= 1
+        self.start[slot, n] = start
+        self.open[slot, n] = self.high[slot, n] = self.low[slot, n] = self.close[slot, n] = ltp
+        self.ticks[slot, n] = 1
+        self.size[slot] = n + 1
+        return True
+
+    def bars(self, slot, since=None):
+        """ Bars of the current session in time order, as views into the columns """
+        n = self.size[slot]
+        first = 0 if since is None else int(np.searchsorted(self.start[slot, :n], since, side="left"))
+        return Bars(*(column[slot, first:n] for column in self.columns()))
+
+    def last(self, slot):
+        n = self.size[slot]
+        return Bars(*(column[slot, n - 1] for column in self.columns())) if n else None
+
+    def rebuild(self, slots, ts, ltp):
+        """ Replace every slot's bars with ones aggregated from a batch of ticks
+
+        Only the latest session in the batch is kept.
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        self.size[:] = 0
+        if not len(ts):
+            return 0
+        latest = float(ts.max())
+        self.roll_session(latest)
+        keep = ts >= self.session_end - 86400
+        bar_slots, bars = aggregate(np.asarray(slots)[keep], ts[keep], np.asarray(ltp)[keep],
+                                    self.interval, self.offset)
+        # Position of each bar within its slot's row
+        first_of_slot = np.concatenate(([0], np.flatnonzero(bar_slots[1:] != bar_slots[:-1]) + 1))
+        counts = np.diff(np.concatenate((first_of_slot, [len(bar_slots)])))
+        position = np.arange(len(bar_slots)) - np.repeat(first_of_slot, counts)
+        fits = position < self.capacity
+        for column, values in zip(self.columns(), bars):
+            column[bar_slots[fits], position[fits]] = values[fits]
+        self.size[bar_slots[first_of_slot]] = np.minimum(counts, self.capacity)
+        return len(bar_slots)
+
+
+class BarAggregator:
+    """ One BarSeries per interval, fed from the dispatch table """
+
+    def __init__(self, count, intervals=INTERVALS):
+        self.series = {interval: BarSeries(count, interval) for interval in intervals}
+
+    def __getitem__(self, interval):
+        return self.series[interval]
+
+    def update(self, slot, ts, ltp):
+        for series in self.series.values():
+            series.update(slot, ts, ltp)
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # Snapshot values restored at startup did not trade today
+        if not stale:
+            self.update(slot, time.time(), ltp)
+
+    def rebuild(self, slots, ts, ltp):
+        for series in self.series.values():
+            series.rebuild(slots, ts, ltp)
+
+
+def load_ticks(path, catalog):
+    """ (slot, ts, ltp) arrays from a tick journal or JSONL capture, keys the catalog lacks are skipped """
+    from replay import iter_records
+
+    slots, stamps, prices = [], [], []
+    slot_by_key = catalog.slot_by_key
+    for record in iter_records(path):
+        try:
+            items = json.loads(record.payload)
+        except ValueError:
+            continue
+        if not isinstance(items, list):
+            continue
+        ts = record.ts_ns / 1e9
+        for item in items:
+            if isinstance(item, dict) and "ltp" in item:
+                slot = slot_by_key.get(item.get("key"))
+                if slot is not None:
+                    slots.append(slot)
+                    stamps.append(ts)
+                    prices.append(item["ltp"])
+    return np.array(slots, dtype=np.int64), np.array(stamps), np.array(prices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild OHLC bars from a tick journal or JSONL capture")
+    parser.add_argument("path")
+    parser.add_argument("--interval", type=int, default=300, help="bar width in seconds")
+    parser.add_argument("--key", default="IDX-I-13", help="instrument to print")
+    parser.add_argument("--check", action="store_true", help="also stream the ticks and compare with the batch pass")
+    args = parser.parse_args()
+
+    from catalog import load_catalog
+
+    catalog = load_catalog()
+    start = time.perf_counter()
+    slots, ts, ltp = load_ticks(args.path, catalog)
+    parsed = time.perf_counter() - start
+    series = BarSeries(len(catalog), args.interval)
+    start = time.perf_counter()
+    count = series.rebuild(slots, ts, ltp)
+    batched = time.perf_counter() - start
+    print(f"{len(ts)} ticks parsed in {parsed:.2f}s, {count} bars of {args.interval}s built in {batched * 1000:.1f} ms")
+
+    if args.check:
+        streamed = BarSeries(len(catalog), args.interval)
+        order = np.argsort(ts, kind="stable")
+        start = time.perf_counter()
+        for slot, stamp, price in zip(slots[order].tolist(), ts[order].tolist(), ltp[order].tolist()):
+            streamed.update(slot, stamp, price)
+        elapsed = time.perf_counter() - start
+        same = all(np.array_equal(a, b) for slot in range(len(catalog))
+                   for a, b in zip(series.bars(slot), streamed.bars(slot)))
+        print(f"streaming: {elapsed / max(len(ts), 1) * 1e6:.2f} us/tick, matches batch: {same}")
+
+    slot = catalog.slot_by_key.get(args.key)
+    if slot is None:
+        print(f"{args.key} is not in the catalog")
+        return 1
+    print(f"{catalog.titles[slot]}:")
+    for bar in zip(*series.bars(slot)):
+        start, o, h, l, c, n = bar
+        print(f"  {time.strftime('%H:%M', time.localtime(start))}  O {o:,.2f}  H {h:,.2f}  L {l:,.2f}  C {c:,.2f}  ({n} ticks)")
+    return 0 if count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
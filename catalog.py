@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import argparse
+from functools import partial
+from collections import Counter
+
+from dashlog import get_logger
+
+# Next to the scripts, or inside the PyInstaller bundle
+BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+CATALOG_PATH = os.environ.get("DHAN_CATALOG", os.path.join(BASE_DIR, "catalog.json"))
+
+log = get_logger("catalog")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Catalog:
+    """ Instrument manifest compiled into slot-indexed tables
+
+    A slot is an instrument's position in display order; page and position on
+    the page follow from per_page. Every table below is indexed by slot, and
+    slot_by_key resolves a feed key to its slot in a single lookup.
+    """
+
+    def __init__(self, instruments, per_page=6, source="<manifest>"):
+        self.source = source
+        self.per_page = per_page
+        self.keys = []
+        self.titles = []
+        self.placeholders = []
+        # Relative tile area on the heatmap, e.g. market cap; 1.0 when the manifest has none
+        self.weights = []
+        self.slot_by_key = {}
+        self.unknown_keys = set()
+
+        errors = []
+        for slot, entry in enumerate(instruments):
+            key = entry.get("key") if isinstance(entry, dict) else None
+            title = entry.get("title") if isinstance(entry, dict) else None
+            if not key or not title:
+                errors.append(f"instrument {slot} needs a key and a title")
+                continue
+            if key in self.slot_by_key:
+                errors.append(f"{key} is listed twice (slots {self.slot_by_key[key]} and {len(self.keys)})")
+                continue
+            weight = entry.get("weight", 1.0)
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+                errors.append(f"{key} needs a positive weight, got {weight!r}")
+                continue
+            self.slot_by_key[key] = len(self.keys)
+            self.keys.append(key)
+            self.titles.append(title)
+            self.placeholders.append((entry.get("value", "₹ --"), entry.get("change", "0.00%")))
+            self.weights.append(float(weight))
+        if not isinstance(per_page, int) or per_page < 1:
+            errors.append(f"per_page must be a positive integer, got {per_page!r}")
+        if errors:
+            raise CatalogError(f"{source}: " + "; ".join(errors))
+
+        self.page_of = [slot // per_page for slot in range(len(self.keys))]
+        self.position_of = [slot % per_page for slot in range(len(self.keys))]
+
+        # Two cards with one title are legal but almost always a copy/paste slip
+        for title, count in Counter(self.titles).items():
+            if count > 1:
+                keys = [key for key, other in zip(self.keys, self.titles) if other == title]
+                log.warning("%s: title %r is shared by %s", source, title, ", ".join(keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def page_count(self):
+        return (len(self.keys) + self.per_page - 1) // self.per_page
+
+    def slot(self, key):
+        """ Slot for a feed key, None (logged once per key) when the catalog has no such instrument """
+        slot = self.slot_by_key.get(key)
+        if slot is None and key not in self.unknown_keys:
+            self.unknown_keys.add(key)
+            log.warning("Feed key %s is not in the catalog, its ticks are dropped", key)
+        return slot
+
+    def screens(self):
+        # The [[{"title", "value", "change"}, ...] per page] shape the views are built from
+        pages = [[] for _ in range(self.page_count)]
+        for slot, title in enumerate(self.titles):
+            value, change = self.placeholders[slot]
+            pages[self.page_of[slot]].append({"title": title, "value": value, "change": change})
+        return pages
+
+    def bind(self, cards, dispatch=None, method="update_data"):
+        """ Append each card's bound update method to dispatch[key], cards given in slot order
+
+        Call once per view; a key shown in several views gets one callable per card.
+        """
+        dispatch = {} if dispatch is None else dispatch
+        for key, card in zip(self.keys, cards):
+            dispatch.setdefault(key, []).append(getattr(card, method))
+        return dispatch
+
+    def bind_slots(self, callback, dispatch=None):
+        """ Append callback bound to each key's slot, for views that keep per-slot state instead of cards """
+        dispatch = {} if dispatch is None else dispatch
+        for slot, key in enumerate(self.keys):
+            dispatch.setdefault(key, []).append(partial(callback, slot))
+        return dispatch
+
+
+_loaded = {}
+
+
+def load_catalog(path=CATALOG_PATH):
+    """ Parse and validate the manifest once per path """
+    if path not in _loaded:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"cannot read catalog {path}: {e}") from e
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("instruments"), list):
+            raise CatalogError(f"{path}: expected an object with an \"instruments\" list")
+        _loaded[path] = Catalog(manifest["instruments"], manifest.get("per_page", 6), path)
+        log.info("Loaded %d instruments on %d pages from %s", len(_loaded[path]), _loaded[path].page_count, path)
+    return _loaded[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the instrument catalog")
+    parser.add_argument("path", nargs="?", default=CATALOG_PATH)
+    parser.add_argument("--journal", help="also report feed keys in this tick journal or JSONL file that the catalog lacks")
+    args = parser.parse_args()
+
+    from dashlog import setup_logging
+    setup_logging()
+    try:
+        catalog = load_catalog(args.path)
+    except CatalogError as e:
+        print(e)
+        return 1
+    print(f"{len(catalog)} instruments, {catalog.page_count} pages of {catalog.per_page}")
+
+    if args.journal:
+        from replay import iter_records
+
+        seen = Counter()
+        for record in iter_records(args.journal):
+            try:
+                items = json.loads(record.payload)
+            except ValueError:
+                continue
+            if isinstance(items, list):
+                seen.update(item["key"] for item in items if isinstance(item, dict) and "key" in item)
+        unmapped = sorted(key for key in seen if key not in catalog.slot_by_key)
+        silent = [key for key in catalog.keys if key not in seen]
+        print(f"{len(seen)} feed keys seen, unmapped: {', '.join(unmapped) or 'none'}")
+        print(f"catalog keys never seen: {', '.join(silent) or 'none'}")
+        return 1 if unmapped else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
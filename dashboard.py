@@ -2,25 +2,45 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QGridLayout,
                             QGraphicsDropShadowEffect, QHBoxLayout, QVBoxLayout, 
                             QFrame, QStackedWidget, QSizePolicy, QWIDGETSIZE_MAX)
 from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap, QPen, QTransform, QKeyEvent, QPainterPath
-from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QParallelAnimationGroup, QRectF, pyqtProperty, QTimer, pyqtSignal, QObject
+from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QParallelAnimationGroup, QAbstractAnimation, QRect, QRectF, pyqtProperty, QTimer, pyqtSignal, QEvent
 
 from PyQt5.QtGui import QCursor
 import os
 import sys
 import math
-import json
-import paho.mqtt.client as mqtt
-import ssl
 import time
 import threading
 import ctypes
+import argparse
 
-# MQTT Configuration``
-BROKER_URL = "mqtts://mqtt.dhan.co"
-CONFIG_MQTT_CLIENT_ID = "mqtt-12x"
-CONFIG_MQTT_USERNAME = "device"
-CONFIG_MQTT_PASSWORD = "device"
-STOCKDOCK_CONFIG_TOPIC = "stockdock/screen/nse-indices"
+from dashlog import get_logger, setup_logging
+from latency import tracer as latency_tracer, now as latency_now
+from metrics import metrics, start_metrics_server
+from sdnotify import Watchdog
+from snapshot import SnapshotStore
+from profiling import Profiler, SWIPE
+from catalog import load_catalog
+from paging import Pager, PageIndicator, layout_for_screen
+from movers import MoversView
+from history import TickHistory
+from sparkline import Sparkline
+from bars import BarAggregator
+from detail import DetailView
+from heatmap import HeatmapView
+from marquee import TickerTape, MARQUEE
+from alerts import AlertBanner, AlertEngine, AlertError, load_rules
+from datasource import create_source, MQTTClient, SOURCE, SOURCES, REPLAY_FILE, SOURCE_SPEED, STOCKDOCK_CONFIG_TOPIC
+
+log = get_logger("dashboard")
+
+# Height left for the card grid inside the 680 px content area, below it sits the page indicator
+PAGE_AREA_HEIGHT = 640
+# Pages further than this from the current one are torn down after a swipe
+PAGE_CACHE_RADIUS = 1
+# Sparkline area inside the 470x270 card
+SPARKLINE_RECT = QRect(290, 185, 155, 65)
+# How long a card stays outlined after one of its alerts fired
+FLASH_MS = 4000
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -32,91 +52,12 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-class MQTTClient(QObject):
-    data_received = pyqtSignal(list)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.client = mqtt.Client(client_id=CONFIG_MQTT_CLIENT_ID, clean_session=True)
-        self.client.username_pw_set(CONFIG_MQTT_USERNAME, CONFIG_MQTT_PASSWORD)
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        self.client.on_disconnect = self.on_disconnect
-        
-        # Extract host and port from MQTT URL
-        url = BROKER_URL.replace("mqtts://", "")
-        self.host = url
-        self.port = 8443  # Using port 8443 as specified
-        
-        # Set up TLS
-        self.client.tls_set(cert_reqs=ssl.CERT_REQUIRED, tls_version=ssl.PROTOCOL_TLS)
-        self.client.tls_insecure_set(False)
-        
-        self.is_connected = False
-        self.reconnect_timer = QTimer()
-        self.reconnect_timer.timeout.connect(self.connect)
-        
-        # Add update timer for 2-second intervals
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.request_update)
-        
-    def connect(self):
-        try:
-            if not self.is_connected:
-                print(f"Connecting to MQTT broker at {self.host}:{self.port}")
-                self.client.connect(self.host, self.port, 60)
-                self.client.loop_start()
-        except Exception as e:
-            print(f"Failed to connect to MQTT broker: {e}")
-            if not self.reconnect_timer.isActive():
-                self.reconnect_timer.start(5000)  # Try to reconnect every 5 seconds
-    
-    def request_update(self):
-        if self.is_connected:
-            # Re-subscribe to trigger an update
-            self.client.unsubscribe(STOCKDOCK_CONFIG_TOPIC)
-            self.client.subscribe(STOCKDOCK_CONFIG_TOPIC)
-    
-    def on_connect(self, client, userdata, flags, rc):
-        if rc == 0:
-            print("Connected to MQTT broker")
-            self.is_connected = True
-            self.reconnect_timer.stop()
-            client.subscribe(STOCKDOCK_CONFIG_TOPIC)
-            # Start the update timer when connected
-            self.update_timer.start(2000)  # 2000 ms = 2 seconds
-        else:
-            print(f"Failed to connect to MQTT broker with code {rc}")
-            self.is_connected = False
-            if not self.reconnect_timer.isActive():
-                self.reconnect_timer.start(5000)
-    
-    def disconnect(self):
-        self.update_timer.stop()  # Stop the update timer
-        self.client.loop_stop()
-        self.client.disconnect()
-        self.is_connected = False
-    
-    def on_disconnect(self, client, userdata, rc):
-        print(f"Disconnected from MQTT broker with code {rc}")
-        self.is_connected = False
-        if not self.reconnect_timer.isActive():
-            self.reconnect_timer.start(5000)
-    
-    def on_message(self, client, userdata, msg):
-        try:
-            payload = msg.payload.decode('utf-8')
-            data = json.loads(payload)
-            if isinstance(data, list):
-                self.data_received.emit(data)
-                print(f"Received data with {len(data)} items")
-            else:
-                print(f"Unexpected data format: {type(data)}")
-        except Exception as e:
-            print(f"Error processing message: {e}")
+def format_tick(ltp, p_ch):
+    # Card strings for a feed tick
+    return f"₹ {ltp:,.2f}", f"{p_ch:.2f}%"
 
 class GlassmorphicCard(QFrame):
-    def __init__(self, title, value, change, parent=None):
+    def __init__(self, title, value, change, parent=None, stale=False, sparkline=None, key=None):
         super().__init__(parent)
         self.setObjectName("glassmorphicCard")
         
@@ -138,8 +79,15 @@ class GlassmorphicCard(QFrame):
         self.setGraphicsEffect(shadow)
         
         self.title = title
+        # Feed key, unlike the title unique per instrument
+        self.key = key if key is not None else title
         self.value = value
         self.change = change
+        # Receive time of the oldest tick not yet painted
+        self.pending_rx_ts = None
+        # Showing last known values from a previous run rather than live data
+        self.stale = stale
+        self.flashing = False
         
         try:
             self.change_value = float(change.strip('%').replace(',', '.'))
@@ -156,10 +104,22 @@ class GlassmorphicCard(QFrame):
         
         # Set initial fixed size
         self.setFixedSize(470, 270)  # Increased width from 550 to 633 (15% more)
+        
+        # Intraday line in the free corner right of the value and change, outside the layout
+        # so rebuilding the front widget leaves it alone
+        self.sparkline = sparkline
+        if sparkline is not None:
+            sparkline.setParent(self)
+            sparkline.setGeometry(SPARKLINE_RECT)
+            sparkline.refresh(stale)
     
-    def update_data(self, value, change):
+    def update_data(self, value, change, rx_ts=None, stale=False):
         self.value = value
         self.change = change
+        self.stale = stale
+        # Only visible cards get painted, hidden pages would report the swipe delay
+        if rx_ts is not None and self.pending_rx_ts is None and self.isVisible():
+            self.pending_rx_ts = rx_ts
         
         try:
             self.change_value = float(change.strip('%').replace(',', '.'))
@@ -173,6 +133,32 @@ class GlassmorphicCard(QFrame):
         self.front_widget = QWidget()
         self.setup_front_side()
         self.layout().addWidget(self.front_widget)
+        if self.sparkline is not None:
+            self.sparkline.raise_()
+            self.sparkline.refresh(stale)
+        self.update()
+    
+    def flash(self):
+        # Outline the card for a while after an alert on its instrument
+        self.flashing = True
+        self.update()
+        QTimer.singleShot(FLASH_MS, self.end_flash)
+    
+    def end_flash(self):
+        self.flashing = False
+        self.update()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.flashing:
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(QPen(QColor(240, 170, 30), 4))
+            painter.drawRoundedRect(QRectF(self.rect()).adjusted(2, 2, -2, -2), 15, 15)
+            painter.end()
+        if self.pending_rx_ts is not None:
+            latency_tracer.record(self.key, self.pending_rx_ts)
+            self.pending_rx_ts = None
     
     def setup_front_side(self):
         layout = QVBoxLayout(self.front_widget)
@@ -263,7 +249,8 @@ class GlassmorphicCard(QFrame):
         
         value_label = QLabel(self.value)
         value_label.setFont(QFont("Segoe UI", 28, QFont.Weight.Bold))
-        value_label.setStyleSheet("color: white;")
+        # Last known values are dimmed until fresh data arrives
+        value_label.setStyleSheet("color: rgba(255, 255, 255, 0.45);" if self.stale else "color: white;")
         value_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
         value_container_layout.addWidget(value_label)
         
@@ -280,7 +267,8 @@ class GlassmorphicCard(QFrame):
         
         change_label = QLabel(f"{self.change}")
         change_label.setFont(QFont("Segoe UI", 28, QFont.Weight.Bold))
-        change_label.setStyleSheet(f"color: {self.change_color}; font-weight: bold;")
+        change_color = "gray" if self.stale else self.change_color
+        change_label.setStyleSheet(f"color: {change_color}; font-weight: bold;")
         change_label.setMinimumWidth(160)
         
         arrow_label = QLabel()
@@ -322,190 +310,114 @@ class ContentWidget(QWidget):
         self.layout.setColumnStretch(2, 1)
 
 class IndicesContent(ContentWidget):
-    def __init__(self, parent=None):
+    screen_changed = pyqtSignal(int)
+    view_toggle_requested = pyqtSignal()
+    card_tapped = pyqtSignal(int)
+    
+    def __init__(self, parent=None, catalog=None, history=None):
         super().__init__("SE Indices", parent)
         
-        self.screens_stack = QStackedWidget()
-        self.layout.addWidget(self.screens_stack, 0, 0, 1, 3)
+        # Titles and placeholders come from the catalog manifest, the grid from the screen
+        self.catalog = catalog or load_catalog()
+        # Feeds the card sparklines, cards are built without one when absent
+        self.history = history
+        screen_width = QApplication.primaryScreen().size().width()
+        self.profile = layout_for_screen(screen_width, PAGE_AREA_HEIGHT)
+        self.pager = Pager(len(self.catalog), self.profile.per_page)
         
-        # Create page indicator container
-        page_indicator_container = QWidget()
-        page_indicator_layout = QHBoxLayout(page_indicator_container)
-        page_indicator_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        page_indicator_layout.setSpacing(15)  # Space between dots
-        
-        # Create dots for each screen
-        self.page_dots = []
-        for i in range(9):  # 9 screens
-            dot = QLabel()
-            dot.setFixedSize(12, 12)  # Size of each dot
-            dot.setStyleSheet("""
-                QLabel {
-                    background-color: rgba(255, 255, 255, 0.3);
-                    border-radius: 6px;
-                }
-            """)
-            page_indicator_layout.addWidget(dot)
-            self.page_dots.append(dot)
-        
-        # Add page indicator below the screens stack
-        self.layout.addWidget(page_indicator_container, 1, 0, 1, 3)
-        
-        # Update the first dot to show it's selected
-        self.page_dots[0].setStyleSheet("""
-            QLabel {
-                background-color: rgba(255, 255, 255, 0.9);
-                border-radius: 6px;
-            }
-        """)
+        # Latest (ltp, p_ch, stale) per slot, None until the first tick; cards exist only for built pages
+        self.latest = [None] * len(self.catalog)
+        self.slot_cards = [None] * len(self.catalog)
+        self.page_widgets = {}
         
-        # NSE Indices data - 54 indices (9 screens × 6 cards)
-        self.indices_data = [
-            # Screen 1
-            [
-                {"title": "Nifty 50", "value": "₹ 22,419.95", "change": "0.79%"},
-                {"title": "Nifty Bank", "value": "₹ 47,580.30", "change": "0.82%"},
-                {"title": "Nifty IT", "value": "₹ 37,890.15", "change": "1.12%"},
-                {"title": "Nifty Auto", "value": "₹ 19,875.40", "change": "0.45%"},
-                {"title": "Nifty FMCG", "value": "₹ 52,640.75", "change": "0.28%"},
-                {"title": "Nifty Pharma", "value": "₹ 15,980.60", "change": "-0.32%"}
-            ],
-            # Screen 2
-            [
-                {"title": "Nifty Metal", "value": "₹ 7,890.25", "change": "1.45%"},
-                {"title": "Nifty Media", "value": "₹ 2,340.85", "change": "-0.78%"},
-                {"title": "Nifty Realty", "value": "₹ 890.45", "change": "0.92%"},
-                {"title": "Nifty PSU Bank", "value": "₹ 4,570.30", "change": "1.23%"},
-                {"title": "Nifty MNC", "value": "₹ 23,780.55", "change": "0.67%"},
-                {"title": "Nifty Energy", "value": "₹ 34,560.90", "change": "-0.45%"}
-            ],
-            # Screen 3
-            [
-                {"title": "Nifty FMCG", "value": "₹ 19,870.35", "change": "0.56%"},
-                {"title": "Nifty Auto", "value": "₹ 31,240.80", "change": "-0.23%"},
-                {"title": "Nifty Oil & Gas", "value": "₹ 12,450.65", "change": "0.89%"},
-                {"title": "Nifty Healthcare", "value": "₹ 9,780.40", "change": "0.34%"},
-                {"title": "Nifty PSE", "value": "₹ 5,670.25", "change": "-0.67%"},
-                {"title": "Nifty Metal", "value": "₹ 6,890.15", "change": "0.78%"}
-            ],
-            # Screen 4
-            [
-                {"title": "Nifty MNC", "value": "₹ 21,340.75", "change": "0.45%"},
-                {"title": "Nifty Services", "value": "₹ 27,890.60", "change": "-0.34%"},
-                {"title": "Nifty India Digital", "value": "₹ 8,970.30", "change": "1.56%"},
-                {"title": "Nifty Realty", "value": "₹ 11,230.85", "change": "0.23%"},
-                {"title": "Nifty CPSE", "value": "₹ 3,450.40", "change": "-0.89%"},
-                {"title": "Nifty India Auto", "value": "₹ 4,560.95", "change": "0.67%"}
-            ],
-            # Screen 5
-            [
-                {"title": "Nifty Midcap 50", "value": "₹ 12,780.45", "change": "0.91%"},
-                {"title": "Nifty Midcap 100", "value": "₹ 15,670.30", "change": "-0.45%"},
-                {"title": "Nifty Smallcap 50", "value": "₹ 5,890.65", "change": "1.23%"},
-                {"title": "Nifty Smallcap 100", "value": "₹ 7,450.20", "change": "0.78%"},
-                {"title": "Nifty Pharma", "value": "₹ 9,230.75", "change": "-0.56%"},
-                {"title": "Nifty Media", "value": "₹ 6,780.90", "change": "1.12%"}
-            ],
-            # Screen 6
-            [
-                {"title": "Nifty Alpha 50", "value": "₹ 18,920.35", "change": "0.34%"},
-                {"title": "Nifty 50 Value 20", "value": "₹ 13,450.80", "change": "-0.67%"},
-                {"title": "Nifty 50 Equal Weight", "value": "₹ 16,780.65", "change": "0.89%"},
-                {"title": "Nifty 100 Equal Weight", "value": "₹ 14,560.40", "change": "0.45%"},
-                {"title": "Nifty 100 Quality 30", "value": "₹ 11,890.25", "change": "-0.23%"},
-                {"title": "Nifty Alpha 30", "value": "₹ 8,670.60", "change": "1.34%"}
-            ],
-            # Screen 7
-            [
-                {"title": "Nifty 200 Quality 30", "value": "₹ 17,890.30", "change": "0.67%"},
-                {"title": "Nifty 100 Quality 30", "value": "₹ 15,450.85", "change": "-0.45%"},
-                {"title": "Nifty 50 Dividend Points", "value": "₹ 12,670.40", "change": "0.91%"},
-                {"title": "Nifty Realty", "value": "₹ 9,890.95", "change": "0.23%"},
-                {"title": "Nifty Metal", "value": "₹ 7,450.20", "change": "-0.78%"},
-                {"title": "Nifty 100 ESG", "value": "₹ 5,670.75", "change": "1.12%"}
-            ],
-            # Screen 8
-            [
-                {"title": "Nifty Alpha 50", "value": "₹ 14,560.30", "change": "0.45%"},
-                {"title": "Nifty Oil & Gas", "value": "₹ 11,890.85", "change": "-0.34%"},
-                {"title": "Nifty Commodities", "value": "₹ 8,970.40", "change": "1.23%"},
-                {"title": "Nifty CPSE", "value": "₹ 6,780.95", "change": "0.56%"},
-                {"title": "Nifty Midcap 50", "value": "₹ 4,560.20", "change": "-0.89%"},
-                {"title": "Nifty Total Market", "value": "₹ 3,450.75", "change": "0.67%"}
-            ],
-            # Screen 9
-            [
-                {"title": "Nifty 500 Value 50", "value": "₹ 13,670.30", "change": "0.91%"},
-                {"title": "Nifty Next 50", "value": "₹ 10,890.85", "change": "-0.45%"},
-                {"title": "Nifty 100 Liquid 15", "value": "₹ 8,450.40", "change": "1.23%"},
-                {"title": "Nifty IT", "value": "₹ 6,780.95", "change": "0.34%"},
-                {"title": "Nifty 200 Alpha 30", "value": "₹ 4,560.20", "change": "-0.67%"},
-                {"title": "India VIX", "value": "₹ 786.0", "change": "-0.79%"}
-            ]
-        ]
-        
-        # Create all screens first
-        self.screens = []
-        self.cards = []
-        
-        for screen_data in self.indices_data:
-            screen = QWidget()
-            screen_layout = QGridLayout(screen)
-            screen_layout.setSpacing(20)
-            
-            # Set fixed spacing for the grid
-            screen_layout.setHorizontalSpacing(50)  # Increased spacing
-            screen_layout.setVerticalSpacing(40)  # Increased spacing
-            
-            screen_cards = []
-            
-            # Create and add all cards for this screen
-            for card_index, card_data in enumerate(screen_data):
-                card = GlassmorphicCard(
-                    card_data["title"],
-                    card_data["value"],
-                    card_data["change"]
-                )
-                row = card_index // 3
-                col = card_index % 3
-                screen_layout.addWidget(card, row, col, Qt.AlignmentFlag.AlignCenter)
-                screen_cards.append(card)
-            
-            # Set equal column and row stretches
-            for i in range(3):
-                screen_layout.setColumnStretch(i, 1)
-            for i in range(2):
-                screen_layout.setRowStretch(i, 1)
-            
-            self.screens.append(screen)
-            self.cards.append(screen_cards)
-            self.screens_stack.addWidget(screen)
+        self.screens_stack = QStackedWidget()
+        self.layout.addWidget(self.screens_stack, 0, 0, 1, 3)
         
-        # Initialize all screens
-        for screen in self.screens:
-            screen.show()
-            screen.hide()
+        # One painted dot strip however many pages there are
+        self.page_indicator = PageIndicator(self.pager.page_count)
+        self.layout.addWidget(self.page_indicator, 1, 0, 1, 3)
         
         self.current_screen = 0
-        self.screens_stack.setCurrentIndex(0)
-        self.screens[0].show()
+        self.screens_stack.setCurrentWidget(self.page_widget(0))
+        # Neighbours are built once the first frame is out so a swipe starts instantly
+        QTimer.singleShot(0, self.prefetch_neighbours)
         
         self.old_pos = None
         self.animation_in_progress = False
         self.screens_stack.installEventFilter(self)
-        
-        # Create a mapping from index names to card positions
-        self.index_map = {}
-        for screen_idx, screen_data in enumerate(self.indices_data):
-            for card_idx, card_data in enumerate(screen_data):
-                self.index_map[card_data["title"]] = (screen_idx, card_idx)
     
-    def update_card_data(self, index_name, value, change):
-        if index_name in self.index_map:
-            screen_idx, card_idx = self.index_map[index_name]
-            if 0 <= screen_idx < len(self.cards) and 0 <= card_idx < len(self.cards[screen_idx]):
-                self.cards[screen_idx][card_idx].update_data(value, change)
-                print(f"Updated {index_name} with value: {value}, change: {change}")
+    def build_page(self, page):
+        screen = QWidget()
+        screen_layout = QGridLayout(screen)
+        screen_layout.setSpacing(20)
+        
+        # Set fixed spacing for the grid
+        screen_layout.setHorizontalSpacing(self.profile.h_spacing)
+        screen_layout.setVerticalSpacing(self.profile.v_spacing)
+        
+        # Create and add all cards for this screen from the latest values
+        for card_index, slot in enumerate(self.pager.slots(page)):
+            latest = self.latest[slot]
+            if latest is None:
+                (value, change), stale = self.catalog.placeholders[slot], False
+            else:
+                ltp, p_ch, stale = latest
+                value, change = format_tick(ltp, p_ch)
+            sparkline = Sparkline(self.history, slot) if self.history is not None else None
+            card = GlassmorphicCard(self.catalog.titles[slot], value, change, stale=stale, sparkline=sparkline,
+                                    key=self.catalog.keys[slot])
+            row, col = divmod(card_index, self.profile.columns)
+            screen_layout.addWidget(card, row, col, Qt.AlignmentFlag.AlignCenter)
+            self.slot_cards[slot] = card
+        
+        # Set equal column and row stretches
+        for i in range(self.profile.columns):
+            screen_layout.setColumnStretch(i, 1)
+        for i in range(self.profile.rows):
+            screen_layout.setRowStretch(i, 1)
+        return screen
+    
+    def page_widget(self, page):
+        widget = self.page_widgets.get(page)
+        if widget is None:
+            widget = self.build_page(page)
+            self.page_widgets[page] = widget
+            self.screens_stack.addWidget(widget)
+        return widget
+    
+    def prefetch_neighbours(self):
+        if self.animation_in_progress:
+            return
+        for page in (self.current_screen - 1, self.current_screen + 1):
+            if 0 <= page < self.pager.page_count:
+                self.page_widget(page)
+    
+    def evict_pages(self):
+        # Keep only the current page and its neighbours, memory stays flat with hundreds of pages
+        for page in [page for page in self.page_widgets if abs(page - self.current_screen) > PAGE_CACHE_RADIUS]:
+            widget = self.page_widgets.pop(page)
+            for slot in self.pager.slots(page):
+                self.slot_cards[slot] = None
+            self.screens_stack.removeWidget(widget)
+            widget.deleteLater()
+    
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # Bound per slot into the feed dispatch table; only slots on built pages are formatted
+        self.latest[slot] = (ltp, p_ch, stale)
+        if not stale:
+            # Values restored from the snapshot must not count as fresh ticks
+            metrics.card_updated(self.catalog.keys[slot], self.catalog.titles[slot])
+        card = self.slot_cards[slot]
+        if card is not None:
+            value, change = format_tick(ltp, p_ch)
+            log.debug("Updated %s with value: %s, change: %s", self.catalog.titles[slot], value, change)
+            card.update_data(value, change, rx_ts, stale)
+    
+    def flash(self, slot):
+        # Cards of pages that are not built have nothing to flash, the banner still shows
+        card = self.slot_cards[slot]
+        if card is not None:
+            card.flash()
     
     def eventFilter(self, obj, event):
         if obj == self.screens_stack:
@@ -517,37 +429,38 @@ class IndicesContent(ContentWidget):
             elif event.type() == event.Type.MouseButtonRelease:
                 if self.old_pos is not None and not self.animation_in_progress:
                     delta = event.pos().x() - self.old_pos.x()
-                    if abs(delta) > 50:
+                    vertical = event.pos().y() - self.old_pos.y()
+                    if abs(vertical) > 120 and abs(vertical) > abs(delta):
+                        self.view_toggle_requested.emit()
+                    elif abs(delta) > 50:
                         if delta > 0 and self.current_screen > 0:
                             self.change_screen(self.current_screen - 1)
-                        elif delta < 0 and self.current_screen < self.screens_stack.count() - 1:
+                        elif delta < 0 and self.current_screen < self.pager.page_count - 1:
                             self.change_screen(self.current_screen + 1)
+                    elif abs(delta) < 15 and abs(vertical) < 15:
+                        self.tap(event.pos())
                     self.old_pos = None
                 return True
         
         return super().eventFilter(obj, event)
     
+    def tap(self, pos):
+        widget = self.screens_stack.childAt(pos)
+        while widget is not None and not isinstance(widget, GlassmorphicCard):
+            widget = widget.parentWidget()
+        if widget is not None and widget in self.slot_cards:
+            self.card_tapped.emit(self.slot_cards.index(widget))
+    
     def change_screen(self, index):
         if index != self.current_screen and not self.animation_in_progress:
             self.animation_in_progress = True
             
             # Update page indicator dots
-            self.page_dots[self.current_screen].setStyleSheet("""
-                QLabel {
-                    background-color: rgba(255, 255, 255, 0.3);
-                    border-radius: 6px;
-                }
-            """)
-            self.page_dots[index].setStyleSheet("""
-                QLabel {
-                    background-color: rgba(255, 255, 255, 0.9);
-                    border-radius: 6px;
-                }
-            """)
+            self.page_indicator.set_current(index)
             
             direction = 1 if index > self.current_screen else -1
             current_widget = self.screens_stack.currentWidget()
-            new_widget = self.screens_stack.widget(index)
+            new_widget = self.page_widget(index)
             
             if current_widget and new_widget:
                 # Pre-calculate positions to reduce computation during animation
@@ -591,22 +504,29 @@ class IndicesContent(ContentWidget):
                 anim_group.addAnimation(new_anim)
                 
                 self.current_screen = index
+                self.screen_changed.emit(index)
                 
                 def on_animation_finished():
                     self.animation_in_progress = False
-                    self.screens_stack.setCurrentIndex(index)
+                    self.screens_stack.setCurrentWidget(new_widget)
                     # Reset widget sizes after animation
                     current_widget.setFixedSize(QWIDGETSIZE_MAX, QWIDGETSIZE_MAX)
                     new_widget.setFixedSize(QWIDGETSIZE_MAX, QWIDGETSIZE_MAX)
+                    self.evict_pages()
+                    QTimer.singleShot(0, self.prefetch_neighbours)
                 
                 anim_group.finished.connect(on_animation_finished)
-                anim_group.start()
+                # One group per swipe, deleted when done instead of piling up as children
+                anim_group.start(QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
 
 class GlassmorphicUI(QWidget):
-    def __init__(self):
+    def __init__(self, autoconnect=True, data_source=None, marquee=MARQUEE):
         super().__init__()
         self.setWindowTitle("Financial Dashboard")
         
+        # Created first so a DHAN_PROFILE window also covers building the UI
+        self.profiler = Profiler(self)
+        
         # Force fullscreen flags
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
         self.setWindowState(Qt.WindowState.WindowFullScreen)
@@ -630,11 +550,11 @@ class GlassmorphicUI(QWidget):
             bg_path = resource_path("bg_blurlow.png")
             self.background = QPixmap(bg_path)
             if self.background.isNull():
-                print(f"Failed to load background image from: {bg_path}")
+                log.error("Failed to load background image from: %s", bg_path)
                 self.background = QPixmap(self.size())
                 self.background.fill(QColor(20, 30, 50))
         except Exception as e:
-            print(f"Error loading background: {e}")
+            log.error("Error loading background: %s", e)
             self.background = QPixmap(self.size())
             self.background.fill(QColor(20, 30, 50))
         
@@ -659,97 +579,168 @@ class GlassmorphicUI(QWidget):
         
         center_layout.addLayout(title_layout)
         
-        self.indices_content = IndicesContent()
-        center_layout.addWidget(self.indices_content)
+        self.catalog = load_catalog()
+        self.history = TickHistory(len(self.catalog))
+        self.indices_content = IndicesContent(catalog=self.catalog, history=self.history)
+        self.indices_content.screen_changed.connect(lambda _index: self.profiler.note(SWIPE))
+        self.movers = MoversView(self.catalog)
+        self.heatmap = HeatmapView(self.catalog)
+        
+        # Card pages, top movers and the heatmap share the content area, a vertical swipe cycles them
+        self.view_titles = {self.indices_content: "NSE Indices", self.movers: "Top Movers",
+                            self.heatmap: "Market Heatmap"}
+        self.view_stack = QStackedWidget()
+        for view in self.view_titles:
+            self.view_stack.addWidget(view)
+            view.view_toggle_requested.connect(self.toggle_view)
+        center_layout.addWidget(self.view_stack)
+        
+        # Feed key -> bound per-slot updaters of every view, built once; history is
+        # recorded first so views reading it see the tick they are handed
+        self.dispatch = self.catalog.bind_slots(self.history.update_slot)
+        self.bars = BarAggregator(len(self.catalog))
+        self.catalog.bind_slots(self.bars.update_slot, self.dispatch)
+        self.catalog.bind_slots(self.indices_content.update_slot, self.dispatch)
+        self.movers.bind(self.dispatch)
+        self.heatmap.bind(self.dispatch)
+        
+        # Full-screen chart over everything else, opened by tapping a card
+        self.detail = DetailView(self.catalog, self.history, self.bars, self)
+        self.catalog.bind_slots(self.detail.update_slot, self.dispatch)
+        self.indices_content.card_tapped.connect(self.detail.open)
+        self.heatmap.tile_tapped.connect(self.detail.open)
+        self.detail.closed.connect(self.setFocus)
+        
+        # Alert rules see every tick of their instruments; firing only queues, the banner drains
+        try:
+            self.alerts = load_rules(self.catalog)
+        except AlertError as e:
+            log.error("Alerts disabled: %s", e)
+            self.alerts = AlertEngine(self.catalog)
+        self.alerts.bind(self.dispatch)
+        self.alert_banner = AlertBanner(self.alerts, self)
+        self.alert_banner.fired.connect(self.indices_content.flash)
         
         self.main_layout.addWidget(self.center_container)
         
         self.main_layout.addStretch(13)
         
+        # Ticker tape along the bottom edge, shown instead of the pages in marquee mode
+        self.tape = TickerTape(self.catalog)
+        self.tape.bind(self.dispatch)
+        self.main_layout.addWidget(self.tape)
+        # Feed behind each view, drained first while that view is on screen
+        self.view_topics = {view: STOCKDOCK_CONFIG_TOPIC for view in (*self.view_titles, self.tape)}
+        self.data_source = None
+        self.set_marquee(marquee)
+        
         self.key_sequence = ""
         self.exit_sequence = "yogi"
         self.minimize_sequence = "min"
-        
-        # Define mapping between index IDs and display names
-        self.index_id_to_name = {
-            "IDX-I-1": "Nifty 50",
-            "IDX-I-2": "Nifty Bank",
-            "IDX-I-3": "Nifty IT",
-            "IDX-I-4": "Nifty Auto",
-            "IDX-I-5": "Nifty FMCG",
-            "IDX-I-6": "Nifty Pharma",
-            "IDX-I-7": "Nifty Metal",
-            "IDX-I-8": "Nifty Media",
-            "IDX-I-9": "Nifty Realty",
-            "IDX-I-10": "Nifty PSU Bank",
-            "IDX-I-11": "Nifty Private Bank",
-            "IDX-I-12": "Nifty Energy",
-            "IDX-I-13": "Nifty Financial Services",
-            "IDX-I-14": "Nifty Consumer Durables",
-            "IDX-I-15": "Nifty Oil & Gas",
-            "IDX-I-16": "Nifty Healthcare",
-            "IDX-I-17": "Nifty PSE",
-            "IDX-I-18": "Nifty Infrastructure",
-            "IDX-I-19": "Nifty MNC",
-            "IDX-I-20": "Nifty Services Sector",
-            "IDX-I-21": "Nifty India Digital",
-            "IDX-I-22": "Nifty India Consumption",
-            "IDX-I-23": "Nifty CPSE",
-            "IDX-I-24": "Nifty India Manufacturing",
-            "IDX-I-25": "Nifty Midcap 50",
-            "IDX-I-26": "Nifty Midcap 100",
-            "IDX-I-27": "Nifty Smallcap 50",
-            "IDX-I-28": "Nifty Smallcap 100",
-            "IDX-I-29": "Nifty Midcap Liquid 15",
-            "IDX-I-30": "Nifty India Defence",
-            "IDX-I-31": "Nifty Alpha 50",
-            "IDX-I-32": "Nifty50 Value 20",
-            "IDX-I-33": "Nifty50 Equal Weight",
-            "IDX-I-34": "Nifty100 Equal Weight",
-            "IDX-I-35": "Nifty100 Low Volatility 30",
-            "IDX-I-36": "Nifty Alpha Low-Volatility 30",
-            "IDX-I-37": "Nifty200 Quality 30",
-            "IDX-I-38": "Nifty100 Quality 30",
-            "IDX-I-39": "Nifty50 Dividend Points",
-            "IDX-I-40": "Nifty Dividend Opportunities 50",
-            "IDX-I-41": "Nifty Growth Sectors 15",
-            "IDX-I-42": "Nifty100 ESG",
-            "IDX-I-43": "Nifty100 Enhanced ESG",
-            "IDX-I-44": "Nifty200 Momentum 30",
-            "IDX-I-45": "Nifty Commodities",
-            "IDX-I-46": "Nifty India Manufacturing",
-            "IDX-I-47": "Nifty Microcap 250",
-            "IDX-I-48": "Nifty Total Market",
-            "IDX-I-49": "Nifty500 Value 50",
-            "IDX-I-50": "Nifty Next 50",
-            "IDX-I-51": "Nifty100 Liquid 15",
-            "IDX-I-52": "Nifty MidSmallcap 400",
-            "IDX-I-53": "Nifty200 Alpha 30",
-            "IDX-I-54": "India VIX"
-        }
-        
-        # Initialize MQTT client
-        self.mqtt_client = MQTTClient(self)
-        self.mqtt_client.data_received.connect(self.handle_mqtt_data)
+        # Jump straight to a view, typing it again goes back to the cards
+        self.view_sequences = {"top": self.movers, "heat": self.heatmap}
+        self.marquee_sequence = "tape"
+        # Start (or stop early) a profiling window, output goes to DHAN_PROFILE_DIR
+        self.profile_sequences = {"prof": "cprofile", "samp": "sample", "mem": "tracemalloc"}
+        
+        
+        # Show the last real prices from the previous run before the first paint; replayed
+        # and simulated prices are never saved as last known
+        live = data_source is None or data_source.live
+        self.snapshot = SnapshotStore() if live else SnapshotStore(path=None)
+        self.showing_stale = False
+        self.restore_snapshot()
+        
+        # systemd watchdog, fed only while frames are painted and messages processed
+        # (messages are only expected while the source is connected)
+        self.watchdog = Watchdog(self.update, lambda: self.data_source is not None and self.data_source.is_connected,
+                                 self)
+        
+        # Live MQTT unless a replay/simulation source was chosen at startup
+        self.data_source = data_source if data_source is not None else MQTTClient(self)
+        self.data_source.setParent(self)
+        self.data_source.data_received.connect(self.handle_mqtt_data)
+        self.focus_visible_topic()
         
         # Connect to MQTT broker after a short delay to ensure UI is fully loaded
-        QTimer.singleShot(1000, self.mqtt_client.connect)
+        # (headless harnesses feed data_received directly and skip the broker)
+        if autoconnect:
+            QTimer.singleShot(1000, self.data_source.connect)
     
     def handle_mqtt_data(self, data):
         try:
             # Process the received MQTT data and update the UI
             if isinstance(data, list):
+                self.watchdog.message_processed()
+                self.profiler.note_payload()
+                dispatch = self.dispatch
                 for item in data:
                     if 'key' in item and 'ltp' in item and 'p_ch' in item:
                         index_id = item['key']
-                        if index_id in self.index_id_to_name:
-                            index_name = self.index_id_to_name[index_id]
-                            value = f"₹ {item['ltp']:,.2f}"
-                            change = f"{item['p_ch']:.2f}%"
-                            self.indices_content.update_card_data(index_name, value, change)
-                            print(f"Updated {index_name} with value: {value}, change: {change}")
+                        updates = dispatch.get(index_id)
+                        if updates is None:
+                            # Logs the unknown key once
+                            self.catalog.slot(index_id)
+                            continue
+                        ltp, p_ch = item['ltp'], item['p_ch']
+                        rx_ts = item.get('rx_ts')
+                        for update in updates:
+                            update(ltp, p_ch, rx_ts)
+                        self.snapshot.update(index_id, item['ltp'], item['p_ch'])
+                if self.showing_stale:
+                    self.showing_stale = False
+                    self.update_title()
+                self.snapshot.save_if_due()
         except Exception as e:
-            print(f"Error handling MQTT data: {e}")
+            log.error("Error handling MQTT data: %s", e)
+    
+    def restore_snapshot(self):
+        restored = 0
+        for index_id, (ltp, p_ch, _ts) in self.snapshot.load().items():
+            # Snapshots from an older catalog may hold keys that no longer exist
+            updates = self.dispatch.get(index_id)
+            if updates:
+                for update in updates:
+                    update(ltp, p_ch, stale=True)
+                restored += 1
+        if restored:
+            self.showing_stale = True
+            self.update_title()
+    
+    def update_title(self):
+        title = self.view_titles[self.view_stack.currentWidget()]
+        self.title_label.setText(f"{title} · last known" if self.showing_stale else title)
+    
+    def show_view(self, view):
+        if self.indices_content.animation_in_progress:
+            return
+        self.view_stack.setCurrentWidget(view)
+        self.update_title()
+        self.focus_visible_topic()
+    
+    def set_marquee(self, on):
+        self.center_container.setVisible(not on)
+        self.tape.setVisible(on)
+        self.focus_visible_topic()
+    
+    def focus_visible_topic(self):
+        if self.data_source is None:
+            return
+        view = self.view_stack.currentWidget() if self.tape.isHidden() else self.tape
+        self.data_source.focus_topic(self.view_topics[view])
+    
+    def toggle_view(self):
+        self.show_view(self.view_stack.widget((self.view_stack.currentIndex() + 1) % self.view_stack.count()))
+    
+    def event(self, event):
+        # A top-level UpdateRequest repaints every dirty child, i.e. one frame
+        if event.type() == QEvent.UpdateRequest:
+            start = latency_now()
+            result = super().event(event)
+            metrics.frame_painted(latency_now() - start)
+            self.watchdog.frame_painted()
+            return result
+        return super().event(event)
     
     def updateDimensions(self):
         # Simplified method - always use normal orientation
@@ -775,10 +766,22 @@ class GlassmorphicUI(QWidget):
             if self.key_sequence.endswith(self.minimize_sequence):
                 self.minimizeWindow()
             
+            for sequence, view in self.view_sequences.items():
+                if self.key_sequence.endswith(sequence):
+                    self.show_view(self.indices_content if self.view_stack.currentWidget() is view else view)
+            
+            if self.key_sequence.endswith(self.marquee_sequence):
+                self.set_marquee(self.tape.isHidden())
+            
+            # Check for profiling sequences
+            for sequence, kind in self.profile_sequences.items():
+                if self.key_sequence.endswith(sequence):
+                    self.toggle_profile(kind)
+            
             # Check for exit sequence
             if self.key_sequence.endswith(self.exit_sequence):
                 # Disconnect MQTT client before closing
-                self.mqtt_client.disconnect()
+                self.data_source.disconnect()
                 self.close()
             
             if len(self.key_sequence) > 10:
@@ -789,6 +792,12 @@ class GlassmorphicUI(QWidget):
         
         super().keyPressEvent(event)
     
+    def toggle_profile(self, kind):
+        if self.profiler.active:
+            self.profiler.stop()
+        else:
+            self.profiler.start(kind)
+    
     def hide_cursor_completely(self):
     # Hide cursor using Qt method
       self.setCursor(Qt.CursorShape.BlankCursor)
@@ -802,7 +811,7 @@ class GlassmorphicUI(QWidget):
             # Hide the cursor
             ctypes.windll.user32.ShowCursor(False)
         except Exception as e:
-            print(f"Error hiding Windows cursor: {e}")
+            log.warning("Error hiding Windows cursor: %s", e)
     
     # For Linux - additional X11 method
       elif sys.platform.startswith('linux'):
@@ -814,7 +823,7 @@ class GlassmorphicUI(QWidget):
             QApplication.setOverrideCursor(invisible_cursor)
             QApplication.changeOverrideCursor(invisible_cursor)
         except Exception as e:
-            print(f"Error hiding Linux cursor: {e}")
+            log.warning("Error hiding Linux cursor: %s", e)
 
     def enterEvent(self, event):
     # Hide cursor when mouse enters the window
@@ -823,12 +832,36 @@ class GlassmorphicUI(QWidget):
 
     def closeEvent(self, event):
         # Disconnect MQTT client when closing the application
-        self.mqtt_client.disconnect()
+        self.watchdog.stopping()
+        self.snapshot.close()
+        self.profiler.close()
+        self.data_source.disconnect()
         super().closeEvent(event)
 
 if __name__ == "__main__":
-    app = QApplication([])
-    window = GlassmorphicUI()
+    if sys.argv[1:2] == ["--tickbus"]:
+        # Feed daemon started by the ingest source from a PyInstaller build
+        from tickbus import main as tickbus_main
+        sys.exit(tickbus_main(sys.argv[2:]))
+    parser = argparse.ArgumentParser(description="Financial Dashboard")
+    parser.add_argument("--source", choices=SOURCES, default=SOURCE,
+                        help="data source (default: DHAN_SOURCE or mqtt)")
+    parser.add_argument("--replay-file", default=REPLAY_FILE, help="journal or JSONL file for --source replay")
+    parser.add_argument("--speed", type=float, default=SOURCE_SPEED,
+                        help="replay/simulation time scale, 0 = as fast as possible")
+    parser.add_argument("--marquee", action="store_true", default=MARQUEE,
+                        help="scroll a ticker tape instead of showing the pages (default: DHAN_MARQUEE)")
+    # Anything else (e.g. -platform) is left for Qt
+    args, qt_args = parser.parse_known_args()
+    
+    setup_logging()
+    start_metrics_server()
+    app = QApplication(sys.argv[:1] + qt_args)
+    try:
+        source = create_source(args.source, args.replay_file, args.speed)
+    except ValueError as e:
+        parser.error(str(e))
+    window = GlassmorphicUI(data_source=source, marquee=args.marquee)
     window.show()  # Make sure window is shown
     window.raise_()  # Bring to front
     app.exec()
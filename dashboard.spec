@@ -7,6 +7,7 @@ block_cipher = None
 datas = [
     ('background.png', '.'),
     ('bg_blurlow.png', '.'),
+    ('catalog.json', '.'),
 ]
 
 a = Analysis(
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import deque
+
+# DHAN_LOG_LEVEL=DEBUG brings back the per-tick lines, INFO keeps the hot path quiet
+LOG_LEVEL = os.environ.get("DHAN_LOG_LEVEL", "INFO").upper()
+# How many recent records the in-memory ring keeps for on-demand dumps
+RING_SIZE = int(os.environ.get("DHAN_LOG_RING", "2000"))
+# Where SIGUSR1 dumps the ring ({pid} is substituted)
+DUMP_PATH = os.environ.get("DHAN_LOG_DUMP", "/tmp/dhan-log-{pid}.txt")
+# Per call site: at most RATE_BURST records every RATE_INTERVAL seconds reach the journal
+RATE_INTERVAL = float(os.environ.get("DHAN_LOG_RATE_INTERVAL", "10"))
+RATE_BURST = int(os.environ.get("DHAN_LOG_RATE_BURST", "5"))
+
+ROOT_LOGGER = "dhan"
+
+
+class RateLimitFilter(logging.Filter):
+    """ Drops records from a call site once it exceeds `burst` per `interval` seconds """
+
+    def __init__(self, interval=RATE_INTERVAL, burst=RATE_BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        # (pathname, lineno) -> [window start, emitted in window, suppressed in window]
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            state = self.sites.get(site)
+            if state is None or now - state[0] >= self.interval:
+                suppressed = state[2] if state else 0
+                self.sites[site] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class StructuredFormatter(logging.Formatter):
+    """ "level logger: message key=value ..." with fields passed as extra={"fields": {...}} """
+
+    def __init__(self, with_time=True):
+        fmt = "%(asctime)s %(levelname)s %(name)s: %(message)s" if with_time else "%(levelname)s %(name)s: %(message)s"
+        super().__init__(fmt)
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (suppressed {suppressed} similar)"
+        return line
+
+
+class RingBufferHandler(logging.Handler):
+    """ Keeps the most recent records in memory, formatted only when dumped """
+
+    def __init__(self, capacity=RING_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self):
+        return [self.format(record) for record in list(self.records)]
+
+    def dump(self, path=None):
+        path = (path or DUMP_PATH).format(pid=os.getpid())
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.lines():
+                f.write(line + "\n")
+        return path
+
+
+ring_handler = RingBufferHandler()
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def dump_ring(path=None):
+    path = ring_handler.dump(path)
+    get_logger("log").info("Dumped %d log records to %s", len(ring_handler.records), path)
+    return path
+
+
+def setup_logging(level=None):
+    root = logging.getLogger(ROOT_LOGGER)
+    if getattr(root, "_dhan_configured", False):
+        return root
+    root._dhan_configured = True
+    root.setLevel(getattr(logging, (level or LOG_LEVEL).upper(), logging.INFO))
+    root.propagate = False
+
+    # journald already timestamps every line it receives on stdout
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(StructuredFormatter(with_time="JOURNAL_STREAM" not in os.environ))
+    console.addFilter(RateLimitFilter())
+    root.addHandler(console)
+
+    # The ring sees everything the logger lets through, unthrottled
+    ring_handler.setFormatter(StructuredFormatter())
+    root.addHandler(ring_handler)
+
+    # kill -USR1 <pid> dumps the ring to DHAN_LOG_DUMP
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump_ring())
+    return root
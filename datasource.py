@@ -0,0 +1,291 @@
+import os
+import ssl
+import json
+import threading
+
+import paho.mqtt.client as mqtt
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from dashlog import get_logger
+from journal import JournalWriter, JOURNAL_DIR
+from latency import now as latency_now
+from metrics import metrics
+from subscriptions import SubscriptionManager, parse_topics, EXTRA_TOPICS
+
+# MQTT Configuration``
+# DHAN_BROKER_URL lets headless runs point at a local broker (e.g. mqtt://localhost:1883)
+BROKER_URL = os.environ.get("DHAN_BROKER_URL", "mqtts://mqtt.dhan.co")
+CONFIG_MQTT_CLIENT_ID = "mqtt-12x"
+CONFIG_MQTT_USERNAME = "device"
+CONFIG_MQTT_PASSWORD = "device"
+STOCKDOCK_CONFIG_TOPIC = "stockdock/screen/nse-indices"
+# The indices screen goes ahead of extra DHAN_TOPICS feeds (priority 0 unless given) when the UI is behind
+INDICES_PRIORITY = 10
+
+# Which source feeds the dashboard: mqtt (live), replay (recorded file), sim (random walk)
+# bus (the shared table of a local feed daemon, see tickbus.py) or ingest (a feed daemon
+# this dashboard starts and supervises itself, see ingest.py)
+SOURCE = os.environ.get("DHAN_SOURCE", "mqtt")
+REPLAY_FILE = os.environ.get("DHAN_REPLAY_FILE", "")
+SOURCE_SPEED = float(os.environ.get("DHAN_SOURCE_SPEED", "1"))
+SIM_INSTRUMENTS = int(os.environ.get("DHAN_SIM_INSTRUMENTS", "54"))
+SIM_RATE = float(os.environ.get("DHAN_SIM_RATE", "0.5"))
+SOURCES = ("mqtt", "replay", "sim", "bus", "ingest")
+
+# Payloads handed to the UI but not yet handled, bounds memory in as-fast-as-possible mode
+MAX_IN_FLIGHT = 4
+
+log = get_logger("datasource")
+
+
+def decode_payload(payload, rx_ts):
+    """ Decode one raw payload into the batched tick records every source delivers
+
+    Returns a list of {"key", "ltp", "p_ch", ..., "rx_ts"} dicts, or None if unusable.
+    """
+    try:
+        data = json.loads(payload.decode('utf-8'))
+    except Exception as e:
+        log.error("Error processing message: %s", e)
+        return None
+    if not isinstance(data, list):
+        log.warning("Unexpected data format: %s", type(data))
+        return None
+    metrics.message(latency_now() - rx_ts, len(data))
+    # Stamp every tick with its receive time for the latency tracer
+    for item in data:
+        if isinstance(item, dict):
+            item['rx_ts'] = rx_ts
+    return data
+
+
+class DataSource(QObject):
+    """ What GlassmorphicUI needs from a feed: data_received(list), connect(), disconnect(), is_connected """
+    data_received = pyqtSignal(list)
+    # Real market prices, worth keeping as last known values; replays and simulations are not
+    live = False
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.is_connected = False
+
+    def connect(self):
+        # A source fed from outside, e.g. a harness emitting data_received, has nothing to start
+        pass
+
+    def disconnect(self):
+        pass
+
+    def focus_topic(self, topic):
+        # Only sources with several topics have anything to reorder
+        pass
+
+
+class MQTTClient(DataSource):
+    """ Live feed from the stockdock broker
+
+    Every topic is registered with the subscription manager and shares the
+    one connection. The network thread only decodes and merges; the UI
+    thread is told once that ticks are waiting and takes them in priority
+    order, a budget at a time.
+    """
+    # Emitted from the network thread, delivered queued on the UI thread
+    ticks_ready = pyqtSignal()
+    live = True
+    
+    def __init__(self, parent=None, journal_dir=JOURNAL_DIR, topics=EXTRA_TOPICS):
+        super().__init__(parent)
+        # Recorder mode: every raw payload goes to an append-only journal
+        self.journal = JournalWriter(journal_dir) if journal_dir else None
+        
+        self.subscriptions = SubscriptionManager()
+        # Registered priorities, restored when a topic loses the focus
+        self.priorities = {STOCKDOCK_CONFIG_TOPIC: INDICES_PRIORITY, **dict(parse_topics(topics))}
+        for topic, priority in self.priorities.items():
+            self.subscriptions.register(topic, decode_payload, priority=priority)
+        self.focused = None
+        self.ticks_ready.connect(self.drain)
+        
+        self.client = mqtt.Client(client_id=CONFIG_MQTT_CLIENT_ID, clean_session=True)
+        self.client.username_pw_set(CONFIG_MQTT_USERNAME, CONFIG_MQTT_PASSWORD)
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.client.on_disconnect = self.on_disconnect
+        
+        # Extract host and port from MQTT URL
+        use_tls = not BROKER_URL.startswith("mqtt://")
+        url = BROKER_URL.replace("mqtts://", "").replace("mqtt://", "")
+        if ":" in url:
+            url, port = url.rsplit(":", 1)
+            self.port = int(port)
+        else:
+            self.port = 8443 if use_tls else 1883  # Using port 8443 as specified
+        self.host = url
+        
+        # Set up TLS
+        if use_tls:
+            self.client.tls_set(cert_reqs=ssl.CERT_REQUIRED, tls_version=ssl.PROTOCOL_TLS)
+            self.client.tls_insecure_set(False)
+        
+        self.is_connected = False
+        self.reconnect_timer = QTimer()
+        self.reconnect_timer.timeout.connect(self.connect)
+        
+        # Add update timer for 2-second intervals
+        self.update_timer = QTimer()
+        self.update_timer.timeout.connect(self.request_update)
+        
+    def connect(self):
+        try:
+            if not self.is_connected:
+                log.info("Connecting to MQTT broker at %s:%s", self.host, self.port)
+                self.client.connect(self.host, self.port, 60)
+                self.client.loop_start()
+        except Exception as e:
+            log.warning("Failed to connect to MQTT broker: %s", e)
+            if not self.reconnect_timer.isActive():
+                self.reconnect_timer.start(5000)  # Try to reconnect every 5 seconds
+    
+    def request_update(self):
+        if self.is_connected:
+            # Re-subscribe to trigger an update
+            topics = self.subscriptions.topics()
+            self.client.unsubscribe([topic for topic, _qos in topics])
+            self.client.subscribe(topics)
+    
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            log.info("Connected to MQTT broker")
+            self.is_connected = True
+            metrics.set_connected(True)
+            self.reconnect_timer.stop()
+            client.subscribe(self.subscriptions.topics())
+            # Start the update timer when connected
+            self.update_timer.start(2000)  # 2000 ms = 2 seconds
+        else:
+            log.warning("Failed to connect to MQTT broker with code %s", rc)
+            self.is_connected = False
+            metrics.set_connected(False)
+            if not self.reconnect_timer.isActive():
+                self.reconnect_timer.start(5000)
+    
+    def disconnect(self):
+        self.update_timer.stop()  # Stop the update timer
+        self.client.loop_stop()
+        self.client.disconnect()
+        self.is_connected = False
+        metrics.set_connected(False)
+        if self.journal is not None:
+            self.journal.close()
+    
+    def on_disconnect(self, client, userdata, rc):
+        log.warning("Disconnected from MQTT broker with code %s", rc)
+        self.is_connected = False
+        metrics.set_connected(False)
+        if not self.reconnect_timer.isActive():
+            self.reconnect_timer.start(5000)
+    
+    def focus_topic(self, topic):
+        """ Drain topic ahead of all others, e.g. the feed behind the view on screen """
+        if topic == self.focused or topic not in self.priorities:
+            return
+        if self.focused is not None:
+            self.subscriptions.set_priority(self.focused, self.priorities[self.focused])
+        self.subscriptions.set_priority(topic, max(self.priorities.values()) + 1)
+        self.focused = topic
+    
+    def on_message(self, client, userdata, msg):
+        rx_ts = latency_now()
+        if self.journal is not None:
+            self.journal.append(msg.topic, msg.payload)
+        if self.subscriptions.offer(msg.topic, msg.payload, rx_ts):
+            self.ticks_ready.emit()
+    
+    def drain(self):
+        data, more = self.subscriptions.take()
+        if data:
+            self.data_received.emit(data)
+            log.debug("Handed %d items to the UI", len(data))
+        if more:
+            # Let paint events in before the lower priority rest
+            QTimer.singleShot(0, self.drain)
+
+class ThreadedSource(DataSource):
+    """ Plays anything with run(sink) and stop() (a replay, a simulation) from a worker thread """
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.player = player
+        self.finished = threading.Event()
+        self.in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+        self.thread = None
+        # Connected after the UI's handler, so this runs once a payload was handled
+        self.handled_connected = False
+
+    def connect(self):
+        if self.thread is not None:
+            return
+        if not self.handled_connected:
+            self.data_received.connect(self.payload_handled)
+            self.handled_connected = True
+        self.is_connected = True
+        metrics.set_connected(True)
+        self.thread = threading.Thread(target=self.run, name="source", daemon=True)
+        self.thread.start()
+
+    def disconnect(self):
+        self.player.stop()
+        self.is_connected = False
+        metrics.set_connected(False)
+
+    def run(self):
+        try:
+            self.player.run(self.on_message)
+        finally:
+            self.finished.set()
+
+    def on_message(self, topic, payload):
+        self.in_flight.acquire()
+        data = decode_payload(payload, latency_now())
+        if data is None:
+            self.in_flight.release()
+            return
+        self.data_received.emit(data)
+
+    def payload_handled(self, data):
+        self.in_flight.release()
+
+
+class SimulationPlayer:
+    # Adapts SyntheticFeed.run(sink, speed) to the run(sink)/stop() player contract
+    def __init__(self, feed, speed):
+        self.feed = feed
+        self.speed = speed
+
+    def run(self, sink):
+        self.feed.run(sink, self.speed)
+
+    def stop(self):
+        self.feed.stop()
+
+
+def create_source(kind=SOURCE, replay_file=REPLAY_FILE, speed=SOURCE_SPEED,
+                  instruments=SIM_INSTRUMENTS, rate=SIM_RATE, parent=None):
+    if kind == "mqtt":
+        return MQTTClient(parent)
+    if kind == "replay":
+        from replay import Replayer
+        if not replay_file:
+            raise ValueError("The replay source needs a file (--replay-file or DHAN_REPLAY_FILE)")
+        # Loop forever so demos keep moving
+        return ThreadedSource(Replayer(replay_file, speed, loops=0), parent)
+    if kind == "sim":
+        from feedgen import SyntheticFeed
+        return ThreadedSource(SimulationPlayer(SyntheticFeed(instruments, rate), speed), parent)
+    if kind == "bus":
+        from tickbus import BusSource
+        return BusSource(parent=parent)
+    if kind == "ingest":
+        from ingest import IngestSource
+        return IngestSource(replay_file=replay_file, speed=speed, parent=parent)
+    raise ValueError(f"Unknown data source {kind!r}, expected one of {', '.join(SOURCES)}")
@@ -0,0 +1,438 @@
+import os
+import sys
+import math
+import time
+import argparse
+
+import numpy as np
+
+from PyQt5.QtWidgets import QWidget, QPinchGesture
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath, QPen, QPolygonF
+from PyQt5.QtCore import Qt, QEvent, QPointF, QRectF, QTimer, pyqtSignal
+
+# Narrowest time window the chart zooms into, in seconds
+MIN_SPAN = 60
+# Pending ticks for the shown instrument are folded in at most this often
+REFRESH_INTERVAL = 250
+# Chart modes: raw ticks through the pyramid, or candles of a bar interval
+MODES = (("Line", None), ("1m", 60), ("5m", 300), ("15m", 900))
+
+
+class MinMaxPyramid:
+    """ Min/max envelope of a series at every power-of-two block size
+
+    Level k holds, per block of 2**k consecutive samples, the block's first
+    timestamp and its lowest and highest value; level 0 is the raw series.
+    envelope() picks the coarsest level that still gives max_blocks blocks
+    in the requested window, so drawing cost depends on the screen width
+    and not on how many samples are visible.
+    """
+
+    def __init__(self, ts, values):
+        ts = np.array(ts, dtype=np.float64)
+        values = np.array(values, dtype=np.float64)
+        self.levels = [(ts, values, values)]
+        while len(ts) > 1:
+            odd = len(ts) % 2
+            even = len(ts) - odd
+            lows, highs = self.levels[-1][1], self.levels[-1][2]
+            next_lows = np.minimum(lows[0:even:2], lows[1:even:2])
+            next_highs = np.maximum(highs[0:even:2], highs[1:even:2])
+            ts = ts[0:even:2]
+            if odd:
+                ts = np.append(ts, self.levels[-1][0][-1])
+                next_lows = np.append(next_lows, lows[-1])
+                next_highs = np.append(next_highs, highs[-1])
+            self.levels.append((ts, next_lows, next_highs))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def span(self):
+        ts = self.levels[0][0]
+        return (float(ts[0]), float(ts[-1])) if len(ts) else (0.0, 0.0)
+
+    def envelope(self, t0, t1, max_blocks):
+        """ (level, ts, lows, highs) views covering t0..t1 plus one block either side """
+        ts = self.levels[0][0]
+        lo = int(np.searchsorted(ts, t0, side="right")) - 1
+        hi = int(np.searchsorted(ts, t1, side="left")) + 1
+        count = max(hi - lo, 1)
+        level = min(max(0, math.ceil(math.log2(count / max(max_blocks, 1)))), len(self.levels) - 1)
+        level_ts, lows, highs = self.levels[level]
+        start = max(0, (max(lo, 0) >> level))
+        end = min(len(level_ts), (hi >> level) + 1)
+        return level, level_ts[start:end], lows[start:end], highs[start:end]
+
+
+class DetailView(QWidget):
+    """ Full-screen intraday chart for one slot, opened by tapping a card
+
+    Drag pans, the wheel or a pinch zooms around the touch point,
+    double-tap shows the whole session and a downward swipe or the close
+    mark at the top right goes back to the cards.
+    """
+
+    closed = pyqtSignal()
+
+    def __init__(self, catalog, history, bars=None, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.history = history
+        self.bars = bars
+        self.slot = None
+        self.pyramid = None
+        self.mode = 0
+        self.t0 = self.t1 = 0.0
+        # Keep the newest tick in view as it arrives while the window touches the live end
+        self.follow = True
+        self.dirty = False
+        self.press_pos = None
+        self.last_pos = None
+        self.moved = False
+        self.chip_rects = []
+        self.close_rect = QRectF()
+        self.grabGesture(Qt.GestureType.PinchGesture)
+        self.setAttribute(Qt.WidgetAttribute.WA_AcceptTouchEvents)
+        # Fully painted every time, so the cards underneath are never repainted while panning
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.hide()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+    def open(self, slot):
+        self.slot = slot
+        self.mode = 0
+        self.follow = True
+        self.rebuild()
+        self.t0, self.t1 = self.full_span()
+        if self.parentWidget() is not None:
+            self.setGeometry(self.parentWidget().rect())
+        self.show()
+        self.raise_()
+        self.setFocus()
+        self.timer.start()
+
+    def close_view(self):
+        self.timer.stop()
+        self.hide()
+        self.slot = None
+        self.pyramid = None
+        self.closed.emit()
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # Dispatch table entry, the pyramid is brought up to date on the next refresh
+        if slot == self.slot:
+            self.dirty = True
+
+    def rebuild(self):
+        ts, ltp, _ = self.history.series(self.slot)
+        self.pyramid = MinMaxPyramid(ts, ltp)
+        self.dirty = False
+
+    def refresh(self):
+        if not self.dirty or self.slot is None:
+            return
+        end = self.full_span()[1]
+        self.rebuild()
+        if self.follow:
+            # Slide the window along with the live end
+            shift = self.full_span()[1] - end
+            self.t0 += shift
+            self.t1 += shift
+        self.update()
+
+    def full_span(self):
+        interval = MODES[self.mode][1]
+        if interval is None:
+            first, last = self.pyramid.span()
+        else:
+            # Whole candles: from the first bar's start to the end of the current one
+            bars = self.bars[interval].bars(self.slot)
+            if not len(bars.start):
+                return self.pyramid.span()[0], self.pyramid.span()[0] + self.min_span()
+            first, last = float(bars.start[0]), float(bars.start[-1]) + interval
+        return first, max(last, first + self.min_span())
+
+    def min_span(self):
+        return max(MIN_SPAN, 4 * (MODES[self.mode][1] or 0))
+
+    def chart_rect(self):
+        return QRectF(60, 150, self.width() - 200, self.height() - 230)
+
+    def set_window(self, t0, t1):
+        first, last = self.full_span()
+        span = min(max(t1 - t0, self.min_span()), last - first)
+        t0 = min(max(t0, first), last - span)
+        self.t0, self.t1 = t0, t0 + span
+        self.follow = self.t1 >= last
+        self.update()
+
+    def zoom(self, factor, x):
+        # factor > 1 zooms in, keeping the time under x in place
+        chart = self.chart_rect()
+        anchor = self.t0 + (x - chart.left()) / chart.width() * (self.t1 - self.t0)
+        self.set_window(anchor - (anchor - self.t0) / factor, anchor + (self.t1 - anchor) / factor)
+
+    def pan(self, dx):
+        shift = -dx / self.chart_rect().width() * (self.t1 - self.t0)
+        self.set_window(self.t0 + shift, self.t1 + shift)
+
+    def event(self, event):
+        if event.type() == QEvent.Type.Gesture:
+            pinch = event.gesture(Qt.GestureType.PinchGesture)
+            if pinch is not None:
+                if pinch.changeFlags() & QPinchGesture.ChangeFlag.ScaleFactorChanged:
+                    self.zoom(pinch.scaleFactor(), self.mapFromGlobal(pinch.centerPoint().toPoint()).x())
+                # A pinch is never a tap or a pan
+                self.moved = True
+                self.last_pos = None
+                return True
+        return super().event(event)
+
+    def mousePressEvent(self, event):
+        self.press_pos = self.last_pos = event.pos()
+        self.moved = False
+
+    def mouseMoveEvent(self, event):
+        if self.last_pos is None:
+            return
+        dx = event.pos().x() - self.last_pos.x()
+        if self.moved or abs(event.pos().x() - self.press_pos.x()) > 10:
+            self.moved = True
+            self.pan(dx)
+            self.last_pos = event.pos()
+
+    def mouseReleaseEvent(self, event):
+        if self.press_pos is None:
+            return
+        dy = event.pos().y() - self.press_pos.y()
+        dx = event.pos().x() - self.press_pos.x()
+        if dy > 120 and dy > abs(dx):
+            self.close_view()
+        elif not self.moved:
+            self.tap(QPointF(event.pos()))
+        self.press_pos = self.last_pos = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.set_window(*self.full_span())
+
+    def wheelEvent(self, event):
+        self.zoom(1.25 if event.angleDelta().y() > 0 else 0.8, event.pos().x())
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (Qt.Key.Key_Escape, Qt.Key.Key_Backspace):
+            self.close_view()
+        elif key in (Qt.Key.Key_Plus, Qt.Key.Key_Equal):
+            self.zoom(1.5, self.chart_rect().center().x())
+        elif key == Qt.Key.Key_Minus:
+            self.zoom(1 / 1.5, self.chart_rect().center().x())
+        elif key == Qt.Key.Key_Left:
+            self.pan(self.chart_rect().width() / 4)
+        elif key == Qt.Key.Key_Right:
+            self.pan(-self.chart_rect().width() / 4)
+        else:
+            super().keyPressEvent(event)
+
+    def tap(self, pos):
+        if self.close_rect.contains(pos):
+            self.close_view()
+            return
+        for i, rect in enumerate(self.chip_rects):
+            if rect.contains(pos) and (MODES[i][1] is None or self.bars is not None):
+                self.mode = i
+                self.set_window(*self.full_span())
+                return
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(15, 20, 35))
+        if self.slot is None or self.pyramid is None:
+            return
+        self.paint_header(painter)
+        chart = self.chart_rect()
+        interval = MODES[self.mode][1]
+        if interval is None:
+            self.paint_line(painter, chart)
+        else:
+            self.paint_candles(painter, chart, interval)
+
+    def paint_header(self, painter):
+        # Title row: name, mode chips and the close mark; value and change underneath
+        self.close_rect = QRectF(self.width() - 110, 30, 50, 50)
+        chips_left = self.close_rect.left() - 20 - len(MODES) * 90
+        painter.setPen(QColor("white"))
+        painter.setFont(QFont("Segoe UI", 26, QFont.Weight.Bold))
+        title = painter.fontMetrics().elidedText(self.catalog.titles[self.slot], Qt.TextElideMode.ElideRight,
+                                                 int(chips_left - 80))
+        painter.drawText(QRectF(60, 30, chips_left - 60, 50), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         title)
+        last = self.history.last(self.slot)
+        if last is not None:
+            _, ltp, p_ch = last
+            painter.setFont(QFont("Segoe UI", 22, QFont.Weight.Bold))
+            painter.drawText(QRectF(60, 85, 300, 40), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"₹ {ltp:,.2f}")
+            painter.setPen(QColor("green") if p_ch >= 0 else QColor("red"))
+            painter.drawText(QRectF(360, 85, 200, 40), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"{p_ch:.2f}%")
+
+        # Remembered for hit testing in tap()
+        painter.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        self.chip_rects = []
+        for i, (label, interval) in enumerate(MODES):
+            rect = QRectF(chips_left + i * 90, 37, 80, 36)
+            self.chip_rects.append(rect)
+            if interval is not None and self.bars is None:
+                continue
+            chip = QPainterPath()
+            chip.addRoundedRect(rect, 10, 10)
+            painter.fillPath(chip, QColor(255, 255, 255, 90 if i == self.mode else 30))
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+        painter.setFont(QFont("Segoe UI", 26, QFont.Weight.Bold))
+        painter.drawText(self.close_rect, Qt.AlignmentFlag.AlignCenter, "✕")
+
+    def paint_axes(self, painter, chart, low, high):
+        painter.setPen(QPen(QColor(255, 255, 255, 40), 1))
+        painter.setFont(QFont("Segoe UI", 12))
+        for i in range(5):
+            y = chart.top() + chart.height() * i / 4
+            painter.drawLine(QPointF(chart.left(), y), QPointF(chart.right(), y))
+            painter.setPen(QColor(255, 255, 255, 160))
+            painter.drawText(QRectF(chart.right() + 8, y - 10, 120, 20),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"{high - (high - low) * i / 4:,.2f}")
+            painter.setPen(QPen(QColor(255, 255, 255, 40), 1))
+        painter.setPen(QColor(255, 255, 255, 160))
+        for i in range(5):
+            ts = self.t0 + (self.t1 - self.t0) * i / 4
+            x = chart.left() + chart.width() * i / 4
+            label = time.strftime("%H:%M:%S" if self.t1 - self.t0 < 600 else "%H:%M", time.localtime(ts))
+            painter.drawText(QRectF(x - 60, chart.bottom() + 8, 120, 20), Qt.AlignmentFlag.AlignCenter, label)
+
+    def mapper(self, chart, low, high):
+        x_scale = chart.width() / (self.t1 - self.t0)
+        y_scale = chart.height() / ((high - low) or 1.0)
+        return (lambda ts: chart.left() + (ts - self.t0) * x_scale), (lambda v: chart.bottom() - (v - low) * y_scale)
+
+    def paint_line(self, painter, chart):
+        # One block per two pixel columns: the band has at most chart-width points
+        level, ts, lows, highs = self.pyramid.envelope(self.t0, self.t1, int(chart.width()) // 2)
+        if not len(ts):
+            return
+        visible = (ts >= self.t0) & (ts <= self.t1)
+        low = float(lows[visible].min() if visible.any() else lows.min())
+        high = float(highs[visible].max() if visible.any() else highs.max())
+        self.paint_axes(painter, chart, low, high)
+        to_x, to_y = self.mapper(chart, low, high)
+        _, _, p_ch = self.history.last(self.slot) or (0, 0, 0)
+        color = QColor(0, 200, 0) if p_ch >= 0 else QColor(230, 40, 40)
+        xs = to_x(ts).tolist()
+        painter.save()
+        painter.setClipRect(chart)
+        if level == 0:
+            painter.setPen(QPen(color, 2))
+            painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, to_y(lows).tolist())]))
+        else:
+            # Several samples per column: fill the band between block lows and highs,
+            # far cheaper than stroking a zigzag through them
+            band = [QPointF(x, y) for x, y in zip(xs, to_y(highs).tolist())]
+            band += [QPointF(x, y) for x, y in zip(reversed(xs), reversed(to_y(lows).tolist()))]
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            painter.setPen(QPen(color, 1))
+            painter.setBrush(color)
+            painter.drawPolygon(QPolygonF(band))
+        painter.restore()
+
+    def paint_candles(self, painter, chart, interval):
+        bars = self.bars[interval].bars(self.slot, self.t0 - interval)
+        shown = bars.start <= self.t1
+        if not shown.any():
+            return
+        start, opens, highs, lows, closes = (column[shown] for column in bars[:5])
+        low, high = float(lows.min()), float(highs.max())
+        self.paint_axes(painter, chart, low, high)
+        to_x, to_y = self.mapper(chart, low, high)
+        width = max(1.0, chart.width() * interval / (self.t1 - self.t0) * 0.7)
+        painter.save()
+        painter.setClipRect(chart)
+        for bar_start, o, h, l, c in zip(start.tolist(), opens.tolist(), highs.tolist(), lows.tolist(), closes.tolist()):
+            color = QColor(0, 200, 0) if c >= o else QColor(230, 40, 40)
+            x = to_x(bar_start + interval / 2)
+            painter.setPen(QPen(color, 1))
+            painter.drawLine(QPointF(x, to_y(h)), QPointF(x, to_y(l)))
+            top, bottom = to_y(max(o, c)), to_y(min(o, c))
+            painter.fillRect(QRectF(x - width / 2, top, width, max(bottom - top, 1.0)), color)
+        painter.restore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame cost of the detail chart while zooming and panning")
+    parser.add_argument("--samples", type=int, default=11000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1560)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QPixmap
+    from catalog import Catalog
+    from history import TickHistory
+    from bars import BarAggregator
+    from feedgen import SyntheticFeed
+
+    app = QApplication(sys.argv[:1])
+    catalog = Catalog([{"key": "IDX-I-1", "title": "Nifty 50"}])
+    history = TickHistory(1, args.samples)
+    bars = BarAggregator(1)
+    feed = SyntheticFeed(1, volatility=0.01)
+    ts = time.time() - args.samples * 2.0
+    for _ in range(args.samples):
+        item = feed.payload()[0]
+        history.append(0, ts, item["ltp"], item["p_ch"])
+        bars.update(0, ts, item["ltp"])
+        feed.step(2.0)
+        ts += 2.0
+
+    start = time.perf_counter()
+    view = DetailView(catalog, history, bars)
+    view.resize(args.width, args.height)
+    view.open(0)
+    built = time.perf_counter() - start
+
+    pixmap = QPixmap(view.size())
+    chart_x = view.chart_rect().center().x()
+    timings = {}
+    for mode in (0, 1):
+        view.mode = mode
+        view.set_window(*view.full_span())
+        frames = []
+        for frame in range(args.frames):
+            # Zoom in towards the middle, then pan back out across the session
+            if frame < args.frames // 2:
+                view.zoom(1.05, chart_x)
+            else:
+                view.pan(view.chart_rect().width() / 40)
+            start = time.perf_counter()
+            view.render(pixmap)
+            frames.append(time.perf_counter() - start)
+        frames.sort()
+        timings[MODES[mode][0]] = frames
+
+    print(f"{args.samples} samples, pyramid of {len(view.pyramid.levels)} levels built in {built * 1000:.1f} ms, "
+          f"{args.width}x{args.height}")
+    for name, frames in timings.items():
+        print(f"  {name:5s} frame p50 {frames[len(frames) // 2] * 1000:.2f} ms, "
+              f"p99 {frames[int(len(frames) * 0.99)] * 1000:.2f} ms")
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import sys
+import timeit
+import argparse
+
+from catalog import load_catalog
+from feedgen import SyntheticFeed
+
+# Pages with cards while page 0 is on screen: it and its neighbour (PAGE_CACHE_RADIUS = 1)
+BUILT_PAGES = 2
+
+
+class StubCard:
+    """ Stands in for GlassmorphicCard so only the lookup and call overhead is timed """
+
+    def __init__(self, title):
+        self.title = title
+        self.value = None
+        self.change = None
+
+    def update_data(self, value, change, rx_ts=None, stale=False):
+        self.value = value
+        self.change = change
+
+
+def format_tick(ltp, p_ch):
+    return f"₹ {ltp:,.2f}", f"{p_ch:.2f}%"
+
+
+def build_legacy(catalog):
+    # The old path: key -> title -> (screen, card) -> bounds-checked nested lists
+    screens = catalog.screens()
+    cards = [[StubCard(card["title"]) for card in screen] for screen in screens]
+    index_id_to_name = dict(zip(catalog.keys, catalog.titles))
+    index_map = {}
+    for screen_idx, screen_data in enumerate(screens):
+        for card_idx, card_data in enumerate(screen_data):
+            index_map[card_data["title"]] = (screen_idx, card_idx)
+
+    def update_card_data(index_name, value, change, rx_ts=None):
+        if index_name in index_map:
+            screen_idx, card_idx = index_map[index_name]
+            if 0 <= screen_idx < len(cards) and 0 <= card_idx < len(cards[screen_idx]):
+                cards[screen_idx][card_idx].update_data(value, change, rx_ts)
+
+    def handle(data):
+        for item in data:
+            if 'key' in item and 'ltp' in item and 'p_ch' in item:
+                index_id = item['key']
+                if index_id in index_id_to_name:
+                    index_name = index_id_to_name[index_id]
+                    value, change = format_tick(item['ltp'], item['p_ch'])
+                    update_card_data(index_name, value, change, item.get('rx_ts'))
+
+    return handle
+
+
+class SlotView:
+    """ Stands in for IndicesContent.update_slot: per-slot state, cards only on built pages """
+
+    def __init__(self, catalog, built_pages):
+        self.catalog = catalog
+        self.latest = [None] * len(catalog)
+        self.slot_cards = [None] * len(catalog)
+        for slot in range(min(len(catalog), built_pages * catalog.per_page)):
+            self.slot_cards[slot] = StubCard(catalog.titles[slot])
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        self.latest[slot] = (ltp, p_ch, stale)
+        card = self.slot_cards[slot]
+        if card is not None:
+            value, change = format_tick(ltp, p_ch)
+            card.update_data(value, change, rx_ts, stale)
+
+
+def build_dispatch(catalog, views=1, built_pages=BUILT_PAGES):
+    # What ships: key -> [partial(update_slot, slot), ...], formatting deferred to the updater
+    dispatch = {}
+    for _ in range(views):
+        catalog.bind_slots(SlotView(catalog, built_pages).update_slot, dispatch)
+
+    def handle(data):
+        for item in data:
+            if 'key' in item and 'ltp' in item and 'p_ch' in item:
+                updates = dispatch.get(item['key'])
+                if updates is None:
+                    continue
+                ltp, p_ch = item['ltp'], item['p_ch']
+                rx_ts = item.get('rx_ts')
+                for update in updates:
+                    update(ltp, p_ch, rx_ts)
+
+    return handle
+
+
+def build_format_only():
+    # Formatting is shared by both paths, subtracting it leaves the lookup and call cost
+    def handle(data):
+        for item in data:
+            if 'key' in item and 'ltp' in item and 'p_ch' in item:
+                format_tick(item['ltp'], item['p_ch'])
+
+    return handle
+
+
+def bench(handlers, payload, number, repeat):
+    # Best of `repeat` rounds in microseconds per payload; candidates take turns within
+    # a round so CPU frequency changes hit all of them alike
+    best = [float("inf")] * len(handlers)
+    for _ in range(repeat):
+        for i, handle in enumerate(handlers):
+            best[i] = min(best[i], timeit.timeit(lambda: handle(payload), number=number))
+    return [seconds / number * 1e6 for seconds in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-payload cost of resolving feed keys to card updates")
+    parser.add_argument("--number", type=int, default=2000, help="payloads per timing run")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--instruments", type=int, help="keys per payload (default: catalog size)")
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    instruments = args.instruments or len(catalog)
+    payload = SyntheticFeed(instruments).payload()
+    for item in payload:
+        item["rx_ts"] = 0.0
+
+    names = ["legacy id->name->(screen, card)", "dispatch, one view", "dispatch, two views"]
+    formatting, *timings = bench([build_format_only(), build_legacy(catalog), build_dispatch(catalog),
+                                  build_dispatch(catalog, 2)], payload, args.number, args.repeat)
+    baseline = timings[0]
+    # The legacy path formats every key, dispatch only those with a card on a built page
+    print(f"{instruments} keys per payload, best of {args.repeat} x {args.number} payloads, "
+          f"formatting every key alone {formatting:.2f} us/payload, cards on {BUILT_PAGES} pages")
+    print(f"  {'':34s} {'us/payload':>10s}  {'ns/key':>7s}  {'speedup':>7s}")
+    for name, micros in zip(names, timings):
+        print(f"  {name:34s} {micros:10.2f}  {micros * 1000 / instruments:7.1f}  {baseline / micros:6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
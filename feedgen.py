@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+
+from latency import percentile
+
+STOCKDOCK_CONFIG_TOPIC = "stockdock/screen/nse-indices"
+
+
+class SyntheticFeed:
+    """ Random-walk ltp/p_ch payloads in the broker's [{"key": "IDX-I-n", ...}] shape
+
+    rate        payloads per second
+    partial     fraction of instruments in a partial payload, 1.0 sends full payloads
+    burst       probability that an interval emits burst_size payloads back to back
+    volatility  annualised-ish sigma of the walk, per second of simulated time
+    session     simulated seconds per trading session, p_ch restarts from the previous close
+    """
+
+    def __init__(self, instruments=54, rate=0.5, partial=1.0, burst=0.0, burst_size=5,
+                 volatility=0.002, seed=42, topic=STOCKDOCK_CONFIG_TOPIC, duration=None, payloads=None,
+                 session=None):
+        self.instruments = instruments
+        self.rate = rate
+        self.partial = partial
+        self.burst = burst
+        self.burst_size = burst_size
+        self.volatility = volatility
+        self.topic = topic
+        self.duration = duration
+        self.max_payloads = payloads
+        self.session = session
+        self.rng = random.Random(seed)
+        self.keys = [f"IDX-I-{i}" for i in range(1, instruments + 1)]
+        self.prev_close = [round(self.rng.uniform(100, 50000), 2) for _ in self.keys]
+        self.ltp = list(self.prev_close)
+        self.stopped = threading.Event()
+        self.payloads = 0
+
+    def step(self, dt):
+        # Geometric random walk, every instrument moves every step
+        scale = self.volatility * math.sqrt(max(dt, 1e-3))
+        gauss = self.rng.gauss
+        self.ltp = [price * math.exp(scale * gauss(0, 1)) for price in self.ltp]
+
+    def payload(self):
+        if self.partial >= 1.0:
+            indices = range(self.instruments)
+        else:
+            count = max(1, int(self.instruments * self.partial))
+            indices = sorted(self.rng.sample(range(self.instruments), count))
+        return [
+            {
+                "key": self.keys[i],
+                "ltp": round(self.ltp[i], 2),
+                "p_ch": round((self.ltp[i] / self.prev_close[i] - 1) * 100, 2),
+            }
+            for i in indices
+        ]
+
+    def iter_payloads(self):
+        # (seconds since start, payload list) on the simulated clock
+        interval = 1.0 / self.rate
+        ts = 0.0
+        current_session = 0
+        while True:
+            if self.duration is not None and ts > self.duration:
+                return
+            if self.session and int(ts // self.session) != current_session:
+                current_session = int(ts // self.session)
+                self.prev_close = list(self.ltp)
+            size = self.burst_size if self.burst and self.rng.random() < self.burst else 1
+            for _ in range(size):
+                self.step(interval / size)
+                yield ts, self.payload()
+            ts += interval
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, sink, speed=1.0):
+        # Same contract as replay.Replayer.run: sink(topic, payload_bytes), speed 0 = flat out
+        start = time.perf_counter()
+        for ts, data in self.iter_payloads():
+            if self.stopped.is_set() or (self.max_payloads and self.payloads >= self.max_payloads):
+                return
+            if speed > 0:
+                delay = start + ts / speed - time.perf_counter()
+                if delay > 0 and self.stopped.wait(delay):
+                    return
+            sink(self.topic, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+            self.payloads += 1
+
+
+def publish_to_broker(feed, broker, speed):
+    import paho.mqtt.client as mqtt
+
+    host, port = broker.rsplit(":", 1)
+    publisher = mqtt.Client(client_id="dhan-feedgen", clean_session=True)
+    publisher.connect(host, int(port), 60)
+    publisher.loop_start()
+    try:
+        feed.run(lambda topic, payload: publisher.publish(topic, payload), speed)
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+
+
+def run_in_process(feed, speed, headless):
+    if headless:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    import dashboard
+    from datasource import ThreadedSource, SimulationPlayer
+
+    handle_times = []
+
+    class TimedUI(dashboard.GlassmorphicUI):
+        def handle_mqtt_data(self, data):
+            start = time.perf_counter()
+            super().handle_mqtt_data(data)
+            handle_times.append(time.perf_counter() - start)
+
+    dashboard.setup_logging()
+    app = QApplication(sys.argv[:1])
+    client = ThreadedSource(SimulationPlayer(feed, speed))
+    window = TimedUI(data_source=client)
+
+    def poll():
+        if client.finished.is_set():
+            QTimer.singleShot(200, app.quit)
+        else:
+            QTimer.singleShot(50, poll)
+
+    poll()
+    app.exec()
+    client.disconnect()
+    return dashboard, sorted(handle_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic stockdock market feed")
+    parser.add_argument("--instruments", type=int, default=54)
+    parser.add_argument("--rate", type=float, default=0.5, help="payloads per second (live feed is ~0.5)")
+    parser.add_argument("--partial", type=float, default=1.0, help="fraction of instruments per payload")
+    parser.add_argument("--burst", type=float, default=0.0, help="probability of a burst per interval")
+    parser.add_argument("--burst-size", type=int, default=5)
+    parser.add_argument("--volatility", type=float, default=0.002)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duration", type=float, help="simulated seconds")
+    parser.add_argument("--payloads", type=int, help="stop after N payloads")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale, 0 = as fast as possible")
+    parser.add_argument("--broker", help="publish to a local broker (host:port)")
+    parser.add_argument("--stdout", action="store_true", help="write JSONL payloads (replay.py input)")
+    parser.add_argument("--headless", action="store_true", help="render offscreen when running in-process")
+    args = parser.parse_args()
+
+    feed = SyntheticFeed(args.instruments, args.rate, args.partial, args.burst, args.burst_size,
+                         args.volatility, args.seed, duration=args.duration, payloads=args.payloads)
+    if args.duration is None and args.payloads is None and not args.broker:
+        feed.max_payloads = 100
+
+    start = time.perf_counter()
+    if args.stdout:
+        feed.run(lambda topic, payload: sys.stdout.write(payload.decode("utf-8") + "\n"), 0)
+        return 0
+    if args.broker:
+        publish_to_broker(feed, args.broker, args.speed)
+        print(f"Published {feed.payloads} payloads in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    dashboard, handle_times = run_in_process(feed, args.speed, args.headless)
+    elapsed = time.perf_counter() - start
+    registry = dashboard.metrics
+    frame = dict(registry.frame.quantiles())
+    print(f"{args.instruments} instruments, {feed.payloads} payloads ({registry.ticks_total} ticks) in {elapsed:.2f}s: "
+          f"{registry.ticks_total / elapsed:.0f} ticks/s")
+    print(f"handle_mqtt_data p50={percentile(handle_times, 50) * 1000:.2f} "
+          f"p99={percentile(handle_times, 99) * 1000:.2f} ms, "
+          f"frame p50={frame[0.5] * 1000:.2f} p99={frame[0.99] * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+from PyQt5.QtWidgets import QApplication, QWidget, QSizePolicy
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QPixmap, QRegion
+from PyQt5.QtCore import Qt, QRect, QRectF, QTimer, pyqtSignal
+
+# p_ch at which a tile reaches full red/green
+COLOR_RANGE = 3.0
+# Colour steps per side; a tick repaints its tile only when the step or the label changes
+COLOR_STEPS = 12
+# Dirty tiles are repainted into the backing pixmap at most this often
+FLUSH_INTERVAL = 200
+# Above this many repainted tiles the whole widget is updated instead of a region
+MAX_REGION_RECTS = 64
+
+NEUTRAL = (55, 60, 75)
+LOSS = (200, 35, 35)
+GAIN = (20, 165, 60)
+
+
+def worst_ratio(total, smallest, largest, side):
+    # Worst aspect ratio of a row of areas laid along `side`
+    side2 = side * side
+    total2 = total * total
+    return max(side2 * largest / total2, total2 / (side2 * smallest))
+
+
+def squarify(weights, x, y, width, height):
+    """ Squarified treemap (Bruls, Huizing, van Wijk) of weights over a rectangle
+
+    Returns one (x, y, w, h) per weight, in input order. Larger weights are
+    placed first; a row keeps growing while that improves its worst aspect
+    ratio, then the remaining area is split the same way.
+    """
+    total = sum(weights)
+    rects = [None] * len(weights)
+    if not weights or total <= 0 or width <= 0 or height <= 0:
+        return rects
+    scale = width * height / total
+    order = sorted(range(len(weights)), key=lambda i: -weights[i])
+    areas = [weights[i] * scale for i in order]
+    i = 0
+    while i < len(order):
+        side = max(min(width, height), 1e-9)
+        row_total = smallest = largest = areas[i]
+        worst = worst_ratio(row_total, smallest, largest, side)
+        j = i + 1
+        while j < len(order):
+            area = areas[j]
+            ratio = worst_ratio(row_total + area, min(smallest, area), max(largest, area), side)
+            if ratio > worst:
+                break
+            row_total += area
+            smallest = min(smallest, area)
+            largest = max(largest, area)
+            worst = ratio
+            j += 1
+        thickness = row_total / side
+        offset = 0.0
+        for k in range(i, j):
+            length = areas[k] / thickness
+            if width >= height:
+                # Column along the left edge
+                rects[order[k]] = (x, y + offset, thickness, length)
+            else:
+                # Row along the top edge
+                rects[order[k]] = (x + offset, y, length, thickness)
+            offset += length
+        if width >= height:
+            x += thickness
+            width -= thickness
+        else:
+            y += thickness
+            height -= thickness
+        i = j
+    return rects
+
+
+def color_step(p_ch):
+    return max(-COLOR_STEPS, min(COLOR_STEPS, round(p_ch / COLOR_RANGE * COLOR_STEPS)))
+
+
+def step_colors():
+    colors = {}
+    for step in range(-COLOR_STEPS, COLOR_STEPS + 1):
+        target = GAIN if step > 0 else LOSS
+        t = abs(step) / COLOR_STEPS
+        colors[step] = QColor(*(round(n + (c - n) * t) for n, c in zip(NEUTRAL, target)))
+    return colors
+
+
+class HeatmapView(QWidget):
+    """ Every instrument as a treemap tile coloured by p_ch, painted by one widget
+
+    The layout is computed when the size or the catalog weights change and
+    cached. Tiles are painted into a backing pixmap; a tick only marks its
+    tile dirty, and dirty tiles whose colour step or label changed are
+    repainted in place on the next flush. paintEvent just copies the exposed
+    part of the pixmap.
+    """
+
+    view_toggle_requested = pyqtSignal()
+    tile_tapped = pyqtSignal(int)
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        count = len(catalog)
+        self.p_ch = [None] * count
+        self.stale = [False] * count
+        # What each tile currently shows, (colour step, label) or None until painted
+        self.shown = [None] * count
+        self.dirty = set()
+        self.tiles = []
+        self.layout_key = None
+        self.pixmap = None
+        self.colors = step_colors()
+        # Per tile: (font, elided title) when text fits, else None; set with the layout
+        self.text = []
+        self.fonts = {size: QFont("Segoe UI", size, QFont.Weight.Bold) for size in (10, 13, 18)}
+        self.press_pos = None
+
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFixedHeight(680)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(FLUSH_INTERVAL)
+        self.timer.timeout.connect(self.flush)
+
+    def bind(self, dispatch):
+        self.catalog.bind_slots(self.update_slot, dispatch)
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        self.p_ch[slot] = p_ch
+        self.stale[slot] = stale
+        self.dirty.add(slot)
+
+    def tile_area(self):
+        # Same footprint as the card pages, 100 px clear on the right
+        return QRect(40, 10, max(1, self.width() - 180), max(1, self.height() - 60))
+
+    def relayout(self):
+        area = self.tile_area()
+        key = (area.width(), area.height(), tuple(self.catalog.weights))
+        if key == self.layout_key:
+            return False
+        rects = squarify(self.catalog.weights, area.x(), area.y(), area.width(), area.height())
+        self.tiles = [QRectF(*rect).adjusted(1, 1, -1, -1) for rect in rects]
+        self.text = [self.tile_text(slot) for slot in range(len(self.tiles))]
+        self.layout_key = key
+        self.pixmap = QPixmap(self.size())
+        self.pixmap.fill(Qt.GlobalColor.transparent)
+        self.shown = [None] * len(self.tiles)
+        self.dirty = set(range(len(self.tiles)))
+        return True
+
+    def label(self, slot):
+        p_ch = self.p_ch[slot]
+        return "--" if p_ch is None else f"{p_ch:+.2f}%"
+
+    def tile_text(self, slot):
+        # Text only where it fits, scaled with the tile
+        rect = self.tiles[slot]
+        if rect.width() < 60 or rect.height() < 34:
+            return None
+        font = self.fonts[18 if rect.width() > 220 and rect.height() > 110 else 13 if rect.width() > 120 else 10]
+        inner = rect.adjusted(6, 4, -6, -4)
+        title = QFontMetrics(font).elidedText(self.catalog.titles[slot], Qt.TextElideMode.ElideRight, int(inner.width()))
+        return font, title
+
+    def paint_tile(self, painter, slot):
+        rect = self.tiles[slot]
+        p_ch = self.p_ch[slot]
+        step = 0 if p_ch is None or self.stale[slot] else color_step(p_ch)
+        text = self.text[slot]
+        # Tiles too small for text change only with the colour step
+        label = self.label(slot) if text is not None else None
+        if self.shown[slot] == (step, label):
+            return False
+        self.shown[slot] = (step, label)
+        painter.fillRect(rect, self.colors[step])
+        if text is not None:
+            font, title = text
+            inner = rect.adjusted(6, 4, -6, -4)
+            painter.setFont(font)
+            painter.setPen(QColor(255, 255, 255, 150 if self.stale[slot] else 255))
+            painter.drawText(inner, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, title)
+            painter.drawText(inner, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom, label)
+        return True
+
+    def flush(self):
+        """ Repaint dirty tiles into the pixmap and schedule only their area for the screen """
+        if not self.dirty or self.pixmap is None:
+            return 0
+        dirty, self.dirty = self.dirty, set()
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painted = [slot for slot in dirty if self.paint_tile(painter, slot)]
+        painter.end()
+        if len(painted) > MAX_REGION_RECTS:
+            # Copying the whole pixmap beats building a region from thousands of rects
+            self.update()
+        elif painted:
+            region = QRegion()
+            for slot in painted:
+                region += self.tiles[slot].toAlignedRect()
+            self.update(region)
+        return len(painted)
+
+    def tile_at(self, pos):
+        for slot, rect in enumerate(self.tiles):
+            if rect.contains(pos):
+                return slot
+        return None
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.relayout():
+            self.flush()
+            self.update()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.relayout()
+        self.flush()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def paintEvent(self, event):
+        if self.pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.drawPixmap(event.rect(), self.pixmap, event.rect())
+
+    def mousePressEvent(self, event):
+        self.press_pos = event.pos()
+
+    def mouseReleaseEvent(self, event):
+        if self.press_pos is None:
+            return
+        delta = event.pos() - self.press_pos
+        if abs(delta.y()) > 120 and abs(delta.y()) > abs(delta.x()):
+            self.view_toggle_requested.emit()
+        elif abs(delta.x()) < 15 and abs(delta.y()) < 15:
+            slot = self.tile_at(event.pos())
+            if slot is not None:
+                self.tile_tapped.emit(slot)
+        self.press_pos = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layout and repaint cost of the heatmap")
+    parser.add_argument("--tiles", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=5000, help="ticks between two flushes")
+    parser.add_argument("--flushes", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1560)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write a screenshot of the last frame")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from catalog import Catalog
+
+    app = QApplication(sys.argv[:1])
+    rng = random.Random(args.seed)
+    catalog = Catalog([{"key": f"IDX-I-{i}", "title": f"Index {i}", "weight": rng.lognormvariate(0, 1)}
+                       for i in range(1, args.tiles + 1)])
+    view = HeatmapView(catalog)
+    view.resize(args.width, 680)
+    start = time.perf_counter()
+    view.relayout()
+    laid = time.perf_counter() - start
+    for slot in range(args.tiles):
+        view.update_slot(slot, 0.0, rng.uniform(-3, 3))
+    start = time.perf_counter()
+    view.flush()
+    full = time.perf_counter() - start
+
+    p_ch = [view.p_ch[slot] for slot in range(args.tiles)]
+    flushes = []
+    painted = 0
+    for _ in range(args.flushes):
+        for _ in range(args.updates):
+            slot = rng.randrange(args.tiles)
+            p_ch[slot] += rng.gauss(0, 0.05)
+            view.update_slot(slot, 0.0, p_ch[slot])
+        start = time.perf_counter()
+        painted += view.flush()
+        flushes.append(time.perf_counter() - start)
+    flushes.sort()
+    if args.save:
+        view.grab().save(args.save)
+
+    print(f"{args.tiles} tiles at {args.width}x680: layout {laid * 1000:.1f} ms, full paint {full * 1000:.1f} ms")
+    print(f"{args.updates} ticks per flush: {painted / args.flushes:.0f} tiles repainted, "
+          f"flush p50 {flushes[len(flushes) // 2] * 1000:.2f} ms, max {flushes[-1] * 1000:.2f} ms")
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
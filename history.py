@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from dashlog import get_logger
+
+# Samples kept per instrument; 12288 covers a 9:15-15:30 session at the feed's ~2 s cadence
+HISTORY_CAPACITY = int(os.environ.get("DHAN_HISTORY_CAPACITY", "12288"))
+# Upper bound for all rings together, large catalogs get shorter rings instead of more memory
+HISTORY_BUDGET_MB = float(os.environ.get("DHAN_HISTORY_MB", "32"))
+# ts + ltp + p_ch
+SAMPLE_BYTES = 8 + 8 + 4
+
+log = get_logger("history")
+
+
+class TickHistory:
+    """ Fixed-size intraday ring buffer of (ts, ltp, p_ch) per slot
+
+    All instruments share three preallocated (slots x capacity) arrays, so
+    memory is count * capacity * 20 bytes (capped at DHAN_HISTORY_MB)
+    whatever the session length; once
+    a slot's ring is full the oldest samples are overwritten. Queries return
+    NumPy arrays in time order: views while a ring has not wrapped, a single
+    concatenated copy once it has.
+    """
+
+    def __init__(self, count, capacity=HISTORY_CAPACITY, budget_mb=HISTORY_BUDGET_MB):
+        self.count = count
+        self.capacity = max(2, min(capacity, int(budget_mb * 1e6) // (SAMPLE_BYTES * max(count, 1))))
+        self.ts = np.zeros((count, self.capacity), dtype=np.float64)
+        self.ltp = np.zeros((count, self.capacity), dtype=np.float64)
+        self.p_ch = np.zeros((count, self.capacity), dtype=np.float32)
+        # Next write position and number of valid samples per slot
+        self.head = np.zeros(count, dtype=np.int64)
+        self.size = np.zeros(count, dtype=np.int64)
+        # Running session extremes, kept per append so they survive ring overwrites
+        self.high = np.full(count, -np.inf)
+        self.low = np.full(count, np.inf)
+        self.open = np.full(count, np.nan)
+        self.session_end = self.next_session_end(time.time())
+        log.info("Tick history for %d instruments x %d samples (%.1f MB)",
+                 count, self.capacity, self.nbytes / 1e6)
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + self.ltp.nbytes + self.p_ch.nbytes
+
+    @staticmethod
+    def next_session_end(ts):
+        # Sessions roll over at local midnight
+        tomorrow = time.localtime(ts + 86400)
+        return time.mktime((tomorrow.tm_year, tomorrow.tm_mon, tomorrow.tm_mday, 0, 0, 0, 0, 0, -1))
+
+    def reset(self):
+        self.head[:] = 0
+        self.size[:] = 0
+        self.high[:] = -np.inf
+        self.low[:] = np.inf
+        self.open[:] = np.nan
+
+    def append(self, slot, ts, ltp, p_ch):
+        """ Record one tick in O(1); a tick past local midnight starts a new session first """
+        if ts >= self.session_end:
+            self.reset()
+            self.session_end = self.next_session_end(ts)
+        i = self.head[slot]
+        self.ts[slot, i] = ts
+        self.ltp[slot, i] = ltp
+        self.p_ch[slot, i] = p_ch
+        self.head[slot] = (i + 1) % self.capacity
+        if self.size[slot] < self.capacity:
+            self.size[slot] += 1
+        if self.size[slot] == 1:
+            self.open[slot] = ltp
+        if ltp > self.high[slot]:
+            self.high[slot] = ltp
+        if ltp < self.low[slot]:
+            self.low[slot] = ltp
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # Dispatch table entry; snapshot values restored at startup are not part of today's history
+        if not stale:
+            self.append(slot, time.time(), ltp, p_ch)
+
+    def __len__(self):
+        return self.count
+
+    def samples(self, slot):
+        return int(self.size[slot])
+
+    def _ordered(self, column, slot):
+        size = self.size[slot]
+        row = column[slot]
+        if size < self.capacity:
+            return row[:size]
+        head = self.head[slot]
+        return row if head == 0 else np.concatenate((row[head:], row[:head]))
+
+    def series(self, slot, since=None):
+        """ (ts, ltp, p_ch) arrays in time order, from `since` (epoch seconds) on when given """
+        ts = self._ordered(self.ts, slot)
+        start = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+        return ts[start:], self._ordered(self.ltp, slot)[start:], self._ordered(self.p_ch, slot)[start:]
+
+    def window(self, slot, seconds, now=None):
+        """ Samples from the last `seconds` before `now` (default: the latest sample) """
+        if now is None:
+            now = self.last_ts(slot)
+        return self.series(slot, now - seconds)
+
+    def last_ts(self, slot):
+        if not self.size[slot]:
+            return 0.0
+        return float(self.ts[slot, self.head[slot] - 1])
+
+    def last(self, slot):
+        """ Latest (ts, ltp, p_ch), None before the first tick """
+        if not self.size[slot]:
+            return None
+        i = self.head[slot] - 1
+        return float(self.ts[slot, i]), float(self.ltp[slot, i]), float(self.p_ch[slot, i])
+
+    def high_low(self, slot, since=None):
+        """ Session (or since-`since`) high and low ltp, None before the first tick """
+        if since is None:
+            return (float(self.high[slot]), float(self.low[slot])) if self.size[slot] else None
+        _, ltp, _ = self.series(slot, since)
+        return (float(ltp.max()), float(ltp.min())) if len(ltp) else None
+
+    def twap(self, slot, since=None, now=None):
+        """ Time-weighted average ltp, each price weighted by how long it stood
+
+        The feed carries no traded volume, so this stands in for VWAP.
+        """
+        ts, ltp, _ = self.series(slot, since)
+        if not len(ts):
+            return None
+        end = ts[-1] if now is None else now
+        held = np.diff(ts, append=end)
+        total = held.sum()
+        return float(ltp[-1]) if total <= 0 else float(np.dot(ltp, held) / total)
+
+    def change(self, slot, seconds, now=None):
+        """ Percent move of ltp over the last `seconds`, None without a sample that old """
+        ts, ltp, _ = self.window(slot, seconds, now)
+        if len(ltp) < 2 or ltp[0] == 0:
+            return None
+        return float((ltp[-1] / ltp[0] - 1) * 100)
+
+    def latest_ltp(self):
+        """ Latest ltp of every slot as one array, NaN before the first tick """
+        last = self.ltp[np.arange(self.count), self.head - 1]
+        return np.where(self.size > 0, last, np.nan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append and query cost of the tick history")
+    parser.add_argument("--instruments", type=int, default=54)
+    parser.add_argument("--capacity", type=int, default=HISTORY_CAPACITY)
+    parser.add_argument("--budget-mb", type=float, default=HISTORY_BUDGET_MB)
+    parser.add_argument("--ticks", type=int, default=200000)
+    args = parser.parse_args()
+
+    from feedgen import SyntheticFeed
+
+    feed = SyntheticFeed(args.instruments)
+    history = TickHistory(args.instruments, args.capacity, args.budget_mb)
+    payloads = []
+    while len(payloads) * args.instruments < args.ticks:
+        payloads.append(feed.payload())
+        feed.step(2.0)
+
+    ts = history.session_end - 86400 + 9.25 * 3600
+    start = time.perf_counter()
+    for payload in payloads:
+        ts += 2.0
+        for slot, item in enumerate(payload):
+            history.append(slot, ts, item["ltp"], item["p_ch"])
+    elapsed = time.perf_counter() - start
+    ticks = len(payloads) * args.instruments
+
+    query = time.perf_counter()
+    for slot in range(args.instruments):
+        history.window(slot, 15 * 60)
+        history.high_low(slot)
+        history.twap(slot)
+    queried = (time.perf_counter() - query) / args.instruments
+
+    print(f"{args.instruments} instruments x {history.capacity} samples = {history.nbytes / 1e6:.1f} MB, "
+          f"{history.samples(0)} held after {len(payloads)} ticks each")
+    print(f"append {elapsed / ticks * 1e6:.2f} us/tick, "
+          f"15 min window + high/low + TWAP {queried * 1e6:.1f} us/instrument")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+from PyQt5.QtCore import QTimer
+
+from dashlog import get_logger
+from tickbus import BusSource, read_pidfile
+
+# What the ingest process connects to: mqtt, replay or sim
+INGEST_FEED = os.environ.get("DHAN_INGEST_FEED", "mqtt")
+# Private tick bus between this user's dashboard and its ingest process
+INGEST_PATH = os.environ.get("DHAN_INGEST_BUS", f"/dev/shm/dhan-ingest-{os.getuid()}")
+# The ingest process outlives a crashed dashboard this long, so a restart finds it still connected
+INGEST_IDLE_EXIT = float(os.environ.get("DHAN_INGEST_IDLE", "300"))
+SUPERVISE_INTERVAL = 2000
+# Respawn delay doubles per crash up to this, and resets once the process stayed up a minute
+MAX_BACKOFF = 30.0
+STABLE_AFTER = 60.0
+
+log = get_logger("ingest")
+
+
+def daemon_command(path, feed, replay_file, speed, pidfile, idle_exit):
+    args = ["serve", "--path", path, "--source", feed, "--speed", str(speed),
+            "--pidfile", pidfile, "--idle-exit", str(idle_exit)]
+    if replay_file:
+        args += ["--replay-file", replay_file]
+    if getattr(sys, "frozen", False):
+        # PyInstaller bundle: the dashboard executable runs the daemon itself
+        return [sys.executable, "--tickbus", *args]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tickbus.py"), *args]
+
+
+class IngestSource(BusSource):
+    """ Tick bus source that also owns the feed daemon behind it
+
+    Connecting, decoding, coalescing and journaling all happen in a separate
+    process (tickbus.py serve), so the UI process only maps the shared table
+    and never holds the GIL for JSON. The daemon runs in its own session:
+    it survives a dashboard crash and is adopted through its pidfile by the
+    next dashboard, and it exits by itself once no dashboard has read from
+    it for DHAN_INGEST_IDLE seconds. The dashboard checks on it every two
+    seconds and respawns it with backoff if it died.
+    """
+
+    def __init__(self, feed=INGEST_FEED, replay_file="", speed=1.0, path=INGEST_PATH,
+                 idle_exit=INGEST_IDLE_EXIT, parent=None):
+        super().__init__(path, parent)
+        self.feed = feed
+        self.replay_file = replay_file
+        self.speed = speed
+        self.idle_exit = idle_exit
+        self.pidfile = path + ".pid"
+        self.process = None
+        self.started = None
+        self.backoff = 1.0
+        self.next_spawn = 0.0
+        self.supervisor = QTimer(self)
+        self.supervisor.setInterval(SUPERVISE_INTERVAL)
+        self.supervisor.timeout.connect(self.supervise)
+
+    def connect(self):
+        self.supervise()
+        self.supervisor.start()
+        super().connect()
+
+    def disconnect(self):
+        # The daemon is left running; it exits on its own once idle
+        self.supervisor.stop()
+        super().disconnect()
+
+    def supervise(self):
+        if self.process is not None and self.process.poll() is not None:
+            log.warning("Ingest process %d exited with code %s", self.process.pid, self.process.returncode)
+            self.process = None
+        pid = read_pidfile(self.pidfile, self.path)
+        if pid is not None:
+            if self.started is not None and time.monotonic() - self.started > STABLE_AFTER:
+                self.backoff = 1.0
+            return
+        now = time.monotonic()
+        if self.process is not None or now < self.next_spawn:
+            # Still starting up, or waiting out the backoff
+            return
+        command = daemon_command(self.path, self.feed, self.replay_file, self.speed, self.pidfile, self.idle_exit)
+        log.info("Starting ingest process: %s", " ".join(command))
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            log.error("Cannot start ingest process: %s", e)
+        self.started = now
+        self.next_spawn = now + self.backoff
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status of this user's ingest process, or stop it")
+    parser.add_argument("--path", default=INGEST_PATH)
+    parser.add_argument("--stop", action="store_true", help="terminate the ingest process")
+    args = parser.parse_args()
+
+    pid = read_pidfile(args.path + ".pid", args.path)
+    if pid is None:
+        print("No ingest process running")
+        return 1
+    if args.stop:
+        import signal
+        os.kill(pid, signal.SIGTERM)
+        print(f"Sent SIGTERM to ingest process {pid}")
+        return 0
+    from tickbus import dump
+    print(f"Ingest process {pid}")
+    return dump(argparse.Namespace(path=args.path, limit=10))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
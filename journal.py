@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import queue
+import struct
+import argparse
+import threading
+from collections import namedtuple
+
+from dashlog import get_logger
+
+# DHAN_JOURNAL_DIR turns on recording of every received payload
+JOURNAL_DIR = os.environ.get("DHAN_JOURNAL_DIR", "")
+JOURNAL_MAX_BYTES = int(os.environ.get("DHAN_JOURNAL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# File layout:
+#   header  MAGIC, base timestamp (uint64 ns since epoch, little endian)
+#   record  varint  microseconds since the previous record (the header base for the first)
+#           varint  topic length, 0 when the topic is the same as the previous record's
+#           bytes   topic
+#           varint  payload length
+#           bytes   payload, exactly as received from the broker
+MAGIC = b"DHJ1"
+HEADER = struct.Struct("<4sQ")
+SUFFIX = ".dhj"
+
+TickRecord = namedtuple("TickRecord", "ts_ns topic payload")
+
+log = get_logger("journal")
+
+
+def encode_varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class JournalWriter:
+    """ Append-only recorder; append() only enqueues, a background thread does the I/O """
+
+    def __init__(self, directory, max_bytes=JOURNAL_MAX_BYTES, flush_interval=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.file = None
+        self.file_day = None
+        self.file_size = 0
+        self.last_us = 0
+        self.last_topic = None
+        self.closed = False
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name="journal", daemon=True)
+        self.thread.start()
+
+    def append(self, topic, payload, ts_ns=None):
+        # Safe to call from paho's network thread, never blocks on disk
+        self.queue.put((ts_ns or time.time_ns(), topic, payload))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+    def run(self):
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if self.file is not None:
+                    self.file.flush()
+                continue
+            # Drain whatever else queued up meanwhile into one write
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [entry for entry in batch if entry is not None]
+            try:
+                self.write_batch(batch)
+            except OSError as e:
+                log.error("Failed to write journal: %s", e)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_batch(self, batch):
+        buf = bytearray()
+        for ts_ns, topic, payload in batch:
+            if self.file is None or self.needs_rotation(ts_ns, len(buf) + len(payload)):
+                if buf:
+                    self.write(buf)
+                    buf = bytearray()
+                self.open_file(ts_ns)
+            ts_us = ts_ns // 1000
+            # Clock steps backwards are clamped rather than stored as negative deltas
+            encode_varint(max(0, ts_us - self.last_us), buf)
+            self.last_us = max(self.last_us, ts_us)
+            if topic == self.last_topic:
+                encode_varint(0, buf)
+            else:
+                topic_bytes = topic.encode("utf-8")
+                encode_varint(len(topic_bytes), buf)
+                buf += topic_bytes
+                self.last_topic = topic
+            encode_varint(len(payload), buf)
+            buf += payload
+        if buf:
+            self.write(buf)
+
+    def write(self, buf):
+        self.file.write(buf)
+        self.file_size += len(buf)
+
+    def needs_rotation(self, ts_ns, incoming):
+        day = time.strftime("%Y%m%d", time.localtime(ts_ns / 1e9))
+        return day != self.file_day or self.file_size + incoming > self.max_bytes
+
+    def open_file(self, ts_ns):
+        if self.file is not None:
+            self.file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(ts_ns / 1e9))
+        # The zero padded counter keeps files rotated within one second in order
+        counter = 0
+        while True:
+            path = os.path.join(self.directory, f"journal-{stamp}-{counter:03d}{SUFFIX}")
+            if not os.path.exists(path):
+                break
+            counter += 1
+        self.file = open(path, "wb", buffering=256 * 1024)
+        self.file.write(HEADER.pack(MAGIC, ts_ns))
+        self.file_size = HEADER.size
+        self.file_day = stamp[:8]
+        self.last_us = ts_ns // 1000
+        self.last_topic = None
+        log.info("Recording journal to %s", path)
+
+
+def journal_files(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(SUFFIX))
+    return [path]
+
+
+def iter_journal(path, chunk_size=256 * 1024):
+    """ Yield TickRecords from a journal file or directory, streaming in chunks """
+    for file_path in journal_files(path):
+        with open(file_path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                continue
+            magic, base_ns = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{file_path} is not a tick journal")
+
+            buf = b""
+            pos = 0
+            last_us = base_ns // 1000
+            topic = None
+
+            def fill(needed):
+                # Make sure buf[pos:] holds at least `needed` bytes, False at end of file
+                nonlocal buf, pos
+                while len(buf) - pos < needed:
+                    chunk = f.read(max(chunk_size, needed))
+                    if not chunk:
+                        return False
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                return True
+
+            def varint():
+                nonlocal pos
+                value = 0
+                shift = 0
+                while True:
+                    if not fill(1):
+                        return None
+                    byte = buf[pos]
+                    pos += 1
+                    value |= (byte & 0x7F) << shift
+                    if byte < 0x80:
+                        return value
+                    shift += 7
+
+            while True:
+                # A record cut short by a crash or power loss ends the file quietly
+                delta = varint()
+                topic_len = varint() if delta is not None else None
+                if topic_len is None:
+                    break
+                if topic_len:
+                    if not fill(topic_len):
+                        break
+                    topic = buf[pos:pos + topic_len].decode("utf-8")
+                    pos += topic_len
+                payload_len = varint()
+                if payload_len is None or not fill(payload_len):
+                    break
+                payload = buf[pos:pos + payload_len]
+                pos += payload_len
+                last_us += delta
+                yield TickRecord(last_us * 1000, topic, payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect tick journals")
+    parser.add_argument("path", help="journal file or directory")
+    parser.add_argument("--limit", type=int, default=0, help="print at most N records")
+    parser.add_argument("--stats", action="store_true", help="only print totals")
+    args = parser.parse_args()
+
+    count = 0
+    size = 0
+    first = last = None
+    for record in iter_journal(args.path):
+        count += 1
+        size += len(record.payload)
+        first = first or record.ts_ns
+        last = record.ts_ns
+        if not args.stats and (not args.limit or count <= args.limit):
+            try:
+                items = len(json.loads(record.payload))
+            except ValueError:
+                items = "?"
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.ts_ns / 1e9))
+            print(f"{stamp}.{record.ts_ns // 1000 % 1000000:06d} {record.topic} {len(record.payload)} bytes, {items} items")
+    if count:
+        print(f"{count} records, {size} payload bytes, {(last - first) / 1e9:.1f}s span")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import deque
+
+# One frame at 60 Hz, the default regression budget for tick-to-pixel latency
+FRAME_BUDGET_MS = 1000.0 / 60
+
+
+def now():
+    # Monotonic high resolution clock shared by every stamp and measurement
+    return time.perf_counter()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class LatencyTracer:
+    """ Records receive-to-paint latency (in ms) per feed key """
+
+    def __init__(self, max_samples=2048):
+        self.max_samples = max_samples
+        self.samples = {}
+        # Running totals over every sample ever recorded, for Prometheus' _count and _sum
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, key, rx_ts):
+        latency_ms = (now() - rx_ts) * 1000.0
+        with self.lock:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=self.max_samples)
+            samples.append(latency_ms)
+            self.count += 1
+            self.total += latency_ms
+        return latency_ms
+
+    def reset(self):
+        # The running totals keep counting, they must never go down
+        with self.lock:
+            self.samples.clear()
+
+    def totals(self):
+        with self.lock:
+            return self.count, self.total
+
+    def summary(self, pcts=(50, 95, 99)):
+        # Per index {"count", "p50", "p95", "p99", "max"} plus an "all" entry
+        with self.lock:
+            snapshot = {name: sorted(values) for name, values in self.samples.items()}
+        combined = sorted(v for values in snapshot.values() for v in values)
+        snapshot["all"] = combined
+
+        result = {}
+        for name, values in snapshot.items():
+            stats = {"count": len(values), "max": values[-1] if values else 0.0}
+            for pct in pcts:
+                stats[f"p{pct}"] = percentile(values, pct)
+            result[name] = stats
+        return result
+
+
+# Process wide tracer used by the dashboard cards
+tracer = LatencyTracer()
+
+
+def fake_payload(count, rng):
+    return [
+        {"key": f"IDX-I-{i}", "ltp": rng.uniform(500, 50000), "p_ch": rng.uniform(-3, 3)}
+        for i in range(1, count + 1)
+    ]
+
+
+def run_fake_feed(client, payloads, interval, count, done):
+    # Mimics paho's network thread: decode, stamp and emit from a worker thread
+    rng = random.Random(42)
+    for _ in range(payloads):
+        rx_ts = now()
+        data = fake_payload(count, rng)
+        for item in data:
+            item["rx_ts"] = rx_ts
+        client.data_received.emit(data)
+        time.sleep(interval)
+    done.set()
+
+
+def run_broker_feed(host, port, topic, payloads, interval, count, done):
+    import json
+    import paho.mqtt.client as mqtt
+
+    rng = random.Random(42)
+    publisher = mqtt.Client(client_id="dhan-latency-feed", clean_session=True)
+    publisher.connect(host, port, 60)
+    publisher.loop_start()
+    try:
+        for _ in range(payloads):
+            publisher.publish(topic, json.dumps(fake_payload(count, rng)))
+            time.sleep(interval)
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+        done.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tick-to-pixel latency check")
+    parser.add_argument("--broker", help="local broker as host:port (default: in-process fake feed)")
+    parser.add_argument("--payloads", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between payloads")
+    parser.add_argument("--count", type=int, default=54, help="items per payload")
+    parser.add_argument("--budget", type=float, default=FRAME_BUDGET_MS, help="p95 budget in ms")
+    parser.add_argument("--per-index", action="store_true", help="print every index")
+    args = parser.parse_args()
+
+    if args.broker:
+        os.environ["DHAN_BROKER_URL"] = f"mqtt://{args.broker}"
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    import dashboard
+    from datasource import STOCKDOCK_CONFIG_TOPIC
+
+    dashboard.setup_logging()
+    app = QApplication(sys.argv[:1])
+    window = dashboard.GlassmorphicUI(autoconnect=bool(args.broker))
+    done = threading.Event()
+
+    if args.broker:
+        host, port = args.broker.rsplit(":", 1)
+        target = run_broker_feed
+        feed_args = (host, int(port), STOCKDOCK_CONFIG_TOPIC)
+    else:
+        target = run_fake_feed
+        feed_args = (window.data_source,)
+    feed_args += (args.payloads, args.interval, args.count, done)
+    # Give the window (and the broker connection) time to come up first
+    QTimer.singleShot(1500, lambda: threading.Thread(target=target, args=feed_args, daemon=True).start())
+
+    def poll():
+        if done.is_set():
+            QTimer.singleShot(500, app.quit)
+        else:
+            QTimer.singleShot(100, poll)
+
+    poll()
+    app.exec()
+    window.data_source.disconnect()
+
+    # Run as a script this module is __main__; the cards record into the imported copy
+    summary = dashboard.latency_tracer.summary()
+    overall = summary.pop("all")
+    if args.per_index:
+        for name in sorted(summary):
+            stats = summary[name]
+            print(f"{name:40s} n={stats['count']:5d} p50={stats['p50']:7.2f} "
+                  f"p95={stats['p95']:7.2f} max={stats['max']:7.2f} ms")
+    print(f"all: n={overall['count']} p50={overall['p50']:.2f} p95={overall['p95']:.2f} "
+          f"p99={overall['p99']:.2f} max={overall['max']:.2f} ms (budget {args.budget:.2f} ms)")
+
+    if overall["count"] == 0:
+        print("No latency samples recorded")
+        return 1
+    return 0 if overall["p95"] <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
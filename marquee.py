@@ -0,0 +1,321 @@
+import os
+import sys
+import time
+import random
+import argparse
+from bisect import bisect_right
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QPixmap
+from PyQt5.QtCore import Qt, QElapsedTimer, QRect, QTimer
+
+# Start in marquee mode: the tape alone, without the card pages
+MARQUEE = os.environ.get("DHAN_MARQUEE", "") not in ("", "0")
+# Scroll speed of the tape in pixels per second
+MARQUEE_SPEED = float(os.environ.get("DHAN_MARQUEE_SPEED", "120"))
+TAPE_HEIGHT = 72
+# Segments are pre-rendered into pixmaps of about this width; only those near the viewport exist
+CHUNK_WIDTH = 2048
+SEGMENT_GAP = 56
+# Changed segments are re-rendered at most this often
+FLUSH_INTERVAL = 250
+BACKGROUND = QColor(12, 16, 30)
+
+
+class Chunk:
+    __slots__ = ("start", "width", "first", "last", "pixmap")
+
+    def __init__(self, start, width, first, last):
+        self.start = start
+        self.width = width
+        # Slots first..last-1 live in this chunk
+        self.first = first
+        self.last = last
+        self.pixmap = None
+
+
+class TickerTape(QWidget):
+    """ Endless ticker of every instrument, scrolled by blitting a pre-rendered strip
+
+    The strip is cut into chunks of whole segments. Chunks are rendered when
+    they come within a screen of the viewport and dropped once they have
+    scrolled past, so memory and rendering work stay flat whatever the
+    catalog size. Each frame scrolls the widget's pixels with QWidget.scroll
+    and paints only the newly exposed column; a changed value re-renders its
+    segment inside its chunk, and only if that chunk is loaded.
+    """
+
+    def __init__(self, catalog, speed=MARQUEE_SPEED, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.speed = speed
+        count = len(catalog)
+        self.values = [placeholder for placeholder in catalog.placeholders]
+        self.p_ch = [None] * count
+        self.stale = [False] * count
+        # What each rendered segment shows, so a tick that leaves the text as it was costs nothing
+        self.shown = [None] * count
+        self.dirty = set()
+        # Set when a chunk rendered a value wider than its segment; the next flush lays the strip out again
+        self.needs_layout = False
+        self.offset = 0
+        self.carry = 0.0
+
+        self.title_font = QFont("Segoe UI", 20, QFont.Weight.Bold)
+        self.value_font = QFont("Segoe UI", 20)
+        self.title_metrics = QFontMetrics(self.title_font)
+        self.value_metrics = QFontMetrics(self.value_font)
+        self.layout_segments()
+
+        self.setFixedHeight(TAPE_HEIGHT)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        # Every pixel is painted, which lets scroll() blit instead of repainting
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+        self.clock = QElapsedTimer()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.frame_timer.setInterval(16)
+        self.frame_timer.timeout.connect(self.advance)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(FLUSH_INTERVAL)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def texts(self, slot):
+        value, change = self.values[slot]
+        p_ch = self.p_ch[slot]
+        arrow = "" if p_ch is None else "▲" if p_ch >= 0 else "▼"
+        return value, f"{arrow}{change}"
+
+    def text_width(self, slot):
+        value, change = self.texts(slot)
+        return self.value_metrics.horizontalAdvance(f"{value}  {change}")
+
+    def layout_segments(self):
+        # Fixed x and width per segment, with room for a couple more digits so values can change in place
+        slack = 2 * self.value_metrics.horizontalAdvance("8")
+        self.seg_x = []
+        self.seg_title = []
+        # Room for the value and change text, fixed until a value outgrows it
+        self.seg_text = []
+        self.seg_width = []
+        self.chunks = []
+        self.chunk_of = []
+        x = chunk_start = first = 0
+        for slot, title in enumerate(self.catalog.titles):
+            title_width = self.title_metrics.horizontalAdvance(title) + 16
+            text_width = self.text_width(slot) + slack
+            width = title_width + text_width + SEGMENT_GAP
+            if x - chunk_start + width > CHUNK_WIDTH and slot > first:
+                self.chunks.append(Chunk(chunk_start, x - chunk_start, first, slot))
+                chunk_start, first = x, slot
+            self.seg_x.append(x)
+            self.seg_title.append(title_width)
+            self.seg_text.append(text_width)
+            self.seg_width.append(width)
+            self.chunk_of.append(len(self.chunks))
+            x += width
+        self.chunks.append(Chunk(chunk_start, x - chunk_start, first, len(self.catalog.titles)))
+        self.chunk_starts = [chunk.start for chunk in self.chunks]
+        self.loaded = set()
+        self.needs_layout = False
+        self.strip_width = max(x, 1)
+        self.offset %= self.strip_width
+
+    def bind(self, dispatch):
+        self.catalog.bind_slots(self.update_slot, dispatch)
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        self.values[slot] = (f"₹ {ltp:,.2f}", f"{abs(p_ch):.2f}%")
+        self.p_ch[slot] = p_ch
+        self.stale[slot] = stale
+        self.dirty.add(slot)
+
+    def paint_segment(self, painter, slot, chunk):
+        x = self.seg_x[slot] - chunk.start
+        segment = QRect(x, 0, self.seg_width[slot], TAPE_HEIGHT)
+        # A value that outgrew its room is cut off until the next flush lays the strip out again
+        painter.setClipRect(segment)
+        painter.fillRect(segment, BACKGROUND)
+        rect = QRect(x + 8, 0, self.seg_width[slot], TAPE_HEIGHT)
+        align = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("white"))
+        painter.drawText(rect, align, self.catalog.titles[slot])
+        value, change = self.texts(slot)
+        self.shown[slot] = (value, change, self.stale[slot])
+        rect.setLeft(x + self.seg_title[slot])
+        painter.setFont(self.value_font)
+        painter.setPen(QColor(255, 255, 255, 140) if self.stale[slot] else QColor("white"))
+        painter.drawText(rect, align, value)
+        p_ch = self.p_ch[slot]
+        color = "gray" if self.stale[slot] or p_ch is None else "green" if p_ch >= 0 else "red"
+        painter.setPen(QColor(color))
+        rect.setLeft(rect.left() + self.value_metrics.horizontalAdvance(f"{value}  "))
+        painter.drawText(rect, align, change)
+
+    def render_chunk(self, chunk):
+        if any(self.text_width(slot) > self.seg_text[slot] for slot in range(chunk.first, chunk.last)):
+            self.needs_layout = True
+        chunk.pixmap = QPixmap(chunk.width, TAPE_HEIGHT)
+        chunk.pixmap.fill(BACKGROUND)
+        painter = QPainter(chunk.pixmap)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        for slot in range(chunk.first, chunk.last):
+            self.paint_segment(painter, slot, chunk)
+        painter.end()
+
+    def window_chunks(self):
+        # Chunk indices overlapping the viewport plus one screen ahead, wrapping at the strip end
+        first = self.chunk_of_x(self.offset)
+        span = min(self.strip_width, self.offset - self.chunks[first].start + 2 * max(self.width(), 1))
+        needed = []
+        i = first
+        while span > 0 and i not in needed:
+            needed.append(i)
+            span -= self.chunks[i].width
+            i = (i + 1) % len(self.chunks)
+        return needed
+
+    def ensure_chunks(self):
+        needed = self.window_chunks()
+        for i in self.loaded.difference(needed):
+            self.chunks[i].pixmap = None
+        for i in needed:
+            if self.chunks[i].pixmap is None:
+                self.render_chunk(self.chunks[i])
+        self.loaded = set(needed)
+
+    def flush(self):
+        """ Re-render changed segments of loaded chunks; segments of unloaded chunks render on load """
+        if not self.dirty and not self.needs_layout:
+            return 0
+        dirty = [slot for slot in self.dirty if self.chunk_of[slot] in self.loaded
+                 and self.shown[slot] != (*self.texts(slot), self.stale[slot])]
+        self.dirty = set()
+        if self.needs_layout or any(self.text_width(slot) > self.seg_text[slot] for slot in dirty):
+            # A value outgrew its segment's slack: lay the strip out again
+            self.layout_segments()
+            self.ensure_chunks()
+            self.update()
+            return len(dirty)
+        painted = 0
+        painters = {}
+        for slot in dirty:
+            chunk = self.chunks[self.chunk_of[slot]]
+            painter = painters.get(self.chunk_of[slot])
+            if painter is None:
+                painter = painters[self.chunk_of[slot]] = QPainter(chunk.pixmap)
+                painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+            self.paint_segment(painter, slot, chunk)
+            painted += 1
+            x = (self.seg_x[slot] - self.offset) % self.strip_width
+            # The wrapped copy catches a segment straddling the left edge
+            for left in (x, x - self.strip_width):
+                if left < self.width() and left + self.seg_width[slot] > 0:
+                    self.update(QRect(left, 0, self.seg_width[slot], TAPE_HEIGHT))
+        for painter in painters.values():
+            painter.end()
+        return painted
+
+    def advance(self):
+        # Fixed pixel rate whatever the timer jitter; fractions carry over to the next frame
+        elapsed = self.clock.restart() / 1000.0
+        self.carry += self.speed * elapsed
+        step = int(self.carry)
+        if not step:
+            return
+        self.carry -= step
+        before = self.chunk_of_x(self.offset + self.width())
+        self.offset = (self.offset + step) % self.strip_width
+        if self.chunk_of_x(self.offset + self.width()) != before:
+            self.ensure_chunks()
+        if step < self.width():
+            self.scroll(-step, 0)
+        else:
+            self.update()
+
+    def chunk_of_x(self, x):
+        return bisect_right(self.chunk_starts, x % self.strip_width) - 1
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+        painter.fillRect(area, BACKGROUND)
+        for i in self.loaded:
+            chunk = self.chunks[i]
+            x = (chunk.start - self.offset) % self.strip_width
+            for left in (x, x - self.strip_width):
+                if left < area.right() + 1 and left + chunk.width > area.left():
+                    painter.drawPixmap(left, 0, chunk.pixmap)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.ensure_chunks()
+        self.clock.start()
+        self.frame_timer.start()
+        self.flush_timer.start()
+
+    def hideEvent(self, event):
+        self.frame_timer.stop()
+        self.flush_timer.stop()
+        super().hideEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.ensure_chunks()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame and per-tick cost of the ticker tape")
+    parser.add_argument("--instruments", type=int, default=54)
+    parser.add_argument("--width", type=int, default=1560)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--ticks", type=int, default=54, help="ticks per flush")
+    parser.add_argument("--save", help="write a screenshot of the tape")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from catalog import Catalog
+
+    app = QApplication(sys.argv[:1])
+    rng = random.Random(42)
+    catalog = Catalog([{"key": f"IDX-I-{i}", "title": f"Nifty Index {i}"} for i in range(1, args.instruments + 1)])
+    tape = TickerTape(catalog)
+    tape.resize(args.width, TAPE_HEIGHT)
+    tape.show()
+    prices = [rng.uniform(100, 50000) for _ in range(args.instruments)]
+    for slot, price in enumerate(prices):
+        tape.update_slot(slot, price, rng.uniform(-3, 3))
+    tape.flush()
+
+    frames = flushes = 0.0
+    step = max(1, round(tape.speed / 60))
+    for frame in range(args.frames):
+        start = time.perf_counter()
+        tape.carry += step
+        tape.clock.restart()
+        tape.advance()
+        app.processEvents()
+        frames += time.perf_counter() - start
+        if frame % 15 == 0:
+            for _ in range(args.ticks):
+                slot = rng.randrange(args.instruments)
+                prices[slot] *= 1 + rng.gauss(0, 0.001)
+                tape.update_slot(slot, prices[slot], rng.uniform(-3, 3))
+            start = time.perf_counter()
+            tape.flush()
+            flushes += time.perf_counter() - start
+    loaded = sum(chunk.pixmap is not None for chunk in tape.chunks)
+    if args.save:
+        tape.grab().save(args.save)
+    print(f"{args.instruments} instruments, strip {tape.strip_width} px in {len(tape.chunks)} chunks, {loaded} loaded")
+    print(f"frame {frames / args.frames * 1000:.3f} ms, flush of {args.ticks} ticks "
+          f"{flushes / (args.frames / 15) * 1000:.3f} ms")
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
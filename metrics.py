@@ -0,0 +1,194 @@
+import os
+import time
+import resource
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dashlog import get_logger
+from latency import percentile, tracer as latency_tracer
+
+# TCP port on 127.0.0.1 for the Prometheus endpoint, empty/0 disables it
+METRICS_PORT = os.environ.get("DHAN_METRICS_PORT", "9108")
+# Alternatively (or additionally) serve on a Unix socket path
+METRICS_SOCKET = os.environ.get("DHAN_METRICS_SOCKET", "")
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+log = get_logger("metrics")
+
+
+class Summary:
+    """ Sliding window of recent observations exported as Prometheus quantiles """
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self):
+        values = sorted(self.samples)
+        return [(q, percentile(values, q * 100)) for q in QUANTILES]
+
+
+class Metrics:
+    def __init__(self, rate_window=10.0):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.rate_window = rate_window
+        self.message_times = deque()
+        self.messages_total = 0
+        self.decode = Summary()
+        self.frame = Summary()
+        self.ticks_total = 0
+        self.card_updates_total = 0
+        self.connected = False
+        self.connects_total = 0
+        # feed key -> (title, time of its last tick); titles are not unique
+        self.last_tick = {}
+
+    # Hooks called from the MQTT thread and the Qt thread; each is a few
+    # arithmetic operations under a lock so neither side is ever held up
+
+    def message(self, decode_seconds, items):
+        now = time.monotonic()
+        with self.lock:
+            self.messages_total += 1
+            self.ticks_total += items
+            self.message_times.append(now)
+            self.decode.observe(decode_seconds)
+
+    def card_updated(self, key, title):
+        with self.lock:
+            self.card_updates_total += 1
+            self.last_tick[key] = (title, time.time())
+
+    def frame_painted(self, seconds):
+        with self.lock:
+            self.frame.observe(seconds)
+
+    def set_connected(self, connected):
+        with self.lock:
+            if connected and not self.connected:
+                self.connects_total += 1
+            self.connected = connected
+
+    def messages_per_second(self):
+        cutoff = time.monotonic() - self.rate_window
+        while self.message_times and self.message_times[0] < cutoff:
+            self.message_times.popleft()
+        elapsed = min(self.rate_window, time.time() - self.started) or 1.0
+        return len(self.message_times) / elapsed
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {format_value(value)}")
+
+        def summary(name, help_text, quantiles, total, count):
+            metric(name, "summary", help_text, [(f'{{quantile="{q}"}}', v) for q, v in quantiles])
+            lines.append(f"{name}_sum {format_value(total)}")
+            lines.append(f"{name}_count {count}")
+
+        with self.lock:
+            now = time.time()
+            coalescing = self.card_updates_total / self.ticks_total if self.ticks_total else 1.0
+            metric("dhan_mqtt_messages_total", "counter", "MQTT payloads received", [("", self.messages_total)])
+            metric("dhan_mqtt_messages_per_second", "gauge",
+                   f"MQTT payloads per second over the last {self.rate_window:g}s", [("", self.messages_per_second())])
+            summary("dhan_decode_seconds", "Time to decode one MQTT payload",
+                    self.decode.quantiles(), self.decode.total, self.decode.count)
+            metric("dhan_ticks_total", "counter", "Index ticks received", [("", self.ticks_total)])
+            metric("dhan_card_updates_total", "counter", "Card updates applied", [("", self.card_updates_total)])
+            metric("dhan_coalescing_ratio", "gauge", "Card updates applied per tick received", [("", coalescing)])
+            summary("dhan_frame_seconds", "Time to paint one frame of the dashboard window",
+                    self.frame.quantiles(), self.frame.total, self.frame.count)
+            metric("dhan_mqtt_connected", "gauge", "1 while connected to the broker", [("", int(self.connected))])
+            metric("dhan_mqtt_reconnects_total", "counter", "Broker connections after the first",
+                   [("", max(0, self.connects_total - 1))])
+            metric("dhan_tick_staleness_seconds", "gauge", "Seconds since the last tick per index",
+                   [(f'{{key="{escape_label(key)}",index="{escape_label(title)}"}}', now - ts)
+                    for key, (title, ts) in sorted(self.last_tick.items())])
+
+        latency = latency_tracer.summary(pcts=[int(q * 100) for q in QUANTILES]).get("all", {})
+        count, total = latency_tracer.totals()
+        summary("dhan_tick_to_paint_milliseconds", "Receive-to-paint latency",
+                [(q, latency.get(f"p{int(q * 100)}", 0.0)) for q in QUANTILES], total, count)
+        metric("process_resident_memory_bytes", "gauge", "Resident set size", [("", rss_bytes())])
+        return "\n".join(lines) + "\n"
+
+
+def format_value(value):
+    # Counters stay exact integers; repr gives floats full precision
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in KiB on Linux, the best we have elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Process wide registry fed by the dashboard
+metrics = Metrics()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixMetricsServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def start_metrics_server(port=METRICS_PORT, socket_path=METRICS_SOCKET):
+    servers = []
+    try:
+        if port and int(port):
+            servers.append(ThreadingHTTPServer(("127.0.0.1", int(port)), MetricsHandler))
+            log.info("Serving metrics on http://127.0.0.1:%s/metrics", port)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            servers.append(UnixMetricsServer(socket_path, MetricsHandler))
+            log.info("Serving metrics on unix:%s", socket_path)
+    except (OSError, ValueError) as e:
+        log.error("Failed to start metrics endpoint: %s", e)
+
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return servers
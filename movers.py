@@ -0,0 +1,261 @@
+import sys
+import time
+import random
+import argparse
+from bisect import bisect_left, insort
+
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath
+from PyQt5.QtCore import Qt, QPoint, QRectF, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal
+
+# Rows per column, sized for the 640 px card area
+ROWS = 6
+ROW_HEIGHT = 84
+ROW_SPACING = 12
+MAX_ROW_WIDTH = 640
+# Re-ranked rows glide to their new place instead of jumping
+MOVE_DURATION = 350
+# Ticks only mark the view dirty, the on-screen order is refreshed at most this often
+RELAYOUT_INTERVAL = 500
+
+
+class RankedOrder:
+    """ Slots kept sorted by p_ch, highest first
+
+    update() finds the old and new positions by binary search; the list shift
+    that follows is a C memmove, a few microseconds even at 5,000 slots.
+    """
+
+    def __init__(self, count):
+        # Current sort key (-p_ch, slot) per slot, None until the first tick
+        self.keys = [None] * count
+        self.order = []
+
+    def update(self, slot, p_ch):
+        new = (-p_ch, slot)
+        old = self.keys[slot]
+        if old == new:
+            return False
+        if old is not None:
+            del self.order[bisect_left(self.order, old)]
+        insort(self.order, new)
+        self.keys[slot] = new
+        return True
+
+    def rank(self, slot):
+        key = self.keys[slot]
+        return None if key is None else bisect_left(self.order, key)
+
+    def top(self, n):
+        return [slot for _, slot in self.order[:n]]
+
+    def bottom(self, n):
+        # Biggest losers first
+        return [slot for _, slot in reversed(self.order[-n:])] if n else []
+
+
+class MoverRow(QWidget):
+    """ One ranked instrument, painted directly so updates never rebuild widgets """
+
+    def __init__(self, width, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(width, ROW_HEIGHT)
+        self.slot = None
+        self.title = ""
+        self.value = ""
+        self.change = ""
+        self.positive = True
+        self.animation = QPropertyAnimation(self, b"pos", self)
+        self.animation.setDuration(MOVE_DURATION)
+        self.animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+
+    def set_data(self, title, ltp, p_ch):
+        value = f"₹ {ltp:,.2f}"
+        change = f"{p_ch:+.2f}%"
+        if (title, value, change) != (self.title, self.value, self.change):
+            self.title, self.value, self.change = title, value, change
+            self.positive = p_ch >= 0
+            self.update()
+
+    def move_to(self, target, animate=True):
+        if self.animation.state() == QPropertyAnimation.State.Running:
+            if self.animation.endValue() == target:
+                return
+            self.animation.stop()
+        if not animate or self.pos() == target:
+            self.move(target)
+            return
+        self.animation.setStartValue(self.pos())
+        self.animation.setEndValue(target)
+        self.animation.start()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(self.rect()), 15, 15)
+        painter.fillPath(path, QColor(40, 50, 80, 128))
+
+        # Title and change on top, price underneath; long titles are elided rather than overlap the change
+        top = self.rect().adjusted(24, 8, -24, -self.height() // 2)
+        bottom = self.rect().adjusted(24, self.height() // 2, -24, -8)
+        painter.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        metrics = painter.fontMetrics()
+        room = top.width() - metrics.horizontalAdvance(self.change) - 16
+        painter.setPen(QColor("white"))
+        painter.drawText(top, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         metrics.elidedText(self.title, Qt.TextElideMode.ElideRight, room))
+        painter.setPen(QColor("green") if self.positive else QColor("red"))
+        painter.drawText(top, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, self.change)
+        painter.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
+        painter.setPen(QColor("white"))
+        painter.drawText(bottom, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, self.value)
+
+
+class MoverColumn(QWidget):
+    """ Fixed pool of rows; a re-rank only moves rows and swaps the data of the ones that changed hands """
+
+    def __init__(self, heading, row_width, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(10)
+        heading_label = QLabel(heading)
+        heading_label.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
+        heading_label.setStyleSheet("color: white;")
+        layout.addWidget(heading_label)
+
+        # Rows are positioned by hand inside the area so they can be animated
+        self.area = QWidget()
+        self.area.setFixedSize(row_width, ROWS * (ROW_HEIGHT + ROW_SPACING))
+        layout.addWidget(self.area)
+        layout.addStretch()
+        self.rows = [MoverRow(row_width, self.area) for _ in range(ROWS)]
+        for i, row in enumerate(self.rows):
+            row.move(self.position(i))
+            row.hide()
+
+    @staticmethod
+    def position(rank):
+        return QPoint(0, rank * (ROW_HEIGHT + ROW_SPACING))
+
+    def show_slots(self, slots, titles, ltp, p_ch, animate):
+        by_slot = {row.slot: row for row in self.rows if row.slot is not None}
+        wanted = set(slots)
+        free = [row for row in self.rows if row.slot not in wanted]
+        for rank, slot in enumerate(slots):
+            row = by_slot.get(slot)
+            if row is None:
+                # Newcomers enter from just below the column
+                row = free.pop()
+                row.slot = slot
+                row.move(self.position(ROWS))
+                row.show()
+            row.set_data(titles[slot], ltp[slot], p_ch[slot])
+            row.move_to(self.position(rank), animate)
+        for row in free:
+            row.slot = None
+            row.hide()
+
+
+class MoversView(QWidget):
+    """ Live gainers and losers by p_ch, re-ranked incrementally as ticks arrive """
+
+    view_toggle_requested = pyqtSignal()
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        count = len(catalog)
+        self.ltp = [0.0] * count
+        self.p_ch = [0.0] * count
+        self.order = RankedOrder(count)
+        self.dirty = False
+        self.press_pos = None
+
+        # Same footprint as the card pages: 680 px tall, 100 px clear on the right
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(40, 20, 140, 50)
+        layout.setSpacing(60)
+        screen_width = QApplication.primaryScreen().size().width()
+        row_width = max(200, min(MAX_ROW_WIDTH, (screen_width - 240) // 2))
+        self.gainers = MoverColumn("Top gainers", row_width)
+        self.losers = MoverColumn("Top losers", row_width)
+        layout.addWidget(self.gainers, 0, Qt.AlignmentFlag.AlignTop)
+        layout.addWidget(self.losers, 0, Qt.AlignmentFlag.AlignTop)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFixedHeight(680)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(RELAYOUT_INTERVAL)
+        self.timer.timeout.connect(self.relayout)
+
+    def bind(self, dispatch):
+        self.catalog.bind_slots(self.update_slot, dispatch)
+
+    def update_slot(self, slot, ltp, p_ch, rx_ts=None, stale=False):
+        # O(log n) search per tick, the widgets catch up on the next relayout
+        self.ltp[slot] = ltp
+        self.p_ch[slot] = p_ch
+        self.order.update(slot, p_ch)
+        self.dirty = True
+
+    def relayout(self, animate=True):
+        if not self.dirty:
+            return
+        self.dirty = False
+        # Fewer than two full columns of instruments: every one shows once
+        gainers = self.order.top(ROWS)
+        losers = [slot for slot in self.order.bottom(ROWS) if slot not in gainers]
+        self.gainers.show_slots(gainers, self.catalog.titles, self.ltp, self.p_ch, animate)
+        self.losers.show_slots(losers, self.catalog.titles, self.ltp, self.p_ch, animate)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.dirty = True
+        self.relayout(animate=False)
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def mousePressEvent(self, event):
+        self.press_pos = event.pos()
+
+    def mouseReleaseEvent(self, event):
+        if self.press_pos is not None:
+            delta = event.pos() - self.press_pos
+            if abs(delta.y()) > 120 and abs(delta.y()) > abs(delta.x()):
+                self.view_toggle_requested.emit()
+        self.press_pos = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-ranking cost of the top movers order")
+    parser.add_argument("--instruments", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    order = RankedOrder(args.instruments)
+    for slot in range(args.instruments):
+        order.update(slot, rng.uniform(-5, 5))
+    ticks = [(rng.randrange(args.instruments), round(rng.uniform(-5, 5), 2)) for _ in range(args.updates)]
+
+    start = time.perf_counter()
+    for slot, p_ch in ticks:
+        order.update(slot, p_ch)
+    elapsed = time.perf_counter() - start
+    top = order.top(ROWS)
+    assert all(order.keys[a] <= order.keys[b] for a, b in zip(top, top[1:]))
+
+    per_update = elapsed / args.updates * 1e6
+    print(f"{args.instruments} instruments: {per_update:.2f} us per update, "
+          f"{args.updates / elapsed:,.0f} updates/s, 5,000 updates/s costs {per_update * 5000 / 1000:.1f} ms per second")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
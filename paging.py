@@ -0,0 +1,113 @@
+import os
+from collections import namedtuple
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtCore import Qt, QRectF
+
+from dashlog import get_logger
+
+# "COLSxROWS" forces the card grid, otherwise it is fitted to the screen
+LAYOUT_OVERRIDE = os.environ.get("DHAN_LAYOUT", "")
+
+log = get_logger("paging")
+
+
+class LayoutProfile(namedtuple("LayoutProfile", "columns rows card_width card_height h_spacing v_spacing")):
+    __slots__ = ()
+
+    @property
+    def per_page(self):
+        return self.columns * self.rows
+
+
+def layout_for_screen(width, height, card_width=470, card_height=270, h_spacing=50, v_spacing=40,
+                      max_columns=3, max_rows=2, override=LAYOUT_OVERRIDE):
+    """ Largest grid of fixed-size cards (capped at max_columns x max_rows) that fits width x height """
+    columns = max(1, min(max_columns, (width + h_spacing) // (card_width + h_spacing)))
+    rows = max(1, min(max_rows, (height + v_spacing) // (card_height + v_spacing)))
+    if override:
+        try:
+            forced_columns, forced_rows = (int(part) for part in override.lower().split("x"))
+            if forced_columns < 1 or forced_rows < 1:
+                raise ValueError(override)
+            columns, rows = forced_columns, forced_rows
+        except ValueError:
+            log.error("Ignoring DHAN_LAYOUT=%s, expected COLSxROWS of at least 1x1", override)
+    return LayoutProfile(columns, rows, card_width, card_height, h_spacing, v_spacing)
+
+
+class Pager:
+    """ Slot <-> page arithmetic for `count` items; every query is O(1) """
+
+    def __init__(self, count, per_page):
+        self.count = count
+        self.per_page = max(1, per_page)
+
+    @property
+    def page_count(self):
+        return max(1, (self.count + self.per_page - 1) // self.per_page)
+
+    def page_of(self, slot):
+        return slot // self.per_page
+
+    def slots(self, page):
+        start = page * self.per_page
+        return range(start, min(start + self.per_page, self.count))
+
+    def clamp(self, page):
+        return min(max(page, 0), self.page_count - 1)
+
+
+class PageIndicator(QWidget):
+    """ Windowed dot strip painted by one widget
+
+    At most max_dots dots are shown around the current page; the outermost
+    dots shrink when more pages lie beyond them.
+    """
+
+    def __init__(self, page_count=1, max_dots=9, dot_size=12, spacing=15, parent=None):
+        super().__init__(parent)
+        self.page_count = page_count
+        self.current = 0
+        self.max_dots = max_dots
+        self.dot_size = dot_size
+        self.spacing = spacing
+        self.setFixedHeight(dot_size + 8)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+    def set_page_count(self, page_count):
+        self.page_count = max(1, page_count)
+        self.current = min(self.current, self.page_count - 1)
+        self.update()
+
+    def set_current(self, page):
+        if page != self.current:
+            self.current = page
+            self.update()
+
+    def window(self):
+        # First page shown and number of dots, keeping the current page centred where possible
+        shown = min(self.page_count, self.max_dots)
+        first = min(max(self.current - shown // 2, 0), self.page_count - shown)
+        return first, shown
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        first, shown = self.window()
+        step = self.dot_size + self.spacing
+        x = (self.width() - (shown * step - self.spacing)) / 2
+        centre_y = self.height() / 2
+        for i in range(shown):
+            page = first + i
+            size = self.dot_size
+            # Smaller end dots hint at pages outside the window
+            if (i == 0 and first > 0) or (i == shown - 1 and page < self.page_count - 1):
+                size = self.dot_size / 2
+            alpha = 0.9 if page == self.current else 0.3
+            painter.setBrush(QColor(255, 255, 255, int(255 * alpha)))
+            centre_x = x + i * step + self.dot_size / 2
+            painter.drawEllipse(QRectF(centre_x - size / 2, centre_y - size / 2, size, size))
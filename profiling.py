@@ -0,0 +1,319 @@
+import io
+import os
+import sys
+import time
+import socket
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import socketserver
+from collections import Counter, deque
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from dashlog import get_logger
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "dhan")
+# Where finished profiling windows are written
+PROFILE_DIR = os.environ.get("DHAN_PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+# DHAN_PROFILE=cprofile|sample|tracemalloc[:seconds] profiles from startup
+PROFILE_AT_START = os.environ.get("DHAN_PROFILE", "")
+# Unix socket accepting "cprofile 30", "sample", "tracemalloc 60", "stop" and "status" lines
+PROFILE_SOCKET = os.environ.get("DHAN_PROFILE_SOCKET", "")
+PROFILE_SECONDS = float(os.environ.get("DHAN_PROFILE_SECONDS", "30"))
+SAMPLE_INTERVAL = float(os.environ.get("DHAN_PROFILE_SAMPLE_MS", "5")) / 1000
+# Windows are bounded so a forgotten profile cannot eat the SD card or slow the kiosk for good
+MAX_SECONDS = 600
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 10
+
+KINDS = ("cprofile", "sample", "tracemalloc")
+
+# What the UI was doing, counted per window and used as the root frame of samples
+SWIPE = "swipe"
+SCROLL = "scroll"
+TICK_BURST = "tick-burst"
+STARTUP = "startup"
+IDLE = "idle"
+# An activity colours the samples taken up to this long after it was noted
+ACTIVITY_HOLD = 1.0
+# Payloads within one second that count as a burst (the live feed sends one every ~2 s)
+BURST_PAYLOADS = 3
+
+log = get_logger("profiling")
+
+
+class StackSampler:
+    """ Samples the main thread's stack from a helper thread into folded-stack counts """
+
+    def __init__(self, thread_id, interval, activity):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Returns the current activity tag, read without locking
+        self.activity = activity
+        self.counts = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=2)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(self.activity())
+            self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, f):
+        # Brendan Gregg's folded format, flamegraph.pl / speedscope read it directly
+        for stack, count in self.counts.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class ProfileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ProfileCommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(256).decode("utf-8", "replace").strip()
+        reply = self.server.profiler.command_received(line)
+        self.wfile.write((reply + "\n").encode("utf-8"))
+
+
+class Profiler(QObject):
+    """ One bounded profiling window at a time, tagged with what the UI was doing during it """
+
+    # Socket commands arrive on a server thread, profiling has to start on the GUI thread
+    requested = pyqtSignal(str, float)
+
+    def __init__(self, parent=None, directory=PROFILE_DIR, socket_path=PROFILE_SOCKET):
+        super().__init__(parent)
+        self.directory = directory
+        self.kind = None
+        self.started = None
+        self.started_at = None
+        self.activities = Counter()
+        self.last_activity = IDLE
+        self.last_activity_ts = 0.0
+        self.payload_times = deque(maxlen=BURST_PAYLOADS)
+        self.profile = None
+        self.sampler = None
+        self.tracemalloc_start = None
+        self.owns_tracemalloc = False
+        self.last_output = None
+        self.server = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.stop)
+        self.requested.connect(self.handle_request)
+
+        if socket_path:
+            self.start_server(socket_path)
+        if PROFILE_AT_START:
+            kind, _, seconds = PROFILE_AT_START.partition(":")
+            try:
+                self.start(kind.strip().lower(), float(seconds) if seconds else PROFILE_SECONDS)
+                self.note(STARTUP)
+            except ValueError as e:
+                log.error("Ignoring DHAN_PROFILE=%s: %s", PROFILE_AT_START, e)
+
+    @property
+    def active(self):
+        return self.kind is not None
+
+    def note(self, activity):
+        # Cheap enough for the hot path, nothing is recorded outside a window
+        if self.kind is None:
+            return
+        self.activities[activity] += 1
+        self.last_activity = activity
+        self.last_activity_ts = time.monotonic()
+
+    def note_payload(self):
+        if self.kind is None:
+            return
+        now = time.monotonic()
+        self.payload_times.append(now)
+        if len(self.payload_times) == BURST_PAYLOADS and now - self.payload_times[0] <= 1.0:
+            self.note(TICK_BURST)
+
+    def current_activity(self):
+        if time.monotonic() - self.last_activity_ts <= ACTIVITY_HOLD:
+            return self.last_activity
+        return IDLE
+
+    def start(self, kind, seconds=PROFILE_SECONDS):
+        if kind not in KINDS:
+            raise ValueError(f"unknown profile kind {kind!r}, expected one of {', '.join(KINDS)}")
+        if self.kind is not None:
+            raise ValueError(f"{self.kind} window already running")
+        seconds = min(max(seconds, 1.0), MAX_SECONDS)
+
+        self.activities = Counter()
+        self.last_activity = IDLE
+        self.last_activity_ts = 0.0
+        self.payload_times.clear()
+        if kind == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif kind == "sample":
+            self.sampler = StackSampler(threading.get_ident(), SAMPLE_INTERVAL, self.current_activity)
+            self.sampler.start()
+        else:
+            # Leave tracing on if it was enabled outside us (PYTHONTRACEMALLOC)
+            self.owns_tracemalloc = not tracemalloc.is_tracing()
+            if self.owns_tracemalloc:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.tracemalloc_start = tracemalloc.take_snapshot()
+
+        self.kind = kind
+        self.started = time.monotonic()
+        self.started_at = time.localtime()
+        self.timer.start(int(seconds * 1000))
+        log.info("Started %s profile for %.0fs", kind, seconds)
+
+    def stop(self):
+        if self.kind is None:
+            return None
+        self.timer.stop()
+        kind = self.kind
+        self.kind = None
+        duration = time.monotonic() - self.started
+
+        if kind == "cprofile":
+            self.profile.disable()
+        elif kind == "sample":
+            self.sampler.stop()
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            if self.owns_tracemalloc:
+                tracemalloc.stop()
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, self.output_name(kind))
+            if kind == "cprofile":
+                self.profile.dump_stats(base + ".prof")
+                path = base + ".txt"
+                with open(path, "w", encoding="utf-8") as f:
+                    self.write_header(f, kind, duration)
+                    stream = io.StringIO()
+                    pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(60)
+                    f.write(stream.getvalue())
+            elif kind == "sample":
+                path = base + ".folded"
+                with open(path, "w", encoding="utf-8") as f:
+                    self.sampler.write(f)
+                with open(base + ".txt", "w", encoding="utf-8") as f:
+                    self.write_header(f, kind, duration)
+                    f.write(f"{self.sampler.samples} samples every {SAMPLE_INTERVAL * 1000:.0f} ms, "
+                            f"stacks in {os.path.basename(path)}\n")
+            else:
+                path = base + ".txt"
+                with open(path, "w", encoding="utf-8") as f:
+                    self.write_header(f, kind, duration)
+                    for stat in snapshot.compare_to(self.tracemalloc_start, "lineno")[:40]:
+                        f.write(f"{stat}\n")
+        except OSError as e:
+            log.error("Failed to write %s profile: %s", kind, e)
+            path = None
+        finally:
+            self.profile = None
+            self.sampler = None
+            self.tracemalloc_start = None
+
+        self.last_output = path
+        log.info("Wrote %s profile (%.1fs, %s) to %s", kind, duration, self.activity_summary(), path)
+        return path
+
+    def output_name(self, kind):
+        stamp = time.strftime("%Y%m%d-%H%M%S", self.started_at)
+        tags = "+".join(tag for tag, _ in self.activities.most_common(3)) or IDLE
+        return f"profile-{stamp}-{kind}-{tags}"
+
+    def activity_summary(self):
+        return ", ".join(f"{tag} x{count}" for tag, count in self.activities.most_common()) or IDLE
+
+    def write_header(self, f, kind, duration):
+        f.write(f"# {kind} profile started {time.strftime('%Y-%m-%d %H:%M:%S', self.started_at)}, "
+                f"{duration:.1f}s\n")
+        f.write(f"# activity: {self.activity_summary()}\n\n")
+
+    def handle_request(self, command, seconds):
+        try:
+            if command == "stop":
+                self.stop()
+            else:
+                self.start(command, seconds)
+        except ValueError as e:
+            log.warning("Profile request refused: %s", e)
+
+    def command_received(self, line):
+        # Runs on a socket thread: validate, reply, and leave the work to the GUI thread
+        words = line.split()
+        if not words:
+            return "error: empty command"
+        command = words[0].lower()
+        if command == "status":
+            if self.kind is None:
+                return f"idle, last output {self.last_output or 'none'}"
+            return f"{self.kind} running for {time.monotonic() - self.started:.0f}s, activity: {self.activity_summary()}"
+        if command == "stop":
+            self.requested.emit("stop", 0.0)
+            return "stopping"
+        if command not in KINDS:
+            return f"error: expected one of {', '.join(KINDS + ('stop', 'status'))}"
+        try:
+            seconds = float(words[1]) if len(words) > 1 else PROFILE_SECONDS
+        except ValueError:
+            return f"error: bad duration {words[1]!r}"
+        self.requested.emit(command, seconds)
+        return f"starting {command} for {min(max(seconds, 1.0), MAX_SECONDS):.0f}s, output in {self.directory}"
+
+    def start_server(self, socket_path):
+        try:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.server = ProfileServer(socket_path, ProfileCommandHandler)
+        except OSError as e:
+            log.error("Failed to open profile socket %s: %s", socket_path, e)
+            return
+        self.server.profiler = self
+        threading.Thread(target=self.server.serve_forever, name="profile-socket", daemon=True).start()
+        log.info("Accepting profile commands on unix:%s", socket_path)
+
+    def close(self):
+        self.stop()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def send_command(socket_path, command):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((command + "\n").encode("utf-8"))
+        return sock.makefile("r", encoding="utf-8").readline().strip()
+
+
+if __name__ == "__main__":
+    # python profiling.py SOCKET cprofile 30
+    if len(sys.argv) < 3:
+        print("usage: profiling.py SOCKET cprofile|sample|tracemalloc [seconds] | stop | status")
+        sys.exit(2)
+    print(send_command(sys.argv[1], " ".join(sys.argv[2:])))
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+
+from journal import iter_journal, MAGIC, SUFFIX, TickRecord
+
+STOCKDOCK_CONFIG_TOPIC = "stockdock/screen/nse-indices"
+# Spacing for JSONL lines without a timestamp, matches the live 2 s update cadence
+DEFAULT_GAP = 2.0
+
+
+def is_journal(path):
+    if os.path.isdir(path) or path.endswith(SUFFIX):
+        return True
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def iter_jsonl(path, gap=DEFAULT_GAP):
+    # Each line is a payload list, or {"ts": seconds, "topic": ..., "payload": list}
+    ts_ns = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            topic = STOCKDOCK_CONFIG_TOPIC
+            if isinstance(entry, dict):
+                topic = entry.get("topic", topic)
+                ts_ns = int(entry["ts"] * 1e9) if "ts" in entry else ts_ns + int(gap * 1e9)
+                entry = entry.get("payload", [])
+            else:
+                ts_ns += int(gap * 1e9)
+            yield TickRecord(ts_ns, topic, json.dumps(entry).encode("utf-8"))
+
+
+def iter_records(path, gap=DEFAULT_GAP):
+    return iter_journal(path) if is_journal(path) else iter_jsonl(path, gap)
+
+
+class Replayer:
+    """ Plays records at their recorded pace scaled by speed, speed 0 means as fast as possible
+
+    loops=0 repeats the file until stopped, or until a pass plays nothing.
+    """
+
+    def __init__(self, path, speed=1.0, loops=1, topic=None, gap=DEFAULT_GAP):
+        self.path = path
+        self.speed = speed
+        self.loops = loops
+        self.topic = topic
+        self.gap = gap
+        self.stopped = threading.Event()
+        self.payloads = 0
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, sink):
+        # sink(topic, payload_bytes) is called from the calling thread, in recorded order
+        for _ in (itertools.count() if self.loops == 0 else range(self.loops)):
+            start = None
+            first_ts = None
+            played = self.payloads
+            for record in iter_records(self.path, self.gap):
+                if self.stopped.is_set():
+                    return
+                if self.topic and record.topic != self.topic:
+                    continue
+                if self.speed > 0:
+                    if start is None:
+                        start, first_ts = time.perf_counter(), record.ts_ns
+                    due = start + (record.ts_ns - first_ts) / 1e9 / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0 and self.stopped.wait(delay):
+                        return
+                sink(record.topic, record.payload)
+                self.payloads += 1
+            if self.payloads == played:
+                # Empty file or no record on the topic: looping again would only spin
+                return
+
+
+def publish_to_broker(replayer, broker):
+    import paho.mqtt.client as mqtt
+
+    host, port = broker.rsplit(":", 1)
+    publisher = mqtt.Client(client_id="dhan-replay", clean_session=True)
+    publisher.connect(host, int(port), 60)
+    publisher.loop_start()
+    try:
+        replayer.run(lambda topic, payload: publisher.publish(topic, payload).wait_for_publish())
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+
+
+def run_in_process(replayer, headless):
+    if headless:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    import dashboard
+    from datasource import ThreadedSource
+
+    dashboard.setup_logging()
+    app = QApplication(sys.argv[:1])
+    client = ThreadedSource(replayer)
+    window = dashboard.GlassmorphicUI(data_source=client)
+
+    def poll():
+        if client.finished.is_set():
+            QTimer.singleShot(200, app.quit)
+        else:
+            QTimer.singleShot(50, poll)
+
+    poll()
+    app.exec()
+    client.disconnect()
+    return dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded payloads into the dashboard")
+    parser.add_argument("path", help="tick journal (file or directory) or JSONL payload file")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster, 0 = as fast as possible")
+    parser.add_argument("--loops", type=int, default=1, help="0 repeats until interrupted")
+    parser.add_argument("--topic", help="only replay this topic")
+    parser.add_argument("--gap", type=float, default=DEFAULT_GAP, help="seconds between JSONL lines without timestamps")
+    parser.add_argument("--broker", help="publish to a local broker (host:port) instead of running the UI")
+    parser.add_argument("--headless", action="store_true", help="render offscreen")
+    args = parser.parse_args()
+
+    replayer = Replayer(args.path, args.speed, args.loops, args.topic, args.gap)
+    start = time.perf_counter()
+    if args.broker:
+        publish_to_broker(replayer, args.broker)
+        elapsed = time.perf_counter() - start
+        print(f"Published {replayer.payloads} payloads in {elapsed:.2f}s")
+        return 0
+
+    dashboard = run_in_process(replayer, args.headless)
+    elapsed = time.perf_counter() - start
+    registry = dashboard.metrics
+    frame = dict(registry.frame.quantiles())
+    latency = dashboard.latency_tracer.summary().get("all", {})
+    print(f"Replayed {replayer.payloads} payloads ({registry.ticks_total} ticks) in {elapsed:.2f}s: "
+          f"{replayer.payloads / elapsed:.1f} payloads/s, {registry.ticks_total / elapsed:.0f} ticks/s")
+    print(f"frame p50={frame[0.5] * 1000:.2f} p99={frame[0.99] * 1000:.2f} ms over {registry.frame.count} frames, "
+          f"tick-to-paint p50={latency.get('p50', 0):.2f} p95={latency.get('p95', 0):.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import socket
+
+from PyQt5.QtCore import QObject, QTimer
+
+from dashlog import get_logger
+
+# Without fresh MQTT data for this long while connected the dashboard stops feeding the watchdog;
+# 0 (the default) disables the check, since the feed is legitimately silent outside market hours
+MESSAGE_STALE_SEC = float(os.environ.get("DHAN_WATCHDOG_MESSAGE_STALE", "0"))
+# Without a painted frame for this long the dashboard stops feeding the watchdog
+FRAME_STALE_SEC = float(os.environ.get("DHAN_WATCHDOG_FRAME_STALE", "10"))
+
+log = get_logger("sdnotify")
+
+
+def notify(state, socket_path=None):
+    """ Send a sd_notify(3) datagram such as "READY=1" or "WATCHDOG=1" """
+    path = socket_path or os.environ.get("NOTIFY_SOCKET")
+    if not path:
+        return False
+    if path.startswith("@"):
+        # Abstract namespace socket
+        path = "\0" + path[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.connect(path)
+            sock.sendall(state.encode("utf-8"))
+        return True
+    except OSError as e:
+        log.warning("sd_notify failed: %s", e)
+        return False
+
+
+def watchdog_interval():
+    """ WatchdogSec= of the unit in seconds, or None when not supervised """
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and pid != str(os.getpid())):
+        return None
+    try:
+        return int(usec) / 1_000_000
+    except ValueError:
+        return None
+
+
+class Watchdog(QObject):
+    """ READY=1 after the first frame, WATCHDOG=1 only while frames and messages keep flowing """
+
+    def __init__(self, request_frame=None, connected=None, parent=None):
+        super().__init__(parent)
+        # Called when no frame was painted recently, so an idle but healthy UI can prove itself
+        self.request_frame = request_frame
+        # Messages are only expected while this returns True; None expects them always
+        self.connected = connected
+        self.ready = False
+        self.last_frame = None
+        self.last_message = None
+        self.interval = watchdog_interval()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        if self.interval:
+            # Ping at half the deadline as sd_watchdog_enabled(3) recommends
+            self.timer.start(max(100, int(self.interval * 500)))
+
+    def frame_painted(self):
+        self.last_frame = time.monotonic()
+        if not self.ready:
+            self.ready = True
+            # Messages are only expected from here on
+            self.last_message = self.last_frame
+            notify("READY=1\nSTATUS=First frame painted")
+
+    def message_processed(self):
+        self.last_message = time.monotonic()
+
+    def stopping(self):
+        self.timer.stop()
+        notify("STOPPING=1")
+
+    def check(self):
+        if not self.ready:
+            return
+        now = time.monotonic()
+        if not MESSAGE_STALE_SEC or (self.connected is not None and not self.connected()):
+            # Check disabled, or the source is down and reconnecting by itself; silence counts from when it is back
+            self.last_message = now
+        frame_age = now - self.last_frame
+        message_age = now - self.last_message
+
+        if frame_age <= FRAME_STALE_SEC and message_age <= MESSAGE_STALE_SEC:
+            notify("WATCHDOG=1")
+        elif message_age > MESSAGE_STALE_SEC:
+            notify(f"STATUS=No MQTT data for {message_age:.0f}s")
+            log.warning("Withholding watchdog ping, no MQTT data for %.0fs", message_age)
+
+        # Nothing changed on screen lately, ask for a frame so the next check can see one
+        if frame_age > self.interval / 2 and self.request_frame is not None:
+            self.request_frame()
+
+
+def listen(path):
+    # Stand-in for systemd's notify socket: NOTIFY_SOCKET=<path> WATCHDOG_USEC=...
+    if os.path.exists(path):
+        os.unlink(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind(path)
+        print(f"Listening for sd_notify messages on {path}")
+        try:
+            while True:
+                data = sock.recv(4096).decode("utf-8", "replace")
+                print(f"{time.strftime('%H:%M:%S')} {data!r}", flush=True)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    listen(sys.argv[1] if len(sys.argv) > 1 else "/tmp/dhan-notify.sock")
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import threading
+
+from dashlog import get_logger
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "dhan")
+SNAPSHOT_PATH = os.environ.get("DHAN_SNAPSHOT", os.path.join(CACHE_DIR, "snapshot.json"))
+# Minimum seconds between two writes, keeps SD card wear bounded
+SNAPSHOT_INTERVAL = float(os.environ.get("DHAN_SNAPSHOT_INTERVAL", "10"))
+
+log = get_logger("snapshot")
+
+
+class SnapshotStore:
+    """ Last known ltp/p_ch per feed key, written atomically at a throttled rate
+
+    With path=None the store is disabled: nothing is loaded or written.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.ticks = {}
+        self.dirty = False
+        self.last_write = 0.0
+        self.writer = None
+
+    def load(self):
+        # {key: (ltp, p_ch, ts)} from the previous run, empty if missing or corrupt
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.ticks = {key: tuple(tick) for key, tick in data.get("ticks", {}).items()}
+            log.info("Loaded %d last known ticks saved at %s", len(self.ticks),
+                     time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data.get("saved_at", 0))))
+        except FileNotFoundError:
+            self.ticks = {}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            log.warning("Ignoring unreadable snapshot %s: %s", self.path, e)
+            self.ticks = {}
+        return dict(self.ticks)
+
+    def update(self, key, ltp, p_ch):
+        self.ticks[key] = (ltp, p_ch, time.time())
+        self.dirty = True
+
+    def save_if_due(self, force=False):
+        now = time.monotonic()
+        if self.path is None or not self.dirty or (not force and now - self.last_write < self.interval):
+            return False
+        if self.writer is not None and self.writer.is_alive():
+            # Previous write still on its way to the SD card, try again next time
+            return False
+        data = {"saved_at": time.time(), "ticks": dict(self.ticks)}
+        self.dirty = False
+        self.last_write = now
+        self.writer = threading.Thread(target=self.write, args=(data,), name="snapshot", daemon=True)
+        self.writer.start()
+        return True
+
+    def write(self, data):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            # Readers only ever see the old or the new complete file
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Failed to write snapshot %s: %s", self.path, e)
+            self.dirty = True
+
+    def close(self):
+        # A write still in flight would make the forced save skip the latest ticks
+        if self.writer is not None:
+            self.writer.join(timeout=2)
+        self.save_if_due(force=True)
+        if self.writer is not None:
+            self.writer.join(timeout=2)
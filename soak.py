@@ -0,0 +1,171 @@
+import gc
+import os
+import sys
+import csv
+import time
+import inspect
+import tempfile
+import argparse
+import importlib.util
+from collections import Counter
+from importlib.machinery import SourceFileLoader
+
+from latency import percentile
+from metrics import rss_bytes
+
+# One NSE cash session, 09:15 to 15:30
+SESSION_SECONDS = 6.25 * 3600
+
+
+def load_variant(path):
+    # Variant scripts are plain files (one is even named "bothlcd,py"), load them by path
+    name = "soak_" + "".join(c if c.isalnum() else "_" for c in os.path.basename(path))
+    loader = SourceFileLoader(name, path)
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def linear_slope(xs, ys):
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+def count_types(top=None):
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return counts.most_common(top) if top else counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-run soak test against a compressed simulated feed")
+    parser.add_argument("variant", nargs="?", default="dashboard.py", help="dashboard script to soak")
+    parser.add_argument("--days", type=float, default=1.0, help="simulated trading sessions")
+    parser.add_argument("--compress", type=float, default=60.0, help="simulated seconds per wall second")
+    parser.add_argument("--instruments", type=int, default=54)
+    parser.add_argument("--rate", type=float, default=0.5, help="payloads per simulated second")
+    parser.add_argument("--sample", type=float, default=5.0, help="wall seconds between samples")
+    parser.add_argument("--warmup", type=float, default=0.1, help="fraction of samples ignored for slopes")
+    parser.add_argument("--max-rss-slope", type=float, default=8.0, help="MiB per simulated hour")
+    parser.add_argument("--max-frame-slope", type=float, default=1.0, help="p95 frame ms per simulated hour")
+    parser.add_argument("--csv", help="write samples to this CSV file")
+    parser.add_argument("--visible", action="store_true", help="render on screen instead of offscreen")
+    args = parser.parse_args()
+
+    if not args.visible:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("DHAN_METRICS_PORT", "0")
+    # Never the user's snapshot, and never a device path: writes go through a .tmp and os.replace
+    os.environ.setdefault("DHAN_SNAPSHOT", os.path.join(tempfile.mkdtemp(prefix="dhan-soak-"), "snapshot.json"))
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from datasource import ThreadedSource, SimulationPlayer
+    from feedgen import SyntheticFeed
+    from dashlog import setup_logging
+
+    frame_times = []
+    window = None
+
+    class SoakApplication(QApplication):
+        # Times every top-level UpdateRequest, which works for any variant without hooks
+        def notify(self, receiver, event):
+            if window is not None and receiver is window and event.type() == QEvent.UpdateRequest:
+                start = time.perf_counter()
+                result = super().notify(receiver, event)
+                frame_times.append(time.perf_counter() - start)
+                return result
+            return super().notify(receiver, event)
+
+    setup_logging()
+    app = SoakApplication(sys.argv[:1])
+    module = load_variant(args.variant)
+    if hasattr(module, "BROKER_URL"):
+        # Older variants always dial the broker; keep them off the network
+        module.BROKER_URL = "mqtts://127.0.0.1"
+
+    simulated = args.days * SESSION_SECONDS
+    feed = SyntheticFeed(args.instruments, args.rate, duration=simulated, session=SESSION_SECONDS)
+    source = ThreadedSource(SimulationPlayer(feed, args.compress))
+    if "data_source" in inspect.signature(module.GlassmorphicUI.__init__).parameters:
+        window = module.GlassmorphicUI(data_source=source)
+    else:
+        window = module.GlassmorphicUI()
+        source.data_received.connect(window.handle_mqtt_data)
+        QTimer.singleShot(1000, source.connect)
+
+    samples = []
+    baseline_types = count_types()
+    start = time.perf_counter()
+    writer = None
+    csv_file = None
+    if args.csv:
+        csv_file = open(args.csv, "w", newline="")
+        writer = csv.writer(csv_file)
+        writer.writerow(["wall_s", "sim_h", "rss_mib", "py_objects", "qobjects", "frames",
+                         "frame_p50_ms", "frame_p95_ms", "frame_p99_ms"])
+
+    def sample():
+        if source.finished.is_set():
+            # The tail after the feed ran dry is idle time, not part of the soak
+            app.quit()
+            return
+        frames = sorted(frame_times)
+        frame_times.clear()
+        gc.collect()
+        elapsed = time.perf_counter() - start
+        row = {
+            "wall_s": elapsed,
+            # Feed progress rather than wall time, the UI may not keep up with --compress
+            "sim_h": feed.payloads / args.rate / 3600,
+            "rss_mib": rss_bytes() / (1024 * 1024),
+            "py_objects": len(gc.get_objects()),
+            "qobjects": len(window.findChildren(QObject)),
+            "frames": len(frames),
+            "frame_p50_ms": percentile(frames, 50) * 1000,
+            "frame_p95_ms": percentile(frames, 95) * 1000,
+            "frame_p99_ms": percentile(frames, 99) * 1000,
+        }
+        samples.append(row)
+        if writer is not None:
+            writer.writerow([f"{value:.3f}" if isinstance(value, float) else value for value in row.values()])
+            csv_file.flush()
+        print(f"{row['sim_h']:6.2f}h rss={row['rss_mib']:7.1f}MiB objects={row['py_objects']:8d} "
+              f"qobjects={row['qobjects']:6d} frame p95={row['frame_p95_ms']:6.2f}ms", flush=True)
+
+    timer = QTimer()
+    timer.timeout.connect(sample)
+    timer.start(int(args.sample * 1000))
+    app.exec()
+    source.disconnect()
+    if csv_file is not None:
+        csv_file.close()
+
+    measured = samples[int(len(samples) * args.warmup):]
+    hours = [row["sim_h"] for row in measured]
+    rss_slope = linear_slope(hours, [row["rss_mib"] for row in measured])
+    frame_slope = linear_slope(hours, [row["frame_p95_ms"] for row in measured])
+    qobject_slope = linear_slope(hours, [row["qobjects"] for row in measured])
+
+    growth = count_types() - baseline_types
+    print("Fastest growing Python types: " + ", ".join(f"{name}+{count}" for name, count in growth.most_common(8)))
+    print(f"Slopes per simulated hour: rss {rss_slope:+.2f} MiB (max {args.max_rss_slope}), "
+          f"frame p95 {frame_slope:+.3f} ms (max {args.max_frame_slope}), qobjects {qobject_slope:+.1f}")
+
+    if len(measured) < 2:
+        print("Not enough samples, run longer or sample more often")
+        return 1
+    failed = rss_slope > args.max_rss_slope or frame_slope > args.max_frame_slope
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QColor, QPainter, QPainterPath, QPen, QPixmap
+from PyQt5.QtCore import Qt, QPointF
+
+# Seconds covered by a fresh sparkline; the time axis doubles whenever the data outgrows it
+SPARK_SPAN = float(os.environ.get("DHAN_SPARK_SPAN", "900"))
+
+
+def lttb(ts, values, edges, start=0, anchor=None):
+    """ Largest-Triangle-Three-Buckets over fixed time buckets
+
+    Bucket k holds the samples with edges[k] <= ts < edges[k + 1]. From each
+    non-empty bucket the sample forming the largest triangle with the
+    previously chosen point and the average of the following bucket is kept.
+    Because buckets are fixed in time rather than in sample count, a new
+    sample can only change the choice in its own bucket and the one before,
+    so callers resume from `start` with the point chosen just before it as
+    `anchor`. Returns (bucket, index) pairs.
+    """
+    bounds = np.searchsorted(ts, edges, side="left")
+    picked = []
+    if anchor is None:
+        if not len(ts):
+            return picked
+        anchor = (ts[0], values[0])
+    ax, ay = anchor
+    last = len(bounds) - 1
+    for bucket in range(start, last):
+        lo, hi = bounds[bucket], bounds[bucket + 1]
+        if lo == hi:
+            continue
+        if bucket == last - 1 or hi == len(ts):
+            # Open bucket: its last sample is the live end of the line
+            index = hi - 1
+        else:
+            nxt = bounds[bucket + 2] if bucket + 2 <= last else len(ts)
+            if nxt == hi:
+                # Empty neighbour, aim at the next sample instead
+                nxt = hi + 1
+            cx = ts[hi:nxt].mean()
+            cy = values[hi:nxt].mean()
+            bx = ts[lo:hi]
+            by = values[lo:hi]
+            area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+            index = lo + int(area.argmax())
+        picked.append((bucket, int(index)))
+        ax, ay = ts[index], values[index]
+    return picked
+
+
+class Sparkline(QWidget):
+    """ Intraday line for one slot, downsampled to one point per pixel column
+
+    The choices for closed buckets are cached and stroked once into a pixmap.
+    A tick only re-runs LTTB for the last two buckets and strokes newly
+    settled segments onto the pixmap; it is redrawn from scratch when the
+    price range or the time axis changes.
+    """
+
+    def __init__(self, history, slot, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.slot = slot
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.t0 = None
+        self.t1 = None
+        # Chosen (ts, value) per bucket in time order; everything before `settled` is final
+        self.points = []
+        self.buckets = []
+        self.settled = 0
+        self.low = self.high = None
+        # Points stroked into the cached pixmap so far; redraw clears it first
+        self.path_points = 0
+        self.redraw = True
+        self.cache = None
+        self.cache_key = None
+        self.positive = True
+        self.stale = False
+
+    def reset_axis(self, t0, t1):
+        self.t0, self.t1 = t0, t1
+        self.points, self.buckets = [], []
+        self.settled = 0
+        self.redraw = True
+
+    def edges(self):
+        columns = max(2, self.width())
+        return np.linspace(self.t0, self.t1, columns + 1)
+
+    def refresh(self, stale=False):
+        """ Pick up samples added since the last call, repaint only if the line changed """
+        self.stale = stale
+        ts, values, p_ch = self.history.series(self.slot, self.t0)
+        if not len(ts):
+            return
+        self.positive = p_ch[-1] >= 0
+        if self.t0 is None or ts[0] > self.t0 + (self.t1 - self.t0) / max(2, self.width()):
+            # First data, or the ring overwrote the start of the line
+            self.reset_axis(ts[0], ts[0] + SPARK_SPAN)
+        if ts[-1] >= self.t1:
+            span = self.t1 - self.t0
+            while ts[-1] >= self.t0 + span:
+                span *= 2
+            self.reset_axis(self.t0, self.t0 + span)
+
+        # Re-run LTTB from the first bucket that may still change
+        keep = self.settled
+        start = self.buckets[keep] if keep < len(self.buckets) else (self.buckets[-1] + 1 if self.buckets else 0)
+        anchor = self.points[keep - 1] if keep else None
+        picked = lttb(ts, values, self.edges(), start, anchor)
+        tail = [(float(ts[i]), float(values[i])) for _, i in picked]
+        if self.points[keep:] == tail:
+            return
+        if keep < self.path_points:
+            # A point already stroked into the cache moved
+            self.redraw = True
+        self.points[keep:] = tail
+        self.buckets[keep:] = [bucket for bucket, _ in picked]
+        self.settled = max(0, len(self.points) - 2)
+
+        low, high = min(v for _, v in self.points), max(v for _, v in self.points)
+        if (low, high) != (self.low, self.high):
+            self.low, self.high = low, high
+            self.redraw = True
+        self.update()
+
+    def map_point(self, ts, value):
+        span = self.high - self.low or 1.0
+        x = (ts - self.t0) / (self.t1 - self.t0) * (self.width() - 1)
+        y = 2 + (self.high - value) / span * (self.height() - 5)
+        return QPointF(x, y)
+
+    def pen(self):
+        color = QColor(160, 160, 160) if self.stale else QColor(0, 200, 0) if self.positive else QColor(230, 40, 40)
+        color.setAlpha(200)
+        return QPen(color, 2, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+
+    def settled_pixmap(self):
+        # Settled part of the line, stroked once; new settled segments are drawn onto it in place
+        key = (self.stale, self.positive)
+        if self.cache is None or self.cache_key != key:
+            self.cache = QPixmap(self.size())
+            self.cache.fill(Qt.GlobalColor.transparent)
+            self.cache_key = key
+            self.redraw = True
+        if self.redraw:
+            # Range or axis changed, the whole line moves
+            self.cache.fill(Qt.GlobalColor.transparent)
+            self.path_points = 0
+            self.redraw = False
+        start = max(self.path_points - 1, 0)
+        if self.settled > self.path_points:
+            segment = QPainterPath()
+            for i, (ts, value) in enumerate(self.points[start:self.settled]):
+                point = self.map_point(ts, value)
+                if i:
+                    segment.lineTo(point)
+                else:
+                    segment.moveTo(point)
+            self.path_points = self.settled
+            painter = QPainter(self.cache)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(self.pen())
+            painter.drawPath(segment)
+            painter.end()
+        return self.cache
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.cache = None
+        if self.t0 is not None:
+            self.reset_axis(self.t0, self.t1)
+            self.low = self.high = None
+            self.refresh(self.stale)
+
+    def paintEvent(self, event):
+        if len(self.points) < 2:
+            return
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.settled_pixmap())
+        # Open buckets are still moving, they are stroked live
+        tail = QPainterPath()
+        for i, (ts, value) in enumerate(self.points[max(self.path_points - 1, 0):]):
+            point = self.map_point(ts, value)
+            if i:
+                tail.lineTo(point)
+            else:
+                tail.moveTo(point)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(self.pen())
+        painter.drawPath(tail)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of keeping card sparklines current")
+    parser.add_argument("--cards", type=int, default=54)
+    parser.add_argument("--samples", type=int, default=11000, help="history per card before timing (11000 ~ a session)")
+    parser.add_argument("--ticks", type=int, default=200, help="timed payloads")
+    parser.add_argument("--width", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from feedgen import SyntheticFeed
+    from history import TickHistory
+
+    app = QApplication(sys.argv[:1])
+    feed = SyntheticFeed(args.cards)
+    history = TickHistory(args.cards, args.samples + args.ticks + 1)
+    lines = []
+    for slot in range(args.cards):
+        line = Sparkline(history, slot)
+        line.resize(args.width, 90)
+        lines.append(line)
+
+    ts = time.time() - (args.samples + args.ticks) * 2.0
+
+    def tick():
+        nonlocal ts
+        ts += 2.0
+        for slot, item in enumerate(feed.payload()):
+            history.append(slot, ts, item["ltp"], item["p_ch"])
+        feed.step(2.0)
+
+    for _ in range(args.samples):
+        tick()
+    start = time.perf_counter()
+    for line in lines:
+        line.refresh()
+    built = time.perf_counter() - start
+
+    pixmap = QPixmap(args.width, 90)
+    refresh = paint = 0.0
+    for _ in range(args.ticks):
+        tick()
+        start = time.perf_counter()
+        for line in lines:
+            line.refresh()
+        refresh += time.perf_counter() - start
+        start = time.perf_counter()
+        for line in lines:
+            line.render(pixmap)
+        paint += time.perf_counter() - start
+
+    print(f"{args.cards} sparklines, {args.samples} samples each, {args.width} px: "
+          f"first build {built / args.cards * 1000:.2f} ms/card")
+    print(f"per payload: refresh {refresh / args.ticks * 1000:.2f} ms, "
+          f"paint {paint / args.ticks * 1000:.2f} ms for all cards")
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
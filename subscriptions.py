@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import deque
+
+from dashlog import get_logger
+
+# Extra feeds on the shared connection: "topic[=priority]", comma separated
+EXTRA_TOPICS = os.environ.get("DHAN_TOPICS", "")
+# Ticks handed to the UI per drain; anything beyond waits for the next one, lowest priority last
+DRAIN_BUDGET = int(os.environ.get("DHAN_DRAIN_BUDGET", "2000"))
+# Payloads kept per non-coalescing topic while the UI is behind
+QUEUE_LIMIT = 64
+
+log = get_logger("subscriptions")
+
+
+class Subscription:
+    """ One topic: how its payloads are decoded, merged while waiting, and ordered against other topics
+
+    decoder(payload, rx_ts) returns a list of tick dicts or None. A
+    coalescing topic keeps only the newest tick per key until the UI takes
+    it; otherwise whole payloads queue up to QUEUE_LIMIT, oldest dropped.
+    Higher priority topics are drained first.
+    """
+
+    def __init__(self, topic, decoder, coalesce=True, priority=0, qos=0):
+        self.topic = topic
+        self.decoder = decoder
+        self.coalesce = coalesce
+        self.priority = priority
+        self.qos = qos
+        # key -> newest tick, or a deque of payloads
+        self.latest = {}
+        self.queue = deque(maxlen=QUEUE_LIMIT)
+        self.received = 0
+        self.coalesced = 0
+
+    def __repr__(self):
+        return f"Subscription({self.topic!r}, priority={self.priority}, coalesce={self.coalesce})"
+
+    def offer(self, data):
+        self.received += 1
+        if not self.coalesce:
+            self.queue.append(data)
+            return
+        latest = self.latest
+        for item in data:
+            key = item.get("key") if isinstance(item, dict) else None
+            if key in latest:
+                self.coalesced += 1
+                # Re-insert so a key keeps its place in arrival order of its newest tick
+                del latest[key]
+            latest[key if key is not None else object()] = item
+
+    def pending(self):
+        return len(self.latest) if self.coalesce else sum(len(data) for data in self.queue)
+
+    def take(self, budget):
+        """ Up to budget ticks (whole payloads for queued topics), oldest first """
+        items = []
+        if self.coalesce:
+            latest = self.latest
+            while latest and len(items) < budget:
+                key = next(iter(latest))
+                items.append(latest.pop(key))
+        else:
+            while self.queue and (not items or len(items) + len(self.queue[0]) <= budget):
+                items.extend(self.queue.popleft())
+        return items
+
+
+class SubscriptionManager:
+    """ Topics sharing one broker connection, and the hand-off from the network thread to the UI
+
+    offer() runs on the network thread: it decodes with the topic's decoder
+    and merges the result into that topic's pending ticks. take() runs on the
+    UI thread and returns pending ticks in priority order, at most `budget`
+    of them, so when the UI falls behind the visible feed still goes first.
+    """
+
+    def __init__(self, budget=DRAIN_BUDGET):
+        self.budget = budget
+        self.subscriptions = {}
+        # Sorted highest priority first whenever a topic is added or re-prioritised
+        self.ordered = []
+        self.lock = threading.Lock()
+        self.scheduled = False
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def __iter__(self):
+        return iter(list(self.ordered))
+
+    def register(self, topic, decoder, coalesce=True, priority=0, qos=0):
+        subscription = Subscription(topic, decoder, coalesce, priority, qos)
+        with self.lock:
+            self.subscriptions[topic] = subscription
+            self.reorder()
+        return subscription
+
+    def unregister(self, topic):
+        with self.lock:
+            subscription = self.subscriptions.pop(topic, None)
+            self.reorder()
+        return subscription
+
+    def set_priority(self, topic, priority):
+        # e.g. raise the topic behind the view on screen
+        with self.lock:
+            self.subscriptions[topic].priority = priority
+            self.reorder()
+
+    def reorder(self):
+        self.ordered = sorted(self.subscriptions.values(), key=lambda s: -s.priority)
+
+    def topics(self):
+        return [(subscription.topic, subscription.qos) for subscription in self.ordered]
+
+    def match(self, topic):
+        subscription = self.subscriptions.get(topic)
+        if subscription is None:
+            from paho.mqtt.client import topic_matches_sub
+            subscription = next((s for s in self.ordered if topic_matches_sub(s.topic, topic)), None)
+        return subscription
+
+    def offer(self, topic, payload, rx_ts):
+        """ Decode and merge one payload; True when the UI needs to schedule a take() """
+        subscription = self.match(topic)
+        if subscription is None:
+            log.warning("Message on unregistered topic %s dropped", topic)
+            return False
+        data = subscription.decoder(payload, rx_ts)
+        if not data:
+            return False
+        with self.lock:
+            subscription.offer(data)
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def take(self):
+        """ Pending ticks, highest priority topic first; (items, more) with more set when some had to wait """
+        with self.lock:
+            items = []
+            for subscription in self.ordered:
+                if len(items) >= self.budget:
+                    break
+                items.extend(subscription.take(self.budget - len(items)))
+            more = any(subscription.latest or subscription.queue for subscription in self.ordered)
+            self.scheduled = more
+            return items, more
+
+
+def parse_topics(spec=EXTRA_TOPICS):
+    """ [(topic, priority)] from "a/b=5,c/d" """
+    topics = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        topic, _, priority = part.partition("=")
+        try:
+            topics.append((topic.strip(), int(priority) if priority else 0))
+        except ValueError:
+            raise ValueError(f"Bad priority in DHAN_TOPICS entry {part!r}")
+    return topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain order and cost of the subscription manager under a backlog")
+    parser.add_argument("--topics", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=500, help="instruments per topic")
+    parser.add_argument("--payloads", type=int, default=2000, help="payloads offered before each take")
+    parser.add_argument("--budget", type=int, default=DRAIN_BUDGET)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    manager = SubscriptionManager(args.budget)
+    for n in range(args.topics):
+        manager.register(f"stockdock/screen/feed-{n}", lambda payload, rx_ts: payload, priority=n)
+    start = time.perf_counter()
+    for _ in range(args.payloads):
+        n = rng.randrange(args.topics)
+        payload = [{"key": f"{n}-{rng.randrange(args.keys)}", "ltp": rng.random(), "p_ch": 0.0} for _ in range(20)]
+        manager.offer(f"stockdock/screen/feed-{n}", payload, 0.0)
+    offered = time.perf_counter() - start
+    print(f"{args.payloads} payloads of 20 ticks offered in {offered * 1000:.1f} ms "
+          f"({offered / args.payloads * 1e6:.1f} us each)")
+    for subscription in manager:
+        print(f"  {subscription.topic}: priority {subscription.priority}, {subscription.received} payloads, "
+              f"{subscription.pending()} ticks pending after coalescing {subscription.coalesced}")
+    takes = 0
+    more = True
+    while more:
+        start = time.perf_counter()
+        items, more = manager.take()
+        takes += 1
+        topics = sorted({item["key"].split("-")[0] for item in items}, reverse=True)
+        print(f"take {takes}: {len(items)} ticks in {(time.perf_counter() - start) * 1000:.2f} ms, "
+              f"topics {', '.join(topics)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
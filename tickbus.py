@@ -0,0 +1,568 @@
+import os
+import sys
+import mmap
+import time
+import errno
+import fcntl
+import socket
+import random
+import argparse
+
+import numpy as np
+from PyQt5.QtCore import QSocketNotifier, QTimer
+
+from dashlog import get_logger
+from datasource import DataSource
+from metrics import metrics
+
+# Shared table written by the feed daemon, read by every local dashboard
+BUS_PATH = os.environ.get("DHAN_TICKBUS", "/dev/shm/dhan-tickbus")
+BUS_SLOTS = int(os.environ.get("DHAN_TICKBUS_SLOTS", "8192"))
+MAGIC = 0x44544b42
+VERSION = 2
+# Readers rescan on this timer too, in case a notification was dropped or the daemon restarted
+POLL_INTERVAL = 1000
+
+HEADER = np.dtype([("magic", "<u4"), ("version", "<u4"), ("capacity", "<u4"), ("count", "<u4"),
+                   ("instance", "<u8"), ("generation", "<u8"), ("reserved", "u1", 32)])
+# seq counts writes to the record, so readers can tell which records changed
+RECORD = np.dtype([("seq", "<u4"), ("reserved", "<u4"), ("ltp", "<f8"), ("p_ch", "<f8"),
+                   ("rx_ts", "<f8"), ("key", "S32")])
+# Longer keys would be cut, colliding with others of the same prefix or splitting a UTF-8 character
+KEY_BYTES = RECORD["key"].itemsize
+
+log = get_logger("tickbus")
+
+
+def socket_dir(path):
+    # Readers' notification sockets, one per process
+    return path + ".d"
+
+
+def control_path(path):
+    # The daemon's socket for datagrams from dashboards, e.g. "focus <topic>"
+    return path + ".ctl"
+
+
+def map_table(path, capacity=None):
+    """ (file, mmap, header, records) for an existing table, or a new one when capacity is given
+
+    The file stays open: its flock is what orders the writer's stores against the readers' loads.
+    """
+    if capacity is not None:
+        size = HEADER.itemsize + capacity * RECORD.itemsize
+        # Build under a temporary name so readers never map a half-initialised table
+        tmp = f"{path}.{os.getpid()}"
+        f = open(tmp, "w+b")
+        f.truncate(size)
+        buffer = mmap.mmap(f.fileno(), size)
+        header = np.ndarray((), HEADER, buffer, 0)
+        header["magic"], header["version"], header["capacity"] = MAGIC, VERSION, capacity
+        header["instance"] = random.getrandbits(63)
+        os.replace(tmp, path)
+    else:
+        f = open(path, "r+b")
+        buffer = mmap.mmap(f.fileno(), 0)
+        header = np.ndarray((), HEADER, buffer, 0)
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            del header
+            buffer.close()
+            f.close()
+            raise ValueError(f"{path} is not a version {VERSION} tick bus")
+    records = np.ndarray((int(header["capacity"]),), RECORD, buffer, HEADER.itemsize)
+    return f, buffer, header, records
+
+
+class TableLock:
+    """ flock on the table file around every batch written and every read
+
+    numpy stores cannot be fenced from Python, and on ARM another core may
+    see them out of order or see half of an 8-byte double. The kernel's lock
+    has acquire/release semantics on every architecture, so whatever the
+    writer stored before unlocking is visible, whole, to a reader that
+    locks after it. Held for one vectorised copy, so neither side waits long.
+    """
+
+    def __init__(self, file, mode):
+        self.fd = file.fileno()
+        self.mode = mode
+
+    def __enter__(self):
+        fcntl.flock(self.fd, self.mode)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+class TickBusWriter:
+    """ The daemon's side: the latest tick per key in a shared table, plus a wake-up for readers
+
+    Keys get a record the first time they are seen, in arrival order, and
+    keep it for the life of the table. A batch is written column by column
+    under the exclusive table lock, then every registered reader socket gets
+    a one-byte datagram. A reader that is
+    gone is forgotten; one that is slow just misses the datagram and
+    catches up on the next. Dashboards talk back through the control
+    socket, read with commands().
+    """
+
+    def __init__(self, path=BUS_PATH, capacity=BUS_SLOTS):
+        self.path = path
+        self.file, self.buffer, self.header, self.records = map_table(path, capacity)
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.lock = TableLock(self.file, fcntl.LOCK_EX)
+        self.slots = {}
+        self.full_logged = False
+        self.rejected = set()
+        os.makedirs(socket_dir(path), exist_ok=True)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.control = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.control.setblocking(False)
+        try:
+            # Only one writer per path runs at a time, so this one was left behind
+            os.unlink(control_path(path))
+        except FileNotFoundError:
+            pass
+        self.control.bind(control_path(path))
+        self.readers = []
+        self.readers_scanned = 0.0
+        log.info("Tick bus %s: %d slots (%.1f MB)", path, capacity, len(self.buffer) / 1e6)
+
+    def slot(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            encoded = key.encode("utf-8")
+            if len(encoded) > KEY_BYTES:
+                if key not in self.rejected:
+                    log.error("Tick bus key %r is longer than %d bytes, its ticks are dropped", key, KEY_BYTES)
+                    self.rejected.add(key)
+                return None
+            count = len(self.slots)
+            if count == len(self.records):
+                if not self.full_logged:
+                    log.error("Tick bus is full at %d keys, %s and later keys are dropped", count, key)
+                    self.full_logged = True
+                return None
+            # The key is in place before count makes the record visible
+            self.records["key"][count] = encoded
+            self.slots[key] = slot = count
+            self.header["count"] = count + 1
+        return slot
+
+    def publish(self, data):
+        latest = {}
+        for item in data:
+            if isinstance(item, dict) and "key" in item and "ltp" in item and "p_ch" in item:
+                latest[item["key"]] = item
+        with self.lock:
+            slots = []
+            items = []
+            for key, item in latest.items():
+                slot = self.slot(key)
+                if slot is not None:
+                    slots.append(slot)
+                    items.append(item)
+            if not slots:
+                return 0
+            index = np.array(slots)
+            self.records["ltp"][index] = [item["ltp"] for item in items]
+            self.records["p_ch"][index] = [item["p_ch"] for item in items]
+            self.records["rx_ts"][index] = [item.get("rx_ts", 0.0) for item in items]
+            self.records["seq"][index] += 1
+            self.header["generation"] += 1
+        self.notify()
+        return len(slots)
+
+    def notify(self):
+        now = time.monotonic()
+        if now - self.readers_scanned > 1.0:
+            directory = socket_dir(self.path)
+            self.readers = [os.path.join(directory, name) for name in os.listdir(directory)]
+            self.readers_scanned = now
+        for reader in list(self.readers):
+            try:
+                self.sock.sendto(b"\x01", reader)
+            except BlockingIOError:
+                # Its queue is full, it already has a wake-up pending
+                pass
+            except OSError as e:
+                if e.errno in (errno.ECONNREFUSED, errno.ENOENT):
+                    self.forget(reader)
+                else:
+                    log.warning("Cannot notify %s: %s", reader, e)
+
+    def commands(self):
+        """ Control datagrams sent by dashboards since the last call """
+        commands = []
+        while True:
+            try:
+                data = self.control.recv(512)
+            except BlockingIOError:
+                return commands
+            commands.append(data.decode("utf-8", "replace"))
+
+    def forget(self, reader):
+        self.readers.remove(reader)
+        try:
+            os.unlink(reader)
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+        self.control.close()
+        self.header = self.records = None
+        self.buffer.close()
+        self.file.close()
+        try:
+            # Leave a newer table that another writer has put in place alone
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+                os.unlink(control_path(self.path))
+            # Only succeeds once no reader socket is left
+            os.rmdir(socket_dir(self.path))
+        except OSError:
+            pass
+
+
+class TickBusReader:
+    """ A dashboard's view of the shared table, read without copying the table
+
+    changes() takes the shared table lock, compares each record's seq with
+    the last one seen and copies only the changed records out with fancy
+    indexing. The lock, not the wake-up, is what makes the copy consistent,
+    so the poll timer's reads are as safe as the notified ones.
+    """
+
+    def __init__(self, path=BUS_PATH):
+        self.path = path
+        self.inode = os.stat(path).st_ino
+        self.file, self.buffer, self.header, self.records = map_table(path)
+        self.lock = TableLock(self.file, fcntl.LOCK_SH)
+        self.instance = int(self.header["instance"])
+        self.seen = np.zeros(len(self.records), dtype=np.uint32)
+        self.keys = []
+
+    def replaced(self):
+        # The daemon restarted and built a new table at the same path
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def changes(self):
+        """ Ticks written since the last call, as the {"key", "ltp", "p_ch", "rx_ts"} dicts sources deliver """
+        with self.lock:
+            count = int(self.header["count"])
+            while len(self.keys) < count:
+                self.keys.append(self.records["key"][len(self.keys)].decode("utf-8"))
+            seq = self.records["seq"][:count].copy()
+            changed = np.flatnonzero(seq != self.seen[:count])
+            if not len(changed):
+                return []
+            ltp = self.records["ltp"][changed]
+            p_ch = self.records["p_ch"][changed]
+            rx_ts = self.records["rx_ts"][changed]
+        self.seen[changed] = seq[changed]
+        keys = self.keys
+        return [{"key": keys[slot], "ltp": price, "p_ch": change, "rx_ts": ts}
+                for slot, price, change, ts in zip(changed.tolist(), ltp.tolist(), p_ch.tolist(), rx_ts.tolist())]
+
+    def close(self):
+        # numpy views keep the mmap exported; drop them first
+        self.header = self.records = None
+        self.buffer.close()
+        self.file.close()
+
+
+class BusSource(DataSource):
+    """ Dashboard data source reading the tick bus of a local feed daemon (tickbus.py serve)
+
+    Waits for the table to appear, rescans once a second, and remaps when
+    the daemon restarts; the dashboard never needs to know. focus_topic()
+    is forwarded to the daemon, whose subscriptions do the reordering, and
+    sent again after every remap. With several dashboards on one daemon
+    the last one to change its view wins.
+    """
+
+    live = True
+
+    def __init__(self, path=BUS_PATH, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.reader = None
+        self.sock = None
+        self.notifier = None
+        self.sock_path = os.path.join(socket_dir(path), f"{os.getpid()}.sock")
+        self.focused = None
+        self.waiting_logged = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL)
+        self.timer.timeout.connect(self.poll)
+
+    def connect(self):
+        if self.sock is None:
+            os.makedirs(socket_dir(self.path), exist_ok=True)
+            if os.path.exists(self.sock_path):
+                os.unlink(self.sock_path)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.setblocking(False)
+            self.sock.bind(self.sock_path)
+            self.notifier = QSocketNotifier(self.sock.fileno(), QSocketNotifier.Type.Read, self)
+            self.notifier.activated.connect(self.wake)
+        self.timer.start()
+        self.poll()
+
+    def disconnect(self):
+        self.timer.stop()
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.sock_path)
+            except OSError:
+                pass
+        self.detach()
+
+    def attach(self):
+        try:
+            self.reader = TickBusReader(self.path)
+        except (OSError, ValueError) as e:
+            if not self.waiting_logged:
+                log.warning("Tick bus %s not available yet: %s", self.path, e)
+                self.waiting_logged = True
+            self.set_connected(False)
+            return False
+        log.info("Attached to tick bus %s (%d keys)", self.path, int(self.reader.header["count"]))
+        self.waiting_logged = False
+        self.set_connected(True)
+        self.send_focus()
+        return True
+
+    def detach(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.set_connected(False)
+
+    def set_connected(self, connected):
+        self.is_connected = connected
+        metrics.set_connected(connected)
+
+    def focus_topic(self, topic):
+        self.focused = topic
+        self.send_focus()
+
+    def send_focus(self):
+        if self.focused is None or self.sock is None:
+            return
+        try:
+            self.sock.sendto(f"focus {self.focused}".encode("utf-8"), control_path(self.path))
+        except OSError as e:
+            # No daemon yet; attach() sends it again
+            log.debug("Cannot send focus to %s: %s", control_path(self.path), e)
+
+    def wake(self):
+        # Several wake-ups collapse into one scan
+        try:
+            while self.sock.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+        self.poll()
+
+    def poll(self):
+        if self.reader is not None and self.reader.replaced():
+            log.info("Tick bus %s was replaced, remapping", self.path)
+            self.detach()
+        if self.reader is None and not self.attach():
+            return
+        data = self.reader.changes()
+        if data:
+            metrics.message(0.0, len(data))
+            self.data_received.emit(data)
+
+
+def read_pidfile(pidfile, path=None):
+    """ Pid of the live process named in pidfile, None when there is none
+
+    With path, the process must also be the feed daemon serving that table,
+    so a pid reused by another process after a crash or reboot is not adopted.
+    """
+    try:
+        with open(pidfile, "r") as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return None
+    if path is not None and not serves(pid, path):
+        return None
+    return pid
+
+
+def serves(pid, path):
+    # Without /proc there is nothing more to check than the live pid
+    if not os.path.exists("/proc/self/cmdline"):
+        return True
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = f.read().decode("utf-8", "replace").split("\0")
+    except OSError:
+        return False
+    if "serve" not in args:
+        return False
+    served = BUS_PATH
+    for i, arg in enumerate(args):
+        if arg == "--path" and i + 1 < len(args):
+            served = args[i + 1]
+        elif arg.startswith("--path="):
+            served = arg[len("--path="):]
+    return served == path
+
+
+def write_pidfile(pidfile, path=None):
+    """ Claim pidfile for this process; False when another live daemon holds it """
+    while True:
+        try:
+            fd = os.open(pidfile, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if read_pidfile(pidfile, path) is not None:
+                return False
+            # Left behind by a daemon that died, or naming a pid now reused by another process
+            try:
+                os.unlink(pidfile)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{os.getpid()}\n")
+        return True
+
+
+def serve(args):
+    from PyQt5.QtCore import QCoreApplication
+    from datasource import create_source
+
+    # Always claimed: a second daemon on the same path would replace the table under the first
+    pidfile = args.pidfile or args.path + ".pid"
+    if not write_pidfile(pidfile, args.path):
+        log.info("Feed daemon already running as pid %s", read_pidfile(pidfile))
+        return 0
+    app = QCoreApplication(sys.argv[:1])
+    writer = TickBusWriter(args.path, args.slots)
+    source = create_source(args.source, args.replay_file, args.speed)
+    source.data_received.connect(writer.publish)
+    source.connect()
+
+    def control():
+        for command in writer.commands():
+            name, _, argument = command.partition(" ")
+            if name == "focus":
+                source.focus_topic(argument)
+            else:
+                log.warning("Ignoring unknown control command %r", command)
+
+    notifier = QSocketNotifier(writer.control.fileno(), QSocketNotifier.Type.Read)
+    notifier.activated.connect(control)
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    # Let Python see the signals while Qt waits
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(250)
+
+    # A daemon started for one dashboard goes away some time after its last reader
+    idle_since = [time.monotonic()]
+
+    def check_idle():
+        # Also prunes sockets of readers that died without cleaning up
+        writer.notify()
+        if writer.readers:
+            idle_since[0] = time.monotonic()
+        elif time.monotonic() - idle_since[0] > args.idle_exit:
+            log.info("No reader for %.0fs, exiting", args.idle_exit)
+            app.quit()
+
+    idle = QTimer()
+    idle.timeout.connect(check_idle)
+    if args.idle_exit:
+        idle.start(POLL_INTERVAL)
+    try:
+        app.exec_()
+    finally:
+        source.disconnect()
+        writer.close()
+        if read_pidfile(pidfile) == os.getpid():
+            os.unlink(pidfile)
+    return 0
+
+
+def bench(args):
+    path = f"{args.path}.bench"
+    writer = TickBusWriter(path, args.slots)
+    reader = TickBusReader(path)
+    rng = random.Random(42)
+    keys = [f"IDX-I-{i}" for i in range(args.instruments)]
+    batches = [[{"key": rng.choice(keys), "ltp": rng.uniform(100, 50000), "p_ch": rng.uniform(-3, 3), "rx_ts": 0.0}
+                for _ in range(args.batch)] for _ in range(50)]
+    published = read = 0.0
+    ticks = 0
+    for n in range(args.rounds):
+        start = time.perf_counter()
+        writer.publish(batches[n % len(batches)])
+        published += time.perf_counter() - start
+        start = time.perf_counter()
+        ticks += len(reader.changes())
+        read += time.perf_counter() - start
+    reader.close()
+    writer.close()
+    print(f"{args.instruments} keys, batches of {args.batch}: publish {published / args.rounds * 1e6:.1f} us, "
+          f"read {read / args.rounds * 1e6:.1f} us per batch, {ticks / args.rounds:.0f} ticks read per batch")
+    return 0
+
+
+def dump(args):
+    reader = TickBusReader(args.path)
+    count = int(reader.header["count"])
+    print(f"{args.path}: instance {reader.instance:x}, generation {int(reader.header['generation'])}, "
+          f"{count} of {len(reader.records)} slots used")
+    for tick in sorted(reader.changes(), key=lambda tick: tick["key"])[:args.limit]:
+        print(f"  {tick['key']:<16} {tick['ltp']:>12,.2f} {tick['p_ch']:>7.2f}%")
+    reader.close()
+    return 0
+
+
+def main(argv=None):
+    from datasource import SOURCE, SOURCES, REPLAY_FILE, SOURCE_SPEED
+
+    parser = argparse.ArgumentParser(description="Feed daemon sharing one broker connection with local dashboards")
+    parser.add_argument("command", choices=("serve", "dump", "bench"))
+    parser.add_argument("--path", default=BUS_PATH)
+    parser.add_argument("--slots", type=int, default=BUS_SLOTS)
+    feeds = [source for source in SOURCES if source not in ("bus", "ingest")]
+    parser.add_argument("--source", choices=feeds, default=SOURCE if SOURCE in feeds else "mqtt",
+                        help="what serve publishes (default: DHAN_SOURCE or mqtt)")
+    parser.add_argument("--replay-file", default=REPLAY_FILE)
+    parser.add_argument("--speed", type=float, default=SOURCE_SPEED)
+    parser.add_argument("--pidfile", help="serve: refuse to start while the daemon named in it is alive "
+                                           "(default: PATH.pid)")
+    parser.add_argument("--idle-exit", type=float, default=0,
+                        help="serve: exit after this many seconds without a reader, 0 = never")
+    parser.add_argument("--limit", type=int, default=60, help="ticks printed by dump")
+    parser.add_argument("--instruments", type=int, default=5000, help="keys used by bench")
+    parser.add_argument("--batch", type=int, default=500, help="ticks per batch in bench")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    from dashlog import setup_logging
+    setup_logging()
+    return {"serve": serve, "dump": dump, "bench": bench}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())